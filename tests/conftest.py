@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# リポジトリ直下の wbgt_processor を import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wbgt_processor as wp  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def discard_output_writer():
+    """テストが開始したまま残したビルドの書き込み器を破棄し、後続のテストに持ち越さない"""
+    yield
+    writer, wp._OUTPUT_WRITER = wp._OUTPUT_WRITER, None
+    if writer:
+        writer.abort()
@@ -0,0 +1,103 @@
+"""地点 × 時刻の一括統計計算のテスト"""
+
+from datetime import datetime
+
+import wbgt_processor as wp
+
+
+def _forecast(times, values, station_id="44132"):
+    return wp.Forecast(station_id, "2026/08/22 05:00", times, values)
+
+
+def test_compute_analytics_stats():
+    forecasts = {
+        "tokyo": _forecast(
+            ["2026-08-22T09:00", "2026-08-22T12:00", "2026-08-22T15:00"],
+            [265, 312, 290],
+        ),
+        "missing": None,
+    }
+    analytics = wp.compute_analytics(forecasts)
+    assert analytics["keys"] == ["tokyo"]
+
+    stats = wp.get_station_stats(analytics, "tokyo")
+    assert stats["current"] == 26.5
+    assert stats["max"] == 31.2
+    assert stats["min"] == 26.5
+    assert stats["level"] == "警戒"
+    assert stats["data_points"] == 3
+    assert stats["hours_at_or_above"] == {"21": 9.0, "25": 9.0, "28": 6.0, "31": 3.0}
+    assert stats["first_crossing"]["31"] == "2026-08-22T12:00:00"
+    assert wp.get_station_stats(analytics, "missing") is None
+
+
+def test_compute_analytics_without_data():
+    empty = _forecast([], [])
+    for forecasts in ({}, {"tokyo": None}, {"tokyo": empty}):
+        analytics = wp.compute_analytics(forecasts)
+        assert analytics["keys"] == []
+        assert analytics["values"].shape[0] == 0
+        assert wp.get_station_stats(analytics, "tokyo") is None
+        assert wp.detect_alert_events(analytics) == {}
+
+
+def test_process_station_skips_empty_forecast(monkeypatch):
+    monkeypatch.setattr(
+        wp, "fetch_station", lambda *args, **kwargs: _forecast([], [])
+    )
+    key, config = next(iter(wp.STATIONS.items()))
+    assert wp.process_station(key, config) == (False, "", None)
+
+
+def test_hours_use_each_station_time_axis():
+    # 3 時間ごとの地点と 1 時間ごとの地点が混在しても、継続時間は地点自身の間隔で数える
+    forecasts = {
+        "hourly": _forecast(
+            ["2026-08-22T09:00", "2026-08-22T10:00", "2026-08-22T11:00"],
+            [300, 300, 300],
+        ),
+        "three_hourly": _forecast(
+            ["2026-08-22T09:00", "2026-08-22T12:00", "2026-08-22T15:00"],
+            [300, 300, 300],
+        ),
+    }
+    analytics = wp.compute_analytics(forecasts)
+    assert wp.get_station_stats(analytics, "hourly")["hours_at_or_above"]["28"] == 3.0
+    assert (
+        wp.get_station_stats(analytics, "three_hourly")["hours_at_or_above"]["28"]
+        == 9.0
+    )
+
+
+def test_alerts_use_each_station_time_axis():
+    # 1 時間ごとの地点と一緒に解析しても、3 時間ごとの地点の連続区間は自身の時刻軸で求める
+    three_hourly = _forecast(
+        [f"2026-08-22T{hour:02d}:00" for hour in (9, 12, 15, 18)],
+        [300, 310, 300, 200],
+    )
+    hourly = _forecast(
+        [f"2026-08-22T{hour:02d}:00" for hour in range(9, 15)],
+        [250, 260, 270, 280, 290, 270],
+    )
+    now = datetime(2026, 8, 22, 9, 0)
+
+    def events(forecasts, horizons=(3, 4)):
+        analytics = wp.compute_analytics(forecasts)
+        return wp.detect_alert_events(analytics, now, [28], horizons)["three_hourly"]
+
+    alone = events({"three_hourly": three_hourly})
+    mixed = events({"hourly": hourly, "three_hourly": three_hourly})
+    assert mixed == alone
+    assert [event["horizon_hours"] for event in mixed] == [3]
+    event = mixed[0]
+    assert event["target_time"] == "2026-08-22T12:00:00"
+    assert event["onset"] == "2026-08-22T09:00:00"
+    assert event["duration_hours"] == 9.0
+    assert event["peak_value"] == 31.0
+    assert event["recovery_time"] == "2026-08-22T18:00:00"
+    assert event["recovery_value"] == 20.0
+
+    # 13:00 は 1 時間ごとの地点にしかない時刻（3 時間ごとの地点は最も近い 12:00 で判定する）
+    (later,) = events({"hourly": hourly, "three_hourly": three_hourly}, [4])
+    assert later["target_time"] == "2026-08-22T12:00:00"
+    assert later["onset"] == "2026-08-22T09:00:00"
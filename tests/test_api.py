@@ -0,0 +1,28 @@
+"""API サーバーの応答のテスト"""
+
+import wbgt_processor as wp
+
+
+def test_accepts_gzip_honours_quality_values():
+    assert wp.accepts_gzip("gzip")
+    assert wp.accepts_gzip("br, gzip;q=0.5")
+    assert wp.accepts_gzip("*")
+    assert not wp.accepts_gzip("")
+    assert not wp.accepts_gzip("identity")
+    assert not wp.accepts_gzip("gzip;q=0")
+    assert not wp.accepts_gzip("gzip; q=0.0, br")
+    assert not wp.accepts_gzip("*;q=0")
+    assert not wp.accepts_gzip("gzip;q=0, *")
+
+
+def test_gzip_refused_with_zero_quality():
+    server = wp.ApiServer(http_cache={})
+    # 圧縮対象になる大きさの応答を返すスナップショット
+    server.snapshot = {"generated_at": "x" * 1024, "responses": {}}
+
+    _, headers, body = server.respond("GET", "/healthz", {"accept-encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in headers
+    assert body.startswith(b"{")
+
+    _, headers, _ = server.respond("GET", "/healthz", {"accept-encoding": "gzip"})
+    assert headers["Content-Encoding"] == "gzip"
@@ -0,0 +1,33 @@
+"""予報 CSV の逐次解析のテスト"""
+
+import wbgt_processor as wp
+
+HEADER = ",,2026082221,2026082224,2026083127,2026123124,"
+
+
+def test_hour_24_rolls_over_to_next_day():
+    axis = wp.parse_time_axis(HEADER.split(",")[2:])
+    assert [str(t) for t in axis] == [
+        "2026-08-22T21:00",
+        "2026-08-23T00:00",
+        "2026-09-01T03:00",
+        "2027-01-01T00:00",
+    ]
+
+
+def test_blank_and_invalid_cells_skip_only_their_slot():
+    lines = [HEADER, "44132,2026/08/22 05:00,250,,abc,310", "44136,2026/08/22 05:00,1,2,3,4"]
+    first, second = wp.iter_wbgt_csv(lines)
+
+    assert first.station_id == "44132"
+    assert first.update_time == "2026/08/22 05:00"
+    assert first.iso_times() == ["2026-08-22T21:00:00", "2027-01-01T00:00:00"]
+    assert first.values.tolist() == [250, 310]
+    # 時刻軸は全ての行で共有する
+    assert second.values.tolist() == [1, 2, 3, 4]
+    assert len(second.times) == 4
+
+
+def test_parse_wbgt_csv_returns_first_station():
+    wbgt_data = wp.parse_wbgt_csv(f"{HEADER}\n44132,2026/08/22 05:00,250,260,270,280\n")
+    assert wbgt_data.wbgt.tolist() == [25.0, 26.0, 27.0, 28.0]
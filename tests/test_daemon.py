@@ -0,0 +1,40 @@
+"""常駐モードで実行をまたいで保持する状態のテスト"""
+
+import wbgt_processor as wp
+
+HEADER = ",,2026082209,2026082212,2026082215,"
+
+
+def _download(station_id, session=None, http_cache=None):
+    return wp.parse_wbgt_csv(f"{HEADER}\n{station_id},2026/08/22 05:00,265,312,290\n")
+
+
+def test_second_cycle_reuses_state_without_rereading_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wp, "ADAPTIVE_POLLING", False)
+    monkeypatch.setattr(wp, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(wp, "ARCHIVE_ENABLED", False)
+    monkeypatch.setattr(wp, "download_wbgt_data", _download)
+    monkeypatch.setattr(wp, "_PUBLISHED_CONTENT", {})
+    daemon_state = wp.new_daemon_state()
+    build_manifest = {}
+
+    wp.main({}, {}, build_manifest, daemon_state)
+    assert set(daemon_state["forecasts"]) == set(wp.STATIONS)
+    assert daemon_state["optimize_manifest"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("前回の出力を読み直した")
+
+    monkeypatch.setattr(wp, "load_station_forecast", fail)
+    monkeypatch.setattr(wp, "render_sparkline_svg", fail)
+    monkeypatch.setattr(wp, "read_output", fail)
+    written = []
+    monkeypatch.setattr(
+        wp.OutputWriter, "commit", lambda self: written.extend(self.staged) or 0
+    )
+
+    wp.main({}, {}, build_manifest, daemon_state)
+    assert not (tmp_path / "error_report.json").exists()
+    # 予報が同じなら生成時刻（build_info.json）以外は書き込まない
+    assert written == [wp.BUILD_INFO_FILE]
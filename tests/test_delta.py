@@ -0,0 +1,69 @@
+"""予報の差分フィードのテスト"""
+
+import json
+import os
+
+import wbgt_processor as wp
+
+TIMES = ["2026-08-22T09:00", "2026-08-22T12:00", "2026-08-22T15:00"]
+
+
+def _forecast(values, update_time="2026/08/22 05:00"):
+    return wp.Forecast("44132", update_time, TIMES[: len(values)], values)
+
+
+def _feed():
+    with open(wp.DELTA_INDEX_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_diff_forecast_reports_changed_slots():
+    assert wp.diff_forecast(_forecast([265, 312]), _forecast([265, 312])) is None
+
+    change = wp.diff_forecast(
+        _forecast([265, 312]), _forecast([265, 275, 290], "2026/08/22 08:00")
+    )
+    assert change["previous_update_time"] == "2026/08/22 05:00"
+    assert change["slots"] == [
+        {
+            "time": "2026-08-22T12:00:00",
+            "old": 31.2,
+            "new": 27.5,
+            "levels": ["運動は原則中止", "警戒"],
+        },
+        {
+            "time": "2026-08-22T15:00:00",
+            "old": None,
+            "new": 29.0,
+            "levels": [None, "厳重警戒"],
+        },
+    ]
+    assert "level" not in change
+
+    added = wp.diff_forecast(None, _forecast([265]))
+    assert [slot["old"] for slot in added["slots"]] == [None]
+
+
+def test_delta_feed_sequence_numbers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wp, "DELTA_HISTORY", 2)
+    change = wp.diff_forecast(None, _forecast([265]))
+
+    assert wp.create_delta_feed({"tokyo": change}) == 1
+    # 変更がなければ通番を進めず、何も出力しない
+    assert wp.create_delta_feed({}) == 1
+    assert wp.create_delta_feed({"tokyo": change}) == 2
+    assert wp.create_delta_feed({"tokyo": change}) == 3
+
+    feed = _feed()
+    assert feed["latest_sequence"] == 3
+    assert feed["oldest_sequence"] == 2
+    assert [entry["sequence"] for entry in feed["deltas"]] == [2, 3]
+    # 一覧から外れた差分ファイルは削除する
+    assert sorted(os.listdir(wp.DELTA_DIR)) == ["00000002.json", "00000003.json"]
+
+    with open(feed["deltas"][-1]["file"], encoding="utf-8") as f:
+        delta = json.load(f)
+    assert delta["sequence"] == 3
+    assert delta["previous_sequence"] == 2
+    assert delta["stations"] == {"tokyo": change}
@@ -0,0 +1,15 @@
+"""インデックスページのテスト"""
+
+import wbgt_processor as wp
+
+
+def test_index_page_fetches_configured_output_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wp, "BUILD_INFO_FILE", "info/build.json")
+    monkeypatch.setattr(wp, "INDEX_BUNDLE_FILE", "info/index.json")
+    wp.create_index_html()
+
+    html = (tmp_path / "index.html").read_text(encoding="utf-8")
+    assert "fetch('info/build.json')" in html
+    assert "fetch('info/index.json')" in html
+    assert "__BUILD_INFO_FILE__" not in html
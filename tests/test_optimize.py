@@ -0,0 +1,27 @@
+"""出力の最適化（事前圧縮ファイル）のテスト"""
+
+import os
+
+import wbgt_processor as wp
+
+
+def test_superseded_asset_removes_compressed_siblings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    old_path = wp.publish_asset("station", "css", "body { color: red; }")
+    wp.optimize_file(old_path)
+    assert os.path.exists(f"{old_path}.gz")
+
+    new_path = wp.publish_asset("station", "css", "body { color: blue; }")
+    assert sorted(os.listdir(wp.ASSET_DIR)) == [os.path.basename(new_path)]
+
+
+def test_dropped_index_shard_removes_compressed_siblings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(wp.INDEX_SHARD_DIR)
+    for name in ("tohoku-9.json", "tohoku-9.json.gz", "tohoku-9.json.br"):
+        (tmp_path / wp.INDEX_SHARD_DIR / name).write_bytes(b"{}")
+
+    wp.create_index_bundle(wp.compute_analytics({}))
+    assert not any(
+        name.startswith("tohoku-9.") for name in os.listdir(wp.INDEX_SHARD_DIR)
+    )
@@ -0,0 +1,79 @@
+"""ビルド出力の一括反映（OutputWriter）のテスト"""
+
+import json
+import os
+
+import wbgt_processor as wp
+
+
+def _published(tmp_path):
+    return sorted(
+        name
+        for name in os.listdir(tmp_path)
+        if os.path.isfile(tmp_path / name) and not name.endswith(wp.STAGING_SUFFIX)
+    )
+
+
+def test_commit_publishes_writes_and_removals(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "old.json").write_text("old")
+    (tmp_path / "keep.html").write_text("before")
+
+    wp.begin_output()
+    wp.write_text("keep.html", "after")
+    wp.write_text("data/new.json", "{}")
+    wp.remove_output("data/old.json")
+
+    # 反映前は公開中のファイルを変えず、読み出し・一覧は反映後の状態を返す
+    assert (tmp_path / "keep.html").read_text() == "before"
+    assert not (tmp_path / "data" / "new.json").exists()
+    assert wp.read_output("keep.html") == b"after"
+    assert not wp.output_exists("data/old.json")
+    assert wp.list_output_dir("data") == ["new.json"]
+
+    wp.commit_output()
+    assert _published(tmp_path) == ["keep.html"]
+    assert _published(tmp_path / "data") == ["new.json"]
+    assert (tmp_path / "keep.html").read_text() == "after"
+    assert not os.path.exists(wp.OUTPUT_JOURNAL_FILE)
+    assert not any(
+        name.endswith(wp.STAGING_SUFFIX)
+        for directory in (tmp_path, tmp_path / "data")
+        for name in os.listdir(directory)
+    )
+
+
+def test_abort_leaves_published_files_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "keep.html").write_text("before")
+
+    wp.begin_output()
+    wp.write_text("keep.html", "after")
+    wp.write_text("new.json", "{}")
+    wp.remove_output("keep.html")
+    with wp.open_output("streamed.json") as (f, _):
+        f.write(b"[]")
+    wp.abort_output()
+
+    assert os.listdir(tmp_path) == ["keep.html"]
+    assert (tmp_path / "keep.html").read_text() == "before"
+
+
+def test_interrupted_commit_is_completed_from_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = wp.begin_output()
+    wp.write_text("index.html", "new")
+    writer.staged["index.html"][2].result()
+    tmp_file = writer.staged["index.html"][0]
+
+    # ジャーナルを記録した直後に中断した状態を再現する
+    os.makedirs(wp.CACHE_DIR, exist_ok=True)
+    journal = {"replace": [[tmp_file, "index.html"]], "remove": []}
+    wp.replace_file(wp.OUTPUT_JOURNAL_FILE, json.dumps(journal).encode("utf-8"))
+    writer.executor.shutdown()
+    wp._OUTPUT_WRITER = None
+
+    wp.recover_output()
+    assert (tmp_path / "index.html").read_text() == "new"
+    assert not os.path.exists(wp.OUTPUT_JOURNAL_FILE)
@@ -0,0 +1,82 @@
+"""適応ポーリングの取得判定のテスト"""
+
+from datetime import timedelta
+
+import wbgt_processor as wp
+
+
+def _stale_schedule(now):
+    """発表済みの予報が未取得で、前回の取得から十分時間が経っているポーリング状態"""
+    return {
+        "update_times": [(now - timedelta(days=1, minutes=30)).strftime("%Y/%m/%d %H:%M")],
+        "last_poll": (now - timedelta(hours=6)).isoformat(timespec="seconds"),
+    }
+
+
+def test_failed_main_delays_next_poll(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wp, "ADAPTIVE_POLLING", True)
+    monkeypatch.setattr(wp, "POLL_FORCE", False)
+    now = wp.jst_now()
+    wp.save_poll_schedule(_stale_schedule(now))
+    assert wp.plan_poll(wp.load_poll_schedule(), now)[0]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("upstream error")
+
+    monkeypatch.setattr(wp, "process_all_stations", fail)
+    wp.main()
+
+    due, next_poll, _ = wp.plan_poll(wp.load_poll_schedule())
+    assert not due
+    assert (next_poll - wp.jst_now()).total_seconds() > 0
+
+
+def test_retry_backoff_doubles_up_to_max_interval():
+    now = wp.jst_now()
+    schedule = dict(_stale_schedule(now), last_attempt=now.isoformat(timespec="seconds"))
+
+    waits = []
+    for failures in (1, 2, 3, 100):
+        schedule["failures"] = failures
+        waits.append(wp.poll_retry_time(schedule) - now)
+
+    assert waits[0] >= wp.POLL_DENSE_INTERVAL - timedelta(seconds=1)
+    assert waits[1] > waits[0] and waits[2] > waits[1]
+    assert waits[3] <= wp.POLL_MAX_INTERVAL
+
+
+def test_successful_poll_clears_failures(tmp_path):
+    path = str(tmp_path / "poll_schedule.json")
+    now = wp.jst_now()
+    wp.save_poll_schedule(_stale_schedule(now), path)
+    wp.record_poll_failure(now, path)
+    assert wp.load_poll_schedule(path)["failures"] == 1
+
+    wp.record_poll([now.strftime("%Y/%m/%d %H:%M")], now, path)
+    schedule = wp.load_poll_schedule(path)
+    assert schedule["failures"] == 0
+    assert wp.poll_retry_time(schedule) is None
+
+
+def test_schedule_description_uses_check_interval_outside_daemon(monkeypatch):
+    monkeypatch.setattr(wp, "ADAPTIVE_POLLING", True)
+    monkeypatch.setattr(wp, "POLL_DENSE_INTERVAL", timedelta(minutes=5))
+    assert "fetched every 15 minutes" in wp.describe_poll_schedule()
+
+    monkeypatch.setattr(wp, "_DAEMON_RUNNING", True)
+    assert "fetched every 5 minutes" in wp.describe_poll_schedule()
+
+
+def test_daemon_interval_caps_poll_interval(monkeypatch):
+    now = wp.jst_now()
+    # 最新の発表は取得済み・次の発表予定はまだ先（通常は最大間隔まで取得しない）
+    schedule = {
+        "update_times": [now.strftime("%Y/%m/%d %H:%M")],
+        "last_poll": (now - timedelta(minutes=20)).isoformat(timespec="seconds"),
+    }
+    assert not wp.plan_poll(schedule, now)[0]
+
+    monkeypatch.setattr(wp, "_DAEMON_MAX_INTERVAL", timedelta(minutes=10))
+    assert wp.plan_poll(schedule, now)[0]
+    assert wp.poll_intervals()[1] == timedelta(minutes=10)
@@ -0,0 +1,35 @@
+"""地点ページの一括生成のテスト"""
+
+import wbgt_processor as wp
+
+
+def _jobs(count):
+    assets = {"css": "assets/station.css", "js": "assets/station.js"}
+    jobs = []
+    for key, config in list(wp.STATIONS.items())[:count]:
+        forecast = wp.Forecast(
+            config["station_id"],
+            "2026/08/22 05:00",
+            ["2026-08-22T09:00", "2026-08-22T12:00"],
+            [265, 312],
+        )
+        stats = wp.get_station_stats(wp.compute_analytics({key: forecast}), key)
+        jobs.append((key, config["name"], forecast, stats, assets))
+    return jobs
+
+
+def test_pool_records_render_time_per_station(monkeypatch):
+    monkeypatch.setattr(wp, "RENDER_PROCESS_MIN_PAGES", 2)
+    monkeypatch.setattr(wp, "METRICS", wp.RunMetrics())
+    jobs = _jobs(3)
+    keys = {job[0] for job in jobs}
+
+    pages = wp.render_pages(jobs, processes=2)
+    assert set(pages) == keys
+    assert all(page.startswith(b"<!DOCTYPE html>") for page in pages.values())
+    assert pages == wp.render_pages(jobs, processes=1)
+
+    snapshot = wp.METRICS.snapshot()
+    assert snapshot["stages"]["render"]["count"] == 6
+    assert snapshot["stages"]["render_pool"]["count"] == 1
+    assert set(snapshot["stations"]) == keys
@@ -0,0 +1,52 @@
+"""概要データの逐次書き出し（SummaryWriter）のテスト"""
+
+import io
+import json
+
+import wbgt_processor as wp
+
+
+def _analytics():
+    key = next(iter(wp.STATIONS))
+    forecast = wp.Forecast(
+        wp.STATIONS[key]["station_id"],
+        "2026/08/22 05:00",
+        ["2026-08-22T09:00", "2026-08-22T12:00"],
+        [265, 312],
+    )
+    return wp.compute_analytics({key: forecast})
+
+
+def _write(fmt, indent=None):
+    f = io.BytesIO()
+    writer = wp.SummaryWriter(f, fmt, indent)
+    for station_key, entry in wp.iter_summary_entries(_analytics()):
+        writer.add(station_key, entry)
+    writer.close()
+    return f.getvalue().decode("utf-8"), writer.count
+
+
+def test_json_matches_build_summary():
+    expected = wp.build_summary(_analytics())
+    for indent in (None, 2):
+        text, count = _write("json", indent)
+        assert json.loads(text) == expected
+        assert count == len(wp.STATIONS)
+    # 整形ありの出力は json.dumps と同じ書式
+    assert _write("json", 2)[0] == json.dumps(expected, ensure_ascii=False, indent=2)
+
+
+def test_ndjson_matches_json():
+    summary = json.loads(_write("json")[0])
+    lines = [json.loads(line) for line in _write("ndjson")[0].splitlines()]
+
+    header = lines[0]
+    assert header.pop("type") == "summary"
+    assert header == {k: v for k, v in summary.items() if k != "stations"}
+
+    stations = {}
+    for line in lines[1:]:
+        assert line.pop("type") == "station"
+        stations[line.pop("key")] = line
+    assert stations == summary["stations"]
+    assert list(stations) == list(wp.STATIONS)
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+WBGT 処理スクリプトのオフラインベンチマーク
+
+環境省の予報 CSV の代わりに、合成した yohou_{station_id}.csv を返すローカル HTTP サーバーを起動し、
+地点数ごとに download_wbgt_data / generate_html / render_pages / create_summary_json / main() の
+処理時間（p50 / p95）・スループット・ピークメモリを計測する。
+結果は JSON に保存され、--compare で以前の結果と比較できる。
+"""
+
+import csv
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 計測する地点数（カンマ区切り）
+BENCH_STATION_COUNTS = [
+    int(v) for v in os.getenv("WBGT_BENCH_STATIONS", "7,100,1000,5000").split(",")
+]
+# 合成サーバーの応答遅延（ミリ秒）とエラー率（0〜1）
+BENCH_LATENCY_MS = float(os.getenv("WBGT_BENCH_LATENCY_MS", "20"))
+BENCH_ERROR_RATE = float(os.getenv("WBGT_BENCH_ERROR_RATE", "0"))
+# 1 地点あたりの予報コマ数と乱数シード
+BENCH_SLOTS = int(os.getenv("WBGT_BENCH_SLOTS", "17"))
+BENCH_SEED = int(os.getenv("WBGT_BENCH_SEED", "0"))
+# tracemalloc によるピークメモリ計測（0 で無効化し、処理時間のみ計測）
+BENCH_TRACE_MEMORY = os.getenv("WBGT_BENCH_MEMORY", "1") != "0"
+BENCH_RESULTS_DIR = os.getenv(
+    "WBGT_BENCH_RESULTS_DIR", os.path.join(SCRIPT_DIR, "benchmark_results")
+)
+
+# 合成データの発表時刻・予報開始日
+SYNTHETIC_UPDATE_TIME = "2026/08/22 21:25"
+SYNTHETIC_START_DATE = "20260822"
+
+# 合成地点の都道府県（地方別インデックスの分割も計測できるよう全国に散らす）
+SYNTHETIC_PREFECTURES = [
+    "北海道", "宮城県", "東京都", "新潟県", "愛知県", "大阪府",
+    "広島県", "香川県", "福岡県", "沖縄県",
+]
+
+
+def synthetic_csv(station_id, slots=BENCH_SLOTS):
+    """予報 CSV と同じ形式（ヘッダー行 + データ行）の合成データを作成
+
+    値は観測地点コードから決まる乱数で生成するため、同じ地点には毎回同じ内容を返す
+    """
+    rng = random.Random(f"{BENCH_SEED}:{station_id}")
+    # 予報 CSV と同様に前日の 24 時（= 当日 0 時）から 3 時間刻みで表記する
+    times = [f"{SYNTHETIC_START_DATE}{24 + 3 * i:02d}" for i in range(slots)]
+    values = [str(rng.randint(180, 330)) for _ in times]
+    return (
+        ",," + ",".join(times) + "\n"
+        + f"{station_id},{SYNTHETIC_UPDATE_TIME}," + ",".join(values) + "\n"
+    )
+
+
+class SyntheticCSVHandler(BaseHTTPRequestHandler):
+    """合成 CSV を返すリクエストハンドラ（遅延・エラー率・ETag に対応）"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        name = self.path.rsplit("/", 1)[-1]
+        if not (name.startswith("yohou_") and name.endswith(".csv")):
+            self._send(404)
+            return
+        with server.lock:
+            server.requests += 1
+            failed = server.rng.random() < server.error_rate
+        if failed:
+            self._send(503)
+            return
+
+        body = synthetic_csv(name[len("yohou_"):-len(".csv")]).encode("utf-8")
+        etag = f'"{BENCH_SEED}-{len(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(200, body, {"Content-Type": "text/csv", "ETag": etag})
+
+
+@contextlib.contextmanager
+def synthetic_server(latency_ms=BENCH_LATENCY_MS, error_rate=BENCH_ERROR_RATE):
+    """合成 CSV サーバーを別スレッドで起動し、CSV の URL テンプレートを返す"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SyntheticCSVHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000.0
+    server.error_rate = error_rate
+    server.rng = random.Random(BENCH_SEED)
+    server.lock = threading.Lock()
+    server.requests = 0
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        yield f"http://{host}:{port}/prev15WG/dl/yohou_{{station_id}}.csv"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def write_synthetic_registry(path, station_count):
+    """合成地点のレジストリ CSV を作成"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["key", "station_id", "name", "prefecture", "lat", "lon"])
+        for i in range(station_count):
+            station_id = f"{10000 + i}"
+            writer.writerow(
+                [
+                    f"st{station_id}",
+                    station_id,
+                    f"地点{i + 1}",
+                    SYNTHETIC_PREFECTURES[i % len(SYNTHETIC_PREFECTURES)],
+                    f"{30 + (i % 150) / 10:.4f}",
+                    f"{130 + (i % 140) / 10:.4f}",
+                ]
+            )
+
+
+def percentile(samples, q):
+    """線形補間によるパーセンタイル"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class BenchmarkRunFailed(Exception):
+    """計測対象の処理が失敗した（main() は例外を握りつぶして error_report.json を出力する）"""
+
+
+def summarize_stage(samples, wall_seconds, items, peak_bytes):
+    """ステージの計測結果（ミリ秒・件/秒・バイト）をまとめる"""
+    return {
+        "items": items,
+        "wall_ms": round(wall_seconds * 1000, 3),
+        "p50_ms": round(percentile(samples, 0.5) * 1000, 3) if samples else None,
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3) if samples else None,
+        "throughput_per_s": round(items / wall_seconds, 1) if wall_seconds else None,
+        "peak_memory_bytes": peak_bytes,
+    }
+
+
+@contextlib.contextmanager
+def measure_memory(enabled):
+    """ブロック内の tracemalloc のピーク値を測る（enabled が偽の場合は計測しない）"""
+    result = {"peak": None}
+    if not enabled:
+        yield result
+        return
+    tracemalloc.start()
+    try:
+        yield result
+    finally:
+        result["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def run_worker(trace_memory=False):
+    """1 つの地点数についての計測（サブプロセス内で実行）
+
+    wbgt_processor はインポート時に地点レジストリを読み込むため、地点数ごとに
+    環境変数を設定したサブプロセスで計測し、結果を JSON で標準出力に返す。
+    tracemalloc は処理時間を大きく伸ばすため、メモリ計測は別プロセスで行う
+    """
+    sys.path.insert(0, SCRIPT_DIR)
+    # 処理ログは計測対象外とする
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        import wbgt_processor as wp
+
+    stations = wp.STATIONS
+    stages = {}
+
+    def run_stage(name, func):
+        with quiet, measure_memory(trace_memory) as memory:
+            started = time.perf_counter()
+            try:
+                samples, items = func()
+            except BenchmarkRunFailed as e:
+                # 失敗した実行の処理時間は計測結果に含めない
+                stages[name] = dict(
+                    summarize_stage([], 0, 0, None), wall_ms=None, failed=True, error=str(e)
+                )
+                return
+            wall = time.perf_counter() - started
+        stages[name] = summarize_stage(samples or [wall], wall, items, memory["peak"])
+
+    def run_main():
+        if os.path.exists("error_report.json"):
+            os.remove("error_report.json")
+        wp.main()
+        if os.path.exists("error_report.json"):
+            with open("error_report.json", "r", encoding="utf-8") as f:
+                raise BenchmarkRunFailed(json.load(f).get("error_message", ""))
+        return None, len(stations)
+
+    # main()（初回: 全件取得・全件生成 / 2 回目: 304 と差分ビルドによる再実行）
+    run_stage("main_cold", run_main)
+    run_stage("main_warm", run_main)
+
+    # download_wbgt_data（並列取得、キャッシュなし）
+    forecasts = {}
+
+    def run_download():
+        timings = []
+
+        def fetch(item):
+            station_key, station_config = item
+            started = time.perf_counter()
+            wbgt_data = wp.download_wbgt_data(station_config["station_id"], session)
+            timings.append(time.perf_counter() - started)
+            return station_key, wbgt_data
+
+        with wp.create_http_session() as session:
+            with ThreadPoolExecutor(max_workers=wp.MAX_WORKERS) as executor:
+                for station_key, wbgt_data in executor.map(fetch, stations.items()):
+                    if wbgt_data:
+                        forecasts[station_key] = wbgt_data
+        return timings, len(stations)
+
+    run_stage("download_wbgt_data", run_download)
+    stages["download_wbgt_data"]["errors"] = len(stations) - len(forecasts)
+
+    # 以降のステージは取得できた地点のデータを使う
+    with quiet:
+        analytics = wp.compute_analytics(forecasts)
+
+    # generate_html（地点ごと）
+    def run_generate_html():
+        timings = []
+        for station_key, wbgt_data in forecasts.items():
+            started = time.perf_counter()
+            wp.generate_html(
+                wbgt_data,
+                stations[station_key]["name"],
+                station_key,
+                wp.get_station_stats(analytics, station_key),
+            )
+            timings.append(time.perf_counter() - started)
+        return timings, len(forecasts)
+
+    run_stage("generate_html", run_generate_html)
+
+    # render_pages（全地点分を 1 回。地点数が多い場合はプロセスプールで並列生成）
+    def run_render_pages():
+        assets = wp.get_static_assets()
+        wp.render_pages(
+            [
+                (
+                    station_key,
+                    stations[station_key]["name"],
+                    wbgt_data,
+                    wp.get_station_stats(analytics, station_key),
+                    assets,
+                )
+                for station_key, wbgt_data in forecasts.items()
+            ]
+        )
+        return None, len(forecasts)
+
+    run_stage("render_pages", run_render_pages)
+
+    # create_summary_json（全地点分を 1 回）
+    def run_summary():
+        wp.create_summary_json(analytics)
+        return None, len(stations)
+
+    run_stage("create_summary_json", run_summary)
+
+    return {
+        "stations": len(stations),
+        "stages": stages,
+        # ru_maxrss は Linux では KiB 単位
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def run_worker_process(station_count, csv_url, trace_memory):
+    """一時ディレクトリを作業ディレクトリとしてワーカーのサブプロセスを実行"""
+    work_dir = tempfile.mkdtemp(prefix=f"wbgt_bench_{station_count}_")
+    try:
+        registry = os.path.join(work_dir, "stations.csv")
+        write_synthetic_registry(registry, station_count)
+        env = dict(
+            os.environ,
+            WBGT_CSV_URL=csv_url,
+            WBGT_STATION_FILE=registry,
+            WBGT_CACHE_DIR=os.path.join(work_dir, ".wbgt_cache"),
+            # 発表スケジュールによる取得省略は計測対象外
+            WBGT_ADAPTIVE_POLLING="0",
+        )
+        env.pop("GITHUB_ACTIONS", None)
+        command = [sys.executable, os.path.abspath(__file__), "--worker"]
+        if trace_memory:
+            command.append("--trace-memory")
+        completed = subprocess.run(
+            command, cwd=work_dir, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(
+                f"{station_count} 地点の計測に失敗しました:\n{completed.stderr}"
+            )
+        return json.loads(completed.stdout)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_scale(station_count, csv_url):
+    """指定した地点数のベンチマークを実行（処理時間とメモリは別プロセスで計測）"""
+    result = run_worker_process(station_count, csv_url, trace_memory=False)
+    if BENCH_TRACE_MEMORY:
+        traced = run_worker_process(station_count, csv_url, trace_memory=True)
+        for stage, stats in result["stages"].items():
+            stats["peak_memory_bytes"] = traced["stages"][stage]["peak_memory_bytes"]
+    return result
+
+
+def git_revision():
+    """計測対象のコミット（取得できない場合は None）"""
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SCRIPT_DIR,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+
+def print_scale(result):
+    """地点数ごとの計測結果を表示"""
+    print(f"\n📍 {result['stations']} 地点 (最大 RSS {result['max_rss_bytes'] / 1e6:.1f} MB)")
+    print(f"  {'ステージ':<22}{'p50 ms':>10}{'p95 ms':>10}{'合計 ms':>12}{'件/秒':>10}{'ピーク MB':>11}")
+    for stage, stats in result["stages"].items():
+        if stats.get("failed"):
+            print(f"  {stage:<22}❌ 処理に失敗（計測結果から除外）: {stats['error']}")
+            continue
+        p50 = f"{stats['p50_ms']:.2f}" if stats["p50_ms"] is not None else "-"
+        p95 = f"{stats['p95_ms']:.2f}" if stats["p95_ms"] is not None else "-"
+        throughput = stats["throughput_per_s"] or 0
+        peak = (
+            f"{stats['peak_memory_bytes'] / 1e6:.2f}"
+            if stats["peak_memory_bytes"] is not None
+            else "-"
+        )
+        print(
+            f"  {stage:<22}{p50:>10}{p95:>10}{stats['wall_ms']:>12.1f}"
+            f"{throughput:>10.1f}{peak:>11}"
+        )
+        if stats.get("errors"):
+            print(f"    ⚠️ 取得失敗: {stats['errors']} 地点")
+
+
+def compare_results(previous, current):
+    """以前の結果と比較し、地点数・ステージごとの p50 と合計時間の変化を表示"""
+    print(f"\n🔍 比較: {previous.get('revision')} → {current.get('revision')}")
+    previous_scales = {r["stations"]: r for r in previous["results"]}
+    for result in current["results"]:
+        base = previous_scales.get(result["stations"])
+        if not base:
+            continue
+        print(f"\n📍 {result['stations']} 地点")
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if not base_stats or base_stats.get("failed") or stats.get("failed"):
+                continue
+            for metric in ("p50_ms", "wall_ms"):
+                before, after = base_stats.get(metric), stats.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before * 100
+                mark = "🔺" if change > 10 else "🔻" if change < -10 else "  "
+                print(
+                    f"  {mark} {stage:<22}{metric:<8}{before:>10.2f} → {after:>10.2f}"
+                    f" ({change:+.1f}%)"
+                )
+
+
+def run_benchmark(compare_path=None):
+    """全地点数のベンチマークを実行して結果を保存"""
+    print("🏁 WBGT オフラインベンチマーク開始")
+    print(
+        f"  地点数: {BENCH_STATION_COUNTS} / 遅延: {BENCH_LATENCY_MS:g} ms"
+        f" / エラー率: {BENCH_ERROR_RATE:g}"
+    )
+
+    report = {
+        "revision": git_revision(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {
+            "latency_ms": BENCH_LATENCY_MS,
+            "error_rate": BENCH_ERROR_RATE,
+            "slots": BENCH_SLOTS,
+            "seed": BENCH_SEED,
+            "max_workers": int(os.getenv("WBGT_MAX_WORKERS", "8")),
+        },
+        "results": [],
+    }
+
+    with synthetic_server() as csv_url:
+        for station_count in BENCH_STATION_COUNTS:
+            result = run_scale(station_count, csv_url)
+            report["results"].append(result)
+            print_scale(result)
+
+    os.makedirs(BENCH_RESULTS_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = os.path.join(
+        BENCH_RESULTS_DIR, f"bench_{timestamp}_{report['revision'] or 'unknown'}.json"
+    )
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 結果を保存しました: {output_path}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            compare_results(json.load(f), report)
+
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        if sys.argv[1] == "--worker":
+            json.dump(run_worker("--trace-memory" in sys.argv), sys.stdout)
+        elif sys.argv[1] == "--compare" and len(sys.argv) > 2:
+            run_benchmark(sys.argv[2])
+        elif sys.argv[1] == "--help":
+            print("WBGT オフラインベンチマーク")
+            print("使用方法:")
+            print("  python wbgt_benchmark.py                        # 計測して結果を保存")
+            print("  python wbgt_benchmark.py --compare <結果.json>  # 以前の結果と比較")
+            print("  python wbgt_benchmark.py --help                 # ヘルプ表示")
+        else:
+            print(f"❌ 無効なオプション: {sys.argv[1]}")
+            print("--help でヘルプを表示")
+    else:
+        run_benchmark()
@@ -2,435 +2,1492 @@
 # -*- coding: utf-8 -*-
 """
 GitHub Actions 用 WBGT データ処理スクリプト（2地点対応版）
-2 時間毎に WBGT データを取得して各地点の HTML ファイルを生成
+新しい予報の発表に合わせて WBGT データを取得し、各地点の HTML ファイルを生成
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import array
+import asyncio
+import contextlib
+import csv
+import hashlib
+import gzip
 import json
 import os
+import re
+import signal
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
 import traceback
+import urllib.parse
 
-# 観測地点の設定
-STATIONS = {
-    "abashiri": {
-        "station_id": "17341",
-        "name": "網走",
-        "filename": "abashiri.html",
-        "json_filename": "wbgt_data_abashiri.json",
-    },
-    "kushiro": {
-        "station_id": "19432",
-        "name": "釧路",
-        "filename": "kushiro.html",
-        "json_filename": "wbgt_data_kushiro.json",
-    },
-    "hachinohe": {
-        "station_id": "31602",
-        "name": "八戸",
-        "filename": "hachinohe.html",
-        "json_filename": "wbgt_data_hachinohe.json",
-    },
-    "ishinomaki": {
-        "station_id": "34292",
-        "name": "石巻",
-        "filename": "ishinomaki.html",
-        "json_filename": "wbgt_data_ishinomaki.json",
-    },
-    "tokyo": {
-        "station_id": "44132",
-        "name": "東京",
-        "filename": "tokyo.html",
-        "json_filename": "wbgt_data_tokyo.json",
-    },
-    "tateyama": {
-        "station_id": "45401",
-        "name": "館山",
-        "filename": "tateyama.html",
-        "json_filename": "wbgt_data_tateyama.json",
-    },
-    "shionomisaki": {
-        "station_id": "65356",
-        "name": "潮岬",
-        "filename": "shionomisaki.html",
-        "json_filename": "wbgt_data_shionomisaki.json",
-    },
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # brotli 未導入の環境では .br を出力しない
+    brotli = None
+
+JST = timezone(timedelta(hours=9))
+
+# データ取得元
+WBGT_CSV_URL = os.getenv(
+    "WBGT_CSV_URL", "https://www.wbgt.env.go.jp/prev15WG/dl/yohou_{station_id}.csv"
+)
+# 一括取得用の全地点・都道府県別の予報 CSV
+WBGT_BULK_CSV_URL = os.getenv(
+    "WBGT_BULK_CSV_URL", "https://www.wbgt.env.go.jp/prev15WG/dl/yohou_all.csv"
+)
+WBGT_PREFECTURE_CSV_URL = os.getenv(
+    "WBGT_PREFECTURE_CSV_URL",
+    "https://www.wbgt.env.go.jp/prev15WG/dl/yohou_{prefecture}.csv",
+)
+# station: 地点ごとに取得 / all: 全地点の CSV を 1 回取得 / prefecture: 都道府県別の CSV を取得
+FETCH_MODE = os.getenv("WBGT_FETCH_MODE", "station")
+HTTP_TIMEOUT = 30
+# 予報 CSV の文字コードと逐次読み込みの単位（バイト）
+CSV_ENCODING = "utf-8"
+CSV_CHUNK_SIZE = 64 * 1024
+
+# 並列取得のワーカー数（1 以下の場合は逐次処理）
+MAX_WORKERS = int(os.getenv("WBGT_MAX_WORKERS", "8"))
+
+# 地点ページの HTML を生成するプロセス数（0 で CPU コア数）と、プロセスプールを使う最小ページ数
+RENDER_PROCESSES = int(os.getenv("WBGT_RENDER_PROCESSES", "0")) or os.cpu_count() or 1
+RENDER_PROCESS_MIN_PAGES = int(os.getenv("WBGT_RENDER_PROCESS_MIN_PAGES", "100"))
+
+# 実行間で引き継ぐキャッシュ類の保存先
+CACHE_DIR = os.getenv("WBGT_CACHE_DIR", ".wbgt_cache")
+# 条件付き GET（If-None-Match / If-Modified-Since）用の検証子キャッシュ
+HTTP_CACHE_ENABLED = os.getenv("WBGT_HTTP_CACHE", "1") != "0"
+HTTP_CACHE_FILE = os.path.join(CACHE_DIR, "http_cache.json")
+
+# 差分ビルド：予報内容のフィンガープリントが前回と同じ地点は再生成しない
+INCREMENTAL_BUILD = os.getenv("WBGT_INCREMENTAL", "1") != "0"
+BUILD_MANIFEST_FILE = "build_manifest.json"
+# 実行ごとに変わる生成時刻はこのファイルだけに出力する
+BUILD_INFO_FILE = "build_info.json"
+
+# 地点別 JSON の出力形式
+#   compact: 開始時刻・間隔・値（0.1℃単位の整数）の列形式
+#   verbose: 従来のデータ点ごとの辞書形式（互換用）
+JSON_FORMAT = os.getenv("WBGT_JSON_FORMAT", "compact")
+
+# 概要データ。NDJSON 版（1 行目に全体の情報、以降 1 行 1 地点）は WBGT_SUMMARY_NDJSON=1 のときのみ出力
+SUMMARY_FILE = "wbgt_summary.json"
+SUMMARY_NDJSON_FILE = "wbgt_summary.ndjson"
+SUMMARY_NDJSON = os.getenv("WBGT_SUMMARY_NDJSON", "0") == "1"
+
+# 差分フィード：前回のビルドから変わった予報値・危険レベルを通番付きで出力（直近 DELTA_HISTORY 件を保持）
+DELTA_FEED_ENABLED = os.getenv("WBGT_DELTA_FEED", "1") != "0"
+DELTA_INDEX_FILE = "wbgt_deltas.json"
+DELTA_DIR = "deltas"
+DELTA_HISTORY = int(os.getenv("WBGT_DELTA_HISTORY", "48"))
+
+# 警戒通知：閾値（℃）と先読み時間（時間）。カンマ区切りで複数指定できる
+ALERT_THRESHOLDS = [
+    float(v) for v in os.getenv("WBGT_ALERT_THRESHOLDS", "21,25,28,31").split(",")
+]
+ALERT_HORIZONS_HOURS = [
+    float(v) for v in os.getenv("WBGT_ALERT_HORIZONS", "2").split(",")
+]
+
+# 発表時刻を学習する適応ポーリング（0 で毎回取得）。WBGT_POLL_FORCE=1 で判定を省略して取得
+ADAPTIVE_POLLING = os.getenv("WBGT_ADAPTIVE_POLLING", "1") != "0"
+POLL_FORCE = os.getenv("WBGT_POLL_FORCE", "0") == "1"
+POLL_SCHEDULE_FILE = os.path.join(CACHE_DIR, "poll_schedule.json")
+POLL_LEARN_DAYS = 7
+# 発表予定の直後は高頻度で、それ以外は間隔を空けて取得する（分）
+POLL_DENSE_INTERVAL = timedelta(minutes=int(os.getenv("WBGT_POLL_DENSE_MINUTES", "5")))
+POLL_DENSE_WINDOW = timedelta(minutes=int(os.getenv("WBGT_POLL_DENSE_WINDOW_MINUTES", "60")))
+POLL_MAX_INTERVAL = timedelta(minutes=int(os.getenv("WBGT_POLL_MAX_MINUTES", "180")))
+# 取得判定を行う時間帯と間隔（.github/workflows/wbgt-processing.yml の cron と合わせる）
+POLL_CHECK_WINDOW = "JST 9:00-21:59"
+POLL_CHECK_INTERVAL = timedelta(minutes=15)
+
+# 常駐モード（--daemon）の更新間隔（秒）
+DAEMON_INTERVAL = int(os.getenv("WBGT_DAEMON_INTERVAL", "600"))
+
+# API サーバーモード（--serve）の待ち受けアドレス
+SERVE_HOST = os.getenv("WBGT_SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.getenv("WBGT_SERVE_PORT", "8080"))
+
+# 出力の一括反映：一時ファイルの接尾辞・並列書き込み数・反映中断時の復旧用ジャーナル
+STAGING_SUFFIX = ".wbgt-tmp"
+OUTPUT_WORKERS = int(os.getenv("WBGT_OUTPUT_WORKERS", "8"))
+OUTPUT_JOURNAL_FILE = os.path.join(CACHE_DIR, "output_journal.json")
+
+# 実行メトリクス（ステージ別の処理時間・バイト数）。Prometheus 形式はパス指定時のみ出力
+METRICS_ENABLED = os.getenv("WBGT_METRICS", "1") != "0"
+METRICS_FILE = "run_metrics.json"
+METRICS_PROMETHEUS_FILE = os.getenv("WBGT_METRICS_PROMETHEUS", "")
+
+# 予報履歴アーカイブ（SQLite、発表ごとの全予報値を追記）
+ARCHIVE_ENABLED = os.getenv("WBGT_ARCHIVE", "1") != "0"
+ARCHIVE_FILE = os.getenv(
+    "WBGT_ARCHIVE_FILE", os.path.join(CACHE_DIR, "wbgt_archive.sqlite3")
+)
+
+# 出力最適化（minify と .gz / .br の事前圧縮）
+OPTIMIZE_OUTPUT = os.getenv("WBGT_OPTIMIZE", "1") != "0"
+# 0: minify のみ行い、.gz / .br は出力しない（事前圧縮ファイルを配信できないホスティング向け）
+PRECOMPRESS_OUTPUT = os.getenv("WBGT_PRECOMPRESS", "1") != "0"
+OPTIMIZE_MANIFEST_FILE = os.path.join(CACHE_DIR, "optimize_manifest.json")
+# 毎回再生成されるページ・データの brotli 圧縮レベル（11 は 10 と比べ 1% 程度小さくなるだけで 2 倍以上遅い）。
+# 内容ハッシュ付きのアセットは一度しか圧縮しないため常に 11 を使う
+BROTLI_QUALITY = int(os.getenv("WBGT_BROTLI_QUALITY", "10"))
+
+# 地方別の地点一覧（インデックスページと各地点ページのナビゲーションが共有するマニフェスト）
+INDEX_BUNDLE_FILE = "wbgt_index.json"
+# カードのデータは地方別・ページ単位に分割し、インデックスはスクロールで表示されたページから読み込む
+INDEX_SHARD_DIR = "index_data"
+INDEX_PAGE_SIZE = int(os.getenv("WBGT_INDEX_PAGE_SIZE", "24"))
+
+# 地方区分（slug, 表示名, 都道府県）
+REGIONS = [
+    ("hokkaido", "北海道", ["北海道"]),
+    ("tohoku", "東北", ["青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県"]),
+    (
+        "kanto",
+        "関東",
+        ["茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県"],
+    ),
+    (
+        "chubu",
+        "中部",
+        [
+            "新潟県",
+            "富山県",
+            "石川県",
+            "福井県",
+            "山梨県",
+            "長野県",
+            "岐阜県",
+            "静岡県",
+            "愛知県",
+        ],
+    ),
+    (
+        "kinki",
+        "近畿",
+        ["三重県", "滋賀県", "京都府", "大阪府", "兵庫県", "奈良県", "和歌山県"],
+    ),
+    ("chugoku", "中国", ["鳥取県", "島根県", "岡山県", "広島県", "山口県"]),
+    ("shikoku", "四国", ["徳島県", "香川県", "愛媛県", "高知県"]),
+    (
+        "kyushu",
+        "九州・沖縄",
+        [
+            "福岡県",
+            "佐賀県",
+            "長崎県",
+            "熊本県",
+            "大分県",
+            "宮崎県",
+            "鹿児島県",
+            "沖縄県",
+        ],
+    ),
+]
+REGION_NAMES = {slug: name for slug, name, _ in REGIONS}
+PREFECTURE_REGIONS = {pref: slug for slug, _, prefs in REGIONS for pref in prefs}
+
+# 都道府県別予報 CSV のファイル名に使う都道府県名（ローマ字）
+PREFECTURE_SLUGS = {
+    "北海道": "hokkaido",
+    "青森県": "aomori",
+    "岩手県": "iwate",
+    "宮城県": "miyagi",
+    "秋田県": "akita",
+    "山形県": "yamagata",
+    "福島県": "fukushima",
+    "茨城県": "ibaraki",
+    "栃木県": "tochigi",
+    "群馬県": "gunma",
+    "埼玉県": "saitama",
+    "千葉県": "chiba",
+    "東京都": "tokyo",
+    "神奈川県": "kanagawa",
+    "新潟県": "niigata",
+    "富山県": "toyama",
+    "石川県": "ishikawa",
+    "福井県": "fukui",
+    "山梨県": "yamanashi",
+    "長野県": "nagano",
+    "岐阜県": "gifu",
+    "静岡県": "shizuoka",
+    "愛知県": "aichi",
+    "三重県": "mie",
+    "滋賀県": "shiga",
+    "京都府": "kyoto",
+    "大阪府": "osaka",
+    "兵庫県": "hyogo",
+    "奈良県": "nara",
+    "和歌山県": "wakayama",
+    "鳥取県": "tottori",
+    "島根県": "shimane",
+    "岡山県": "okayama",
+    "広島県": "hiroshima",
+    "山口県": "yamaguchi",
+    "徳島県": "tokushima",
+    "香川県": "kagawa",
+    "愛媛県": "ehime",
+    "高知県": "kochi",
+    "福岡県": "fukuoka",
+    "佐賀県": "saga",
+    "長崎県": "nagasaki",
+    "熊本県": "kumamoto",
+    "大分県": "oita",
+    "宮崎県": "miyazaki",
+    "鹿児島県": "kagoshima",
+    "沖縄県": "okinawa",
 }
 
+# 観測地点レジストリ（key, station_id, name, prefecture, lat, lon の CSV）
+STATION_REGISTRY_FILE = os.getenv(
+    "WBGT_STATION_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "stations.csv"),
+)
 
-def download_wbgt_data(station_id):
-    """指定した観測地点のWBGTデータをダウンロードして解析"""
-    url = f"https://www.wbgt.env.go.jp/prev15WG/dl/yohou_{station_id}.csv"
 
-    try:
-        print(f"  📡 データ取得中: {url}")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        csv_content = response.text
+def load_station_registry(path=STATION_REGISTRY_FILE):
+    """地点レジストリを読み込み、station_key -> 地点設定 の辞書を返す（ファイル記載順）"""
+    stations = {}
+    seen_ids = set()
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            station_id = row["station_id"].strip()
+            # key 未指定の地点は観測地点コードをキーにする
+            station_key = (row.get("key") or "").strip() or station_id
 
-        lines = csv_content.strip().split("\n")
+            if station_key in stations or station_id in seen_ids:
+                raise ValueError(f"地点レジストリに重複があります: {station_key} ({station_id})")
+            seen_ids.add(station_id)
 
-        # ヘッダー行（時刻情報）
-        header = lines[0].split(",")
-        time_stamps = [ts.strip() for ts in header[2:] if ts.strip()]
+            prefecture = row["prefecture"].strip()
+            stations[station_key] = {
+                "station_id": station_id,
+                "name": row["name"].strip(),
+                "prefecture": prefecture,
+                "region": PREFECTURE_REGIONS.get(prefecture, "other"),
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"]),
+                "filename": f"{station_key}.html",
+                "json_filename": f"wbgt_data_{station_key}.json",
+            }
 
-        # データ行
-        data_line = lines[1].split(",")
-        actual_station_id = data_line[0].strip()
-        update_time = data_line[1].strip()
+    return stations
 
-        # WBGT値を取得
-        wbgt_values = []
-        for val in data_line[2:]:
-            val = val.strip()
-            if val:
-                try:
-                    wbgt_values.append(int(val))
-                except ValueError:
-                    print(f"    ⚠️ 無効な値をスキップ: {val}")
 
-        # 時刻を解析（JST基準で処理）
-        parsed_data = []
-        for i, ts in enumerate(time_stamps):
-            if i >= len(wbgt_values):
-                break
+def build_station_indexes(stations):
+    """観測地点コード・都道府県からの索引を作成"""
+    by_id = {}
+    by_prefecture = {}
+    for station_key, station_config in stations.items():
+        by_id[station_config["station_id"]] = station_key
+        by_prefecture.setdefault(station_config["prefecture"], []).append(station_key)
+    return by_id, by_prefecture
 
-            if len(ts) == 10:  # YYYYMMDDHH
-                try:
-                    year = int(ts[:4])
-                    month = int(ts[4:6])
-                    day = int(ts[6:8])
-                    hour = int(ts[8:10])
-
-                    # 24時の処理
-                    if hour == 24:
-                        dt = datetime(year, month, day) + timedelta(days=1)
-                    elif hour > 24:
-                        extra_days = hour // 24
-                        hour = hour % 24
-                        dt = datetime(year, month, day, hour) + timedelta(
-                            days=extra_days
-                        )
-                    else:
-                        dt = datetime(year, month, day, hour)
-
-                    # JST 時刻として扱う（UTC 変換は行わない）
-                    parsed_data.append(
-                        {
-                            "time": dt.isoformat(),
-                            "year": dt.year,
-                            "month": dt.month,
-                            "day": dt.day,
-                            "hour": dt.hour,
-                            "minute": dt.minute,
-                            "wbgt": wbgt_values[i] / 10.0,  # 表示用に10で割る
-                        }
-                    )
-
-                except ValueError as e:
-                    print(f"    ⚠️ 時刻解析エラー: {ts} - {e}")
-
-        print(f"  ✅ データ取得成功: {len(parsed_data)} 件のデータポイント")
+
+# 観測地点の設定（全ての処理はこのレジストリを参照する）
+STATIONS = load_station_registry()
+STATIONS_BY_ID, STATIONS_BY_PREFECTURE = build_station_indexes(STATIONS)
+
+
+def find_station(key_or_id):
+    """station_key または観測地点コードから station_key を引く（見つからなければ None）"""
+    if key_or_id in STATIONS:
+        return key_or_id
+    return STATIONS_BY_ID.get(key_or_id)
+
+
+class RunMetrics:
+    """実行ごとの処理時間・バイト数を集計する計測器
+
+    stage(name, station_key) で囲んだ区間の処理時間を記録し、count() でバイト数などを加算する。
+    無効時は何も記録しない共有コンテキストを返すため、計測箇所のオーバーヘッドはほぼない
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._null = contextlib.nullcontext()
+        self.reset()
+
+    def reset(self):
+        """計測値を初期化"""
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.stations = {}
+        self.counters = {}
+
+    def record(self, name, seconds, station_key=None):
+        """区間の処理時間を記録"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.stages.setdefault(name, []).append(seconds)
+            if station_key is not None:
+                station = self.stations.setdefault(station_key, {})
+                station[name] = station.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        """カウンター（ダウンロード・書き込みバイト数など）を加算"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage(self, name, station_key=None):
+        """with 文で囲んだ区間の処理時間を記録するコンテキスト"""
+        if not self.enabled:
+            return self._null
+        return _MetricsStage(self, name, station_key)
+
+    def snapshot(self):
+        """ステージごとの件数・合計・p50 / p95 / 最大（ミリ秒）と地点別の内訳を返す"""
+        with self._lock:
+            stages = {name: list(samples) for name, samples in self.stages.items()}
+            stations = {key: dict(values) for key, values in self.stations.items()}
+            counters = dict(self.counters)
+
+        def ms(seconds):
+            return round(float(seconds) * 1000, 3)
+
+        summary = {}
+        for name, samples in stages.items():
+            values = np.array(samples)
+            summary[name] = {
+                "count": len(samples),
+                "total_ms": ms(values.sum()),
+                "p50_ms": ms(np.percentile(values, 50)),
+                "p95_ms": ms(np.percentile(values, 95)),
+                "max_ms": ms(values.max()),
+            }
 
         return {
-            "station_id": actual_station_id,
-            "update_time": update_time,
-            "data": parsed_data,
-            # "last_updated": datetime.now().isoformat(),
-            # 変更後
-            "last_updated": datetime.now(timezone.utc)
-            .astimezone(timezone(timedelta(hours=9)))
-            .isoformat(),
+            "generated_at": get_jst_now(),
+            "duration_ms": ms(time.perf_counter() - self.started),
+            "stages": summary,
+            "counters": counters,
+            "stations": {
+                key: {name: ms(seconds) for name, seconds in values.items()}
+                for key, values in stations.items()
+            },
         }
 
+
+class _MetricsStage:
+    """RunMetrics.stage() が返す計測区間"""
+
+    __slots__ = ("metrics", "name", "station_key", "started")
+
+    def __init__(self, metrics, name, station_key):
+        self.metrics = metrics
+        self.name = name
+        self.station_key = station_key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(
+            self.name, time.perf_counter() - self.started, self.station_key
+        )
+        return False
+
+
+METRICS = RunMetrics(METRICS_ENABLED)
+
+
+def write_run_metrics(path=METRICS_FILE, prometheus_path=METRICS_PROMETHEUS_FILE):
+    """計測結果を run_metrics.json（と Prometheus テキスト形式）に出力"""
+    if not METRICS.enabled:
+        return None
+
+    snapshot = METRICS.snapshot()
+    replace_file(path, json.dumps(snapshot, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    if prometheus_path:
+        lines = [
+            "# HELP wbgt_run_duration_seconds Wall-clock duration of the run.",
+            "# TYPE wbgt_run_duration_seconds gauge",
+            f"wbgt_run_duration_seconds {snapshot['duration_ms'] / 1000:.6f}",
+            "# HELP wbgt_stage_seconds Time spent per processing stage.",
+            "# TYPE wbgt_stage_seconds summary",
+        ]
+        for name, stats in snapshot["stages"].items():
+            lines.append(
+                f'wbgt_stage_seconds{{stage="{name}",quantile="0.5"}} {stats["p50_ms"] / 1000:.6f}'
+            )
+            lines.append(
+                f'wbgt_stage_seconds{{stage="{name}",quantile="0.95"}} {stats["p95_ms"] / 1000:.6f}'
+            )
+            lines.append(
+                f'wbgt_stage_seconds_sum{{stage="{name}"}} {stats["total_ms"] / 1000:.6f}'
+            )
+            lines.append(f'wbgt_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append("# HELP wbgt_events_total Counters collected during the run.")
+        lines.append("# TYPE wbgt_events_total counter")
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'wbgt_events_total{{name="{name}"}} {value}')
+
+        replace_file(prometheus_path, ("\n".join(lines) + "\n").encode("utf-8"))
+
+    return snapshot
+
+
+def create_http_session(pool_size=MAX_WORKERS):
+    """接続を使い回す（keep-alive）HTTP セッションを生成"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_http_cache(path=None):
+    """HTTP 検証子キャッシュ（station_id -> ETag / Last-Modified / 解析済みデータ）を読み込む"""
+    path = path or HTTP_CACHE_FILE
+    if not HTTP_CACHE_ENABLED or not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            http_cache = json.load(f)
+        # 解析済みデータは読み込み時に予報オブジェクトへ戻す
+        for entry in http_cache.values():
+            if "data" in entry:
+                entry["data"] = decode_forecast(entry["data"])
+            if "stations" in entry:
+                entry["stations"] = {
+                    station_id: decode_forecast(payload)
+                    for station_id, payload in entry["stations"].items()
+                }
+        return http_cache
+    except Exception as e:
+        print(f"  ⚠️ HTTP キャッシュ読み込みエラー（無視して続行）: {e}")
+        return {}
+
+
+def save_http_cache(http_cache, path=None):
+    """HTTP 検証子キャッシュを保存"""
+    path = path or HTTP_CACHE_FILE
+    if not HTTP_CACHE_ENABLED:
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            http_cache,
+            f,
+            ensure_ascii=False,
+            default=lambda forecast: encode_forecast(forecast, "compact"),
+        )
+    os.replace(tmp_path, path)
+
+
+class Forecast:
+    """1 地点分の予報（観測地点コード・更新時刻と、予報時刻・WBGT の配列）
+
+    予報時刻は datetime64[m]、WBGT は 0.1°C 単位の整数の NumPy 配列で持つ。
+    取得から統計計算・HTML 生成・概要・通知まではこのまま受け渡し、
+    JSON への変換は出力・キャッシュの読み書き時（encode_forecast / decode_forecast）に限る
+    """
+
+    __slots__ = ("station_id", "update_time", "times", "values")
+
+    def __init__(self, station_id, update_time, times, values):
+        self.station_id = station_id
+        self.update_time = update_time
+        self.times = np.asarray(times, dtype="datetime64[m]")
+        self.values = np.asarray(values, dtype=np.int32)
+
+    @property
+    def wbgt(self):
+        """WBGT（°C）の配列"""
+        return self.values / 10.0
+
+    def iso_times(self):
+        """予報時刻の ISO 形式文字列（YYYY-MM-DDTHH:MM:SS）のリスト"""
+        return np.datetime_as_string(self.times, unit="s").tolist()
+
+    def points(self):
+        """従来形式（時刻情報と WBGT の辞書）のデータ点のリスト"""
+        return [
+            {
+                "time": t,
+                "year": int(t[:4]),
+                "month": int(t[5:7]),
+                "day": int(t[8:10]),
+                "hour": int(t[11:13]),
+                "minute": int(t[14:16]),
+                "wbgt": value / 10.0,
+            }
+            for t, value in zip(self.iso_times(), self.values.tolist())
+        ]
+
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _days_in_month(year, month):
+    """月の日数（うるう年を考慮）"""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+def _roll_forward(year, month, day, days):
+    """日付を days 日進める（datetime を生成せず整数演算のみで月・年の繰り上がりを処理）"""
+    day += days
+    while day > _days_in_month(year, month):
+        day -= _days_in_month(year, month)
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return year, month, day
+
+
+def parse_time_axis(header_cells):
+    """ヘッダー行の YYYYMMDDHH を解析し、各列の予報時刻（datetime64[m] の配列）を返す
+
+    24 時以降（例: 2026082224 = 23 日 0 時）は時・日の繰り上がりとして整数演算で処理する。
+    解析できない列は NaT とし、同じヘッダーを持つ全ての行でこの時刻軸を使い回す
+    """
+    axis = []
+    for cell in header_cells:
+        ts = cell.strip()
+        if not ts:
+            break
+        if len(ts) != 10:  # YYYYMMDDHH 以外の列は使わない
+            axis.append("NaT")
+            continue
+        if not ts.isdigit():
+            print(f"    ⚠️ 時刻解析エラー: {ts}")
+            axis.append("NaT")
+            continue
+
+        year, month, day, hour = int(ts[:4]), int(ts[4:6]), int(ts[6:8]), int(ts[8:10])
+        if not (1 <= month <= 12 and 1 <= day <= _days_in_month(year, month)):
+            print(f"    ⚠️ 時刻解析エラー: {ts}")
+            axis.append("NaT")
+            continue
+        if hour >= 24:
+            year, month, day = _roll_forward(year, month, day, hour // 24)
+            hour %= 24
+
+        # JST 時刻として扱う（UTC 変換は行わない）
+        axis.append(f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:00")
+    return np.array(axis, dtype="datetime64[m]")
+
+
+def iter_wbgt_csv(lines):
+    """予報 CSV を 1 行ずつ解析し、地点ごとの予報（Forecast）を順に返す
+
+    lines は文字列の反復可能オブジェクト（レスポンスの iter_lines やファイルなど）。
+    1 行目のヘッダーを時刻軸として一度だけ解析し、以降の各行（1 行 = 1 地点）に適用する
+    """
+    axis = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        cells = line.split(",")
+        if axis is None:
+            axis = parse_time_axis(cells[2:])
+            usable = (~np.isnat(axis)).tolist()
+            continue
+
+        station_id = cells[0].strip()
+        update_time = cells[1].strip()
+
+        # 値（0.1°C 単位の整数）と列番号を配列に溜め、最後に時刻軸から予報時刻を取り出す
+        columns = array.array("i")
+        values = array.array("i")
+        for column, val in enumerate(cells[2 : 2 + len(axis)]):
+            val = val.strip()
+            if not val or not usable[column]:
+                continue
+            try:
+                values.append(int(val))
+            except (ValueError, OverflowError):
+                print(f"    ⚠️ 無効な値をスキップ: {val}")
+                continue
+            columns.append(column)
+
+        yield Forecast(
+            station_id,
+            update_time,
+            axis[np.frombuffer(columns, dtype=np.int32)],
+            np.frombuffer(values, dtype=np.int32),
+        )
+
+
+def parse_wbgt_csv(csv_content):
+    """予報 CSV（ヘッダー行 + データ行）を解析し、最初の地点の予報データを返す"""
+    for wbgt_data in iter_wbgt_csv(csv_content.splitlines()):
+        return wbgt_data
+    raise ValueError("予報 CSV にデータ行がありません")
+
+
+def _iter_response_lines(response, transfer):
+    """レスポンス本文を逐次読み込んで行を返す（受信バイト数を計測し、受信待ちの時間を transfer に加算）"""
+    pending = b""
+    chunks = response.iter_content(chunk_size=CSV_CHUNK_SIZE)
+    while True:
+        started = time.perf_counter()
+        chunk = next(chunks, None)
+        transfer["seconds"] += time.perf_counter() - started
+        if chunk is None:
+            break
+        METRICS.count("bytes_downloaded", len(chunk))
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode(CSV_ENCODING)
+    if pending:
+        yield pending.decode(CSV_ENCODING)
+
+
+def iter_response_forecasts(response, station_key=None):
+    """レスポンス本文を受信しながら解析し、予報を順に返す
+
+    本文の受信待ちを transfer、それ以外（デコード・解析）を parse として分けて記録する
+    """
+    transfer = {"seconds": 0.0}
+    started = time.perf_counter()
+    yield from iter_wbgt_csv(_iter_response_lines(response, transfer))
+    METRICS.record("transfer", transfer["seconds"], station_key)
+    METRICS.record("parse", time.perf_counter() - started - transfer["seconds"], station_key)
+
+
+def _request_csv(url, cached, session=None, station_key=None):
+    """検証子付きで CSV を要求し、本文を逐次読み込むためのレスポンスを返す"""
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    # fetch は接続から応答ヘッダー受信まで。本文の受信（transfer）は解析しながら逐次行う
+    with METRICS.stage("fetch", station_key):
+        response = (session or requests).get(
+            url, timeout=HTTP_TIMEOUT, headers=headers, stream=True
+        )
+    METRICS.count(f"http_{response.status_code}")
+    return response
+
+
+def _cache_validators(response):
+    """レスポンスの検証子（ETag / Last-Modified）。どちらもなければ None"""
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return None
+    return {"etag": etag, "last_modified": last_modified}
+
+
+def download_wbgt_data(station_id, session=None, http_cache=None):
+    """指定した観測地点のWBGTデータをダウンロードして解析
+
+    http_cache を渡すと条件付き GET を行い、304 の場合は前回の解析結果を再利用する
+    """
+    url = WBGT_CSV_URL.format(station_id=station_id)
+    station_key = STATIONS_BY_ID.get(station_id, station_id)
+
+    try:
+        print(f"  📡 データ取得中: {url}")
+        cached = http_cache.get(station_id) if http_cache is not None else None
+
+        with _request_csv(url, cached, session, station_key) as response:
+            if response.status_code == 304 and cached:
+                print("  ♻️ 更新なし (304): キャッシュ済みデータを再利用")
+                wbgt_data = cached["data"]
+            else:
+                response.raise_for_status()
+                # 本文を最後まで読み切り（接続を再利用できるようにする）、該当地点の行を採用
+                wbgt_data = None
+                for row in iter_response_forecasts(response, station_key):
+                    if wbgt_data is None or row.station_id == station_id:
+                        wbgt_data = row
+                if wbgt_data is None:
+                    raise ValueError("予報 CSV にデータ行がありません")
+
+                validators = _cache_validators(response)
+                if http_cache is not None and validators:
+                    http_cache[station_id] = dict(validators, data=wbgt_data)
+
+        print(f"  ✅ データ取得成功: {wbgt_data.values.size} 件のデータポイント")
+        return wbgt_data
+
     except Exception as e:
         print(f"  ❌ データ取得エラー: {e}")
+        METRICS.count("fetch_errors")
         return None
 
 
-def generate_html(wbgt_data, station_name, station_key):
-    """HTMLダッシュボードを生成"""
-    if not wbgt_data:
-        print(f"  ❌ {station_name}: データなしのためHTML生成をスキップ")
+def download_bulk_forecasts(url, station_ids, session=None, http_cache=None):
+    """複数地点分の予報 CSV（全地点・都道府県別）を取得し、{観測地点コード: 予報データ} を返す
+
+    ファイル内の行のうち station_ids に含まれる地点だけを残す。
+    http_cache を渡すと URL 単位で条件付き GET を行う。失敗時は空の辞書を返す
+    """
+    station_ids = set(station_ids)
+    cached = http_cache.get(url) if http_cache is not None else None
+
+    try:
+        print(f"  📡 一括データ取得中: {url}")
+        with _request_csv(url, cached, session) as response:
+            if response.status_code == 304 and cached:
+                print("  ♻️ 更新なし (304): キャッシュ済みデータを再利用")
+                forecasts = dict(cached["stations"])
+            else:
+                response.raise_for_status()
+                forecasts = {}
+                for row in iter_response_forecasts(response):
+                    if row.station_id in station_ids:
+                        forecasts[row.station_id] = row
+
+                validators = _cache_validators(response)
+                if http_cache is not None and validators:
+                    http_cache[url] = dict(validators, stations=dict(forecasts))
+
+        print(f"  ✅ 一括データ取得成功: {len(forecasts)}/{len(station_ids)} 地点")
+        return forecasts
+
+    except Exception as e:
+        print(f"  ❌ 一括データ取得エラー: {e}")
+        METRICS.count("fetch_errors")
+        return {}
+
+
+def bulk_sources(mode=None):
+    """一括取得モードの取得元 URL と、その URL から取り出す観測地点コードの対応を返す"""
+    mode = mode or FETCH_MODE
+    if mode == "all":
+        return {
+            WBGT_BULK_CSV_URL: [config["station_id"] for config in STATIONS.values()]
+        }
+
+    sources = {}
+    for prefecture, station_keys in STATIONS_BY_PREFECTURE.items():
+        slug = PREFECTURE_SLUGS.get(prefecture)
+        if slug is None:
+            continue  # 都道府県別ファイルがない地点は個別取得に任せる
+        sources[WBGT_PREFECTURE_CSV_URL.format(prefecture=slug)] = [
+            STATIONS[key]["station_id"] for key in station_keys
+        ]
+    return sources
+
+
+def encode_forecast(wbgt_data, json_format=None):
+    """予報（Forecast）を出力形式（compact / verbose）の辞書に変換"""
+    json_format = json_format or JSON_FORMAT
+
+    if json_format == "compact" and wbgt_data.values.size:
+        steps = np.unique(np.diff(wbgt_data.times).astype(int))
+        # 等間隔でない場合は列形式で表現できないため従来形式で出力
+        if len(steps) <= 1:
+            return {
+                "format": "compact",
+                "station_id": wbgt_data.station_id,
+                "update_time": wbgt_data.update_time,
+                "start": wbgt_data.iso_times()[0],
+                "step_minutes": int(steps[0]) if len(steps) else 0,
+                "values": wbgt_data.values.tolist(),
+            }
+
+    return {
+        "station_id": wbgt_data.station_id,
+        "update_time": wbgt_data.update_time,
+        "data": wbgt_data.points(),
+    }
+
+
+def decode_forecast(payload):
+    """compact / verbose いずれの形式の JSON も予報（Forecast）に戻す"""
+    if "values" not in payload:
+        points = payload["data"]
+        return Forecast(
+            payload["station_id"],
+            payload["update_time"],
+            [d["time"] for d in points],
+            [round(d["wbgt"] * 10) for d in points],
+        )
+
+    values = payload["values"]
+    start = np.datetime64(datetime.fromisoformat(payload["start"]), "m")
+    step = np.timedelta64(payload["step_minutes"], "m")
+    return Forecast(
+        payload["station_id"],
+        payload["update_time"],
+        start + step * np.arange(len(values)),
+        values,
+    )
+
+
+def dump_forecast_json(wbgt_data, json_format=None):
+    """予報データを出力形式に応じた JSON 文字列にする"""
+    json_format = json_format or JSON_FORMAT
+    payload = encode_forecast(wbgt_data, json_format)
+    if json_format == "compact":
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+# 危険レベル（下限値, レベル, 表示色, 対応）を下限値の高い順に定義
+DANGER_LEVELS = [
+    (31, "運動は原則中止", "#800080", "特別の場合以外は運動を中止する"),
+    (
+        28,
+        "厳重警戒",
+        "#FF0000",
+        "激しい運動や持久走などは避け、10〜20分おきに休憩・水分補給を",
+    ),
+    (25, "警戒", "#FF6600", "積極的に休憩をとり、適宜水分・塩分を補給する"),
+    (21, "注意", "#0066CC", "熱中症の兆候に注意し、運動の合間に水分・塩分を補給する"),
+    (None, "ほぼ安全", "#28A745", "適宜水分・塩分の補給を行う"),
+]
+
+
+# 危険レベルを昇順に並べたもの（レベル番号 i は DANGER_LEVELS_ASC[i]）と、その閾値
+DANGER_LEVELS_ASC = DANGER_LEVELS[::-1]
+DANGER_THRESHOLDS = np.array([level[0] for level in DANGER_LEVELS_ASC[1:]], dtype=float)
+# 予報間隔が求められない（データ点が 1 つの）場合の 1 点あたりの時間
+DEFAULT_SLOT_HOURS = 3.0
+
+
+def _slot_hours(times):
+    """昇順の予報時刻それぞれが表す時間（次の時刻までの間隔、最後は直前の間隔）"""
+    if len(times) < 2:
+        return np.full(len(times), DEFAULT_SLOT_HOURS)
+    steps = np.diff(times).astype("timedelta64[m]").astype(float) / 60
+    return np.append(steps, steps[-1])
+
+
+def _empty_analytics():
+    """予報のある地点が 1 つもない場合の統計量（地点数 0 の配列）"""
+    no_thresholds = np.zeros((0, len(DANGER_THRESHOLDS)))
+    return {
+        "keys": [],
+        "index": {},
+        "forecasts": {},
+        "times": np.array([], dtype="datetime64[m]"),
+        "values": np.zeros((0, 0)),
+        "slot_hours": np.zeros((0, 0)),
+        "counts": np.zeros(0, dtype=int),
+        "current": np.zeros(0),
+        "max": np.zeros(0),
+        "min": np.zeros(0),
+        "levels": np.zeros((0, 0), dtype=int),
+        "current_level": np.zeros(0, dtype=int),
+        "hours_at_or_above": no_thresholds,
+        "first_crossing": no_thresholds.astype(int),
+    }
+
+
+def compute_analytics(forecasts):
+    """全地点の予報を (地点 × 時刻) の 2 次元配列にまとめ、統計量を一括計算
+
+    forecasts は station_key -> 予報（Forecast）。地点ごとに時刻軸が異なる場合は全地点の時刻の和集合を
+    列とし、予報のない箇所は NaN とする。地点の並びは forecasts の順（データ点のない地点は除く）
+    """
+    keys = [key for key, data in forecasts.items() if data and data.values.size]
+    if not keys:
+        return _empty_analytics()
+
+    station_times = [forecasts[key].times for key in keys]
+    times = np.unique(np.concatenate(station_times))
+
+    # 各予報が表す時間は地点自身の時刻軸から求める（次の予報時刻までの間隔、最後の予報は直前の間隔）
+    values = np.full((len(keys), len(times)), np.nan)
+    slot_hours = np.zeros((len(keys), len(times)))
+    for row, (key, station_time) in enumerate(zip(keys, station_times)):
+        columns = np.searchsorted(times, station_time)
+        values[row, columns] = forecasts[key].wbgt
+        ordered = np.sort(columns)
+        slot_hours[row, ordered] = _slot_hours(times[ordered])
+
+    rows = np.arange(len(keys))
+    valid = ~np.isnan(values)
+    first = valid.argmax(axis=1)
+    filled = np.where(valid, values, -np.inf)
+
+    # 危険レベル（0: ほぼ安全 〜 4: 運動は原則中止、予報なしは -1）
+    levels = np.where(
+        valid, np.searchsorted(DANGER_THRESHOLDS, filled, side="right"), -1
+    )
+
+    # 閾値ごとの到達判定（地点 × 時刻 × 閾値）
+    above = filled[:, :, None] >= DANGER_THRESHOLDS[None, None, :]
+    hours_at_or_above = (above * slot_hours[:, :, None]).sum(axis=1)
+    first_crossing = np.where(above.any(axis=1), above.argmax(axis=1), -1)
+
+    return {
+        "keys": keys,
+        "index": {key: row for row, key in enumerate(keys)},
+        "forecasts": {key: forecasts[key] for key in keys},
+        "times": times,
+        "values": values,
+        "slot_hours": slot_hours,
+        "counts": valid.sum(axis=1),
+        "current": values[rows, first],
+        "max": np.max(filled, axis=1),
+        "min": np.min(np.where(valid, values, np.inf), axis=1),
+        "levels": levels,
+        "current_level": levels[rows, first],
+        "hours_at_or_above": hours_at_or_above,
+        "first_crossing": first_crossing,
+    }
+
+
+def get_station_stats(analytics, station_key):
+    """一括計算した統計量から 1 地点分を取り出す（予報のない地点は None）"""
+    row = analytics["index"].get(station_key)
+    if row is None:
         return None
 
-    # 現在の値と統計情報を計算
-    current_wbgt = wbgt_data["data"][0]["wbgt"] if wbgt_data["data"] else 0
-    max_wbgt = max([d["wbgt"] for d in wbgt_data["data"]]) if wbgt_data["data"] else 0
-    min_wbgt = min([d["wbgt"] for d in wbgt_data["data"]]) if wbgt_data["data"] else 0
-
-    # 危険レベルの判定
-    if current_wbgt >= 31:
-        danger_level = "運動は原則中止"
-        danger_color = "#800080"
-        danger_message = "特別の場合以外は運動を中止する"
-    elif current_wbgt >= 28:
-        danger_level = "厳重警戒"
-        danger_color = "#FF0000"
-        danger_message = "激しい運動や持久走などは避け、10〜20分おきに休憩・水分補給を"
-    elif current_wbgt >= 25:
-        danger_level = "警戒"
-        danger_color = "#FF6600"
-        danger_message = "積極的に休憩をとり、適宜水分・塩分を補給する"
-    elif current_wbgt >= 21:
-        danger_level = "注意"
-        danger_color = "#0066CC"
-        danger_message = "熱中症の兆候に注意し、運動の合間に水分・塩分を補給する"
+    _, level, color, message = DANGER_LEVELS_ASC[analytics["current_level"][row]]
+    hours = analytics["hours_at_or_above"][row]
+    crossings = analytics["first_crossing"][row]
+    return {
+        "current": float(analytics["current"][row]),
+        "max": float(analytics["max"][row]),
+        "min": float(analytics["min"][row]),
+        "level": level,
+        "color": color,
+        "message": message,
+        "data_points": int(analytics["counts"][row]),
+        "hours_at_or_above": {
+            str(int(threshold)): float(hours[k])
+            for k, threshold in enumerate(DANGER_THRESHOLDS)
+        },
+        "first_crossing": {
+            str(int(threshold)): (
+                str(analytics["times"][crossings[k]].astype("datetime64[s]"))
+                if crossings[k] >= 0
+                else None
+            )
+            for k, threshold in enumerate(DANGER_THRESHOLDS)
+        },
+    }
+
+
+# 予報グラフ（SVG）の大きさと余白（上・右・下・左。右は閾値線のラベル用）
+CHART_WIDTH = 800
+CHART_HEIGHT = 360
+CHART_MARGIN = (20, 110, 50, 60)
+CHART_LINE_COLOR = "#2196F3"
+# インデックスのカードに表示する推移グラフの大きさ（表示時は枠に合わせて伸縮）
+SPARKLINE_WIDTH = 340
+SPARKLINE_HEIGHT = 120
+
+
+def _svg_number(value):
+    """SVG の座標値（小数 1 桁、末尾の .0 は省略）"""
+    text = f"{value:.1f}"
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _svg_path(xs, ys):
+    """座標列を折れ線の path データ（M x y L x y ...）にする"""
+    return "M" + "L".join(
+        f"{_svg_number(x)} {_svg_number(y)}" for x, y in zip(xs, ys)
+    )
+
+
+def _chart_ticks(low, high, count=5):
+    """low〜high を count 区間程度に分ける目盛り（1・2・5 × 10^n 刻み）"""
+    raw = (high - low) / count
+    magnitude = 10 ** np.floor(np.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    return np.arange(np.ceil(low / step) * step, high + step / 2, step)
+
+
+def _chart_bands(low, high):
+    """表示範囲 low〜high に入る危険レベルの帯 (下端, 上端, レベル, 表示色) のリスト"""
+    bounds = [-np.inf] + DANGER_THRESHOLDS.tolist() + [np.inf]
+    bands = []
+    for (_, level, color, _), lower, upper in zip(
+        DANGER_LEVELS_ASC, bounds, bounds[1:]
+    ):
+        lower, upper = max(lower, low), min(upper, high)
+        if lower < upper:
+            bands.append((lower, upper, level, color))
+    return bands
+
+
+def render_chart_svg(wbgt_data):
+    """地点ページの予報グラフ（折れ線・危険レベルの帯・閾値線）を SVG で描画
+
+    ブラウザでグラフ描画ライブラリを読み込まずに表示できるよう、生成時に静的な SVG にする
+    （HTML に直接埋め込むため xmlns は省略）。各データ点には日時と WBGT のツールチップを付ける
+    """
+    times = wbgt_data.iso_times()
+    values = wbgt_data.wbgt
+    if not times:
+        return ""
+
+    top, right, bottom, left = CHART_MARGIN
+    plot_width = CHART_WIDTH - left - right
+    plot_height = CHART_HEIGHT - top - bottom
+    # 縦軸は予報の最低値 - 2°C 〜 最高値 + 2°C
+    low, high = float(values.min()) - 2, float(values.max()) + 2
+
+    if len(times) > 1:
+        xs = left + plot_width * np.arange(len(times)) / (len(times) - 1)
     else:
-        danger_level = "ほぼ安全"
-        danger_color = "#28A745"
-        danger_message = "適宜水分・塩分の補給を行う"
+        xs = np.array([left + plot_width / 2])
 
-    # JavaScriptデータを準備
-    chart_data = json.dumps(wbgt_data["data"])
+    def y_at(value):
+        return top + plot_height * (high - value) / (high - low)
 
-    html_content = f"""<!DOCTYPE html>
-<html lang="ja">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>WBGT 予報ダッシュボード - {station_name}</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
-    <style>
-        body {{
-            font-family: 'Helvetica Neue', Arial, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: #333;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            padding: 30px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            text-align: center;
-            margin-bottom: 30px;
-            padding-bottom: 20px;
-            border-bottom: 3px solid #f0f0f0;
-        }}
-        .title {{
-            font-size: 2.5em;
-            font-weight: bold;
-            color: #2c3e50;
-            margin-bottom: 10px;
-        }}
-        .subtitle {{
-            font-size: 1.2em;
-            color: #7f8c8d;
-        }}
-        .location-info {{
-            background: #e8f4f8;
-            border: 1px solid #3498db;
-            border-radius: 10px;
-            padding: 15px;
-            margin-bottom: 20px;
-            text-align: center;
-        }}
-        .location-name {{
-            font-size: 1.3em;
-            font-weight: bold;
-            color: #2980b9;
-        }}
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-        .stat-card {{
-            background: linear-gradient(135deg, #f8f9fa, #e9ecef);
-            padding: 25px;
-            border-radius: 15px;
-            text-align: center;
-            border-left: 5px solid #007bff;
-            transition: transform 0.3s ease;
-        }}
-        .stat-card:hover {{
-            transform: translateY(-5px);
-        }}
-        .stat-value {{
-            font-size: 2.5em;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        .stat-label {{
-            font-size: 1.1em;
-            color: #6c757d;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        .danger-card {{
-            background: {danger_color};
-            color: white;
-            padding: 25px;
-            border-radius: 15px;
-            text-align: center;
-            margin-bottom: 30px;
-            box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-        }}
-        .danger-level {{
-            font-size: 2em;
-            font-weight: bold;
-            margin-bottom: 10px;
-        }}
-        .danger-message {{
-            font-size: 1.2em;
-            opacity: 0.9;
-        }}
-        .chart-container {{
-            position: relative;
-            height: 400px;
-            margin-bottom: 30px;
-            background: #f8f9fa;
-            border-radius: 15px;
-            padding: 20px;
-        }}
-        .update-info {{
-            text-align: center;
-            color: #6c757d;
-            font-size: 0.9em;
-            margin-top: 20px;
-            padding-top: 20px;
-            border-top: 1px solid #dee2e6;
-        }}
-        .legend {{
-            display: flex;
-            justify-content: center;
-            gap: 20px;
-            margin-top: 20px;
-            flex-wrap: wrap;
-        }}
-        .legend-item {{
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }}
-        .legend-color {{
-            width: 20px;
-            height: 4px;
-            border-radius: 2px;
-        }}
-        .auto-update-status {{
-            background: #e8f5e8;
-            border: 1px solid #4caf50;
-            border-radius: 10px;
-            padding: 15px;
-            margin-bottom: 20px;
-            text-align: center;
-        }}
-        .auto-update-status .status-icon {{
-            color: #4caf50;
-            font-size: 1.2em;
-            margin-right: 8px;
-        }}
-        .navigation {{
-            background: #f8f9fa;
-            border: 1px solid #ddd;
-            border-radius: 10px;
-            padding: 15px;
-            margin-bottom: 20px;
-            text-align: center;
-        }}
-        .nav-button {{
-            display: inline-block;
-            padding: 10px 20px;
-            margin: 0 10px;
-            background: #007bff;
-            color: white;
-            text-decoration: none;
-            border-radius: 5px;
-            transition: background 0.3s ease;
-        }}
-        .nav-button:hover {{
-            background: #0056b3;
-        }}
-        .nav-button.current {{
-            background: #28a745;
-        }}
-        @media (max-width: 768px) {{
-            .container {{
-                margin: 10px;
-                padding: 20px;
-            }}
-            .title {{
-                font-size: 2em;
-            }}
-            .stats-grid {{
-                grid-template-columns: 1fr;
-            }}
-            .nav-button {{
-                display: block;
-                margin: 5px 0;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="title">WBGT予報ダッシュボード</div>
-            <div class="subtitle">観測地点: {wbgt_data['station_id']}</div>
-        </div>
-        
-        <div class="navigation">
-            <strong>観測地点切替:</strong><br>
-            <a href="abashiri.html" class="nav-button">網走</a>
-            <a href="kushiro.html" class="nav-button">釧路</a>
-            <a href="hachinohe.html" class="nav-button">八戸</a>
-            <a href="ishinomaki.html" class="nav-button">石巻</a>
-            <a href="tokyo.html" class="nav-button">東京</a>
-            <a href="tateyama.html" class="nav-button">館山</a>
-            <a href="shionomisaki.html" class="nav-button">潮岬</a>
-        </div>
+    ys = y_at(values)
+    right_edge = left + plot_width
+    bottom_edge = top + plot_height
 
-        <div class="location-info">
-            <div class="location-name">{station_name}</div>
-            <div>観測地点コード: {wbgt_data['station_id']}</div>
-        </div>
-        
-        <div class="auto-update-status">
-            <span class="status-icon">🔄</span>
-            <strong>自動更新中:</strong> JST 9:00-21:00 の間、2 時間毎にデータを更新しています
-        </div>
-        
-        <div class="danger-card">
-            <div class="danger-level">{danger_level}</div>
-            <div class="danger-message">{danger_message}</div>
-        </div>
-        
-        <div class="stats-grid">
-            <div class="stat-card">
-                <div class="stat-value" style="color: {danger_color};">{current_wbgt:.1f}°C</div>
-                <div class="stat-label">現在の WBGT</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value" style="color: #dc3545;">{max_wbgt:.1f}°C</div>
-                <div class="stat-label">予報最高値</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value" style="color: #28a745;">{min_wbgt:.1f}°C</div>
-                <div class="stat-label">予報最低値</div>
-            </div>
-        </div>
-        
-        <div class="chart-container">
-            <canvas id="wbgtChart"></canvas>
-        </div>
-        
-        <div class="legend">
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: #28A745;"></div>
-                <span>ほぼ安全 (21未満)</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: #0066CC;"></div>
-                <span>注意 (21〜25未満)</span>
+    parts = [
+        f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}"'
+        f' class="wbgt-chart" role="img" aria-label="WBGT 予報の推移" font-size="12">'
+    ]
+
+    # 危険レベルの帯
+    for lower, upper, _, color in _chart_bands(low, high):
+        parts.append(
+            f'<rect x="{left}" y="{_svg_number(y_at(upper))}" width="{plot_width}"'
+            f' height="{_svg_number(y_at(lower) - y_at(upper))}" fill="{color}" fill-opacity="0.08"/>'
+        )
+
+    # 縦軸の目盛りと補助線
+    for tick in _chart_ticks(low, high):
+        y = _svg_number(y_at(tick))
+        parts.append(
+            f'<line x1="{left}" y1="{y}" x2="{right_edge}" y2="{y}" stroke="#e0e0e0"/>'
+            f'<text x="{left - 8}" y="{y}" dy="4" text-anchor="end" fill="#666">{tick:g}°C</text>'
+        )
+
+    # 閾値線（21 / 25 / 28 / 31°C）とレベル名
+    for threshold, level, color, _ in DANGER_LEVELS_ASC[1:]:
+        if not low < threshold < high:
+            continue
+        y = _svg_number(y_at(threshold))
+        parts.append(
+            f'<line x1="{left}" y1="{y}" x2="{right_edge}" y2="{y}" stroke="{color}"'
+            f' stroke-width="2" stroke-dasharray="5 5"/>'
+            f'<text x="{right_edge + 6}" y="{y}" dy="4" fill="{color}">{level}</text>'
+        )
+
+    # 横軸の時刻（ラベルが重ならないよう最大 8 個に間引く）
+    label_step = -(-len(times) // 8)
+    for i in range(0, len(times), label_step):
+        t = times[i]
+        parts.append(
+            f'<text x="{_svg_number(xs[i])}" y="{bottom_edge + 18}" text-anchor="middle"'
+            f' fill="#666">{int(t[5:7])}/{int(t[8:10])} {t[11:16]}</text>'
+        )
+    parts.append(
+        f'<line x1="{left}" y1="{bottom_edge}" x2="{right_edge}" y2="{bottom_edge}" stroke="#999"/>'
+        f'<text x="{left + plot_width / 2:g}" y="{CHART_HEIGHT - 6}" text-anchor="middle"'
+        f' fill="#333">時刻 (JST)</text>'
+        f'<text transform="translate(14 {top + plot_height / 2:g}) rotate(-90)"'
+        f' text-anchor="middle" fill="#333">WBGT (°C)</text>'
+    )
+
+    # 予報値の折れ線とデータ点
+    parts.append(
+        f'<path d="{_svg_path(xs, ys)}" fill="none" stroke="{CHART_LINE_COLOR}"'
+        f' stroke-width="3" stroke-linejoin="round"/>'
+    )
+    for t, x, y, value in zip(times, xs, ys, values.tolist()):
+        parts.append(
+            f'<circle cx="{_svg_number(x)}" cy="{_svg_number(y)}" r="5"'
+            f' fill="{CHART_LINE_COLOR}" stroke="#fff" stroke-width="2">'
+            f"<title>{int(t[:4])}年{int(t[5:7])}月{int(t[8:10])}日 {t[11:16]} (JST)"
+            f" WBGT: {value:.1f}°C</title></circle>"
+        )
+
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_sparkline_svg(wbgt_data, color):
+    """インデックスのカード用の小さな推移グラフ（面・折れ線・閾値線）を SVG で描画
+
+    枠いっぱいに伸縮させるため軸・文字は描かず、線の太さは拡大率によらず一定にする
+    """
+    values = wbgt_data.wbgt
+    if not values.size:
+        return ""
+
+    low, high = float(values.min()) - 1, float(values.max()) + 1
+    if values.size > 1:
+        xs = SPARKLINE_WIDTH * np.arange(values.size) / (values.size - 1)
+    else:
+        xs = np.array([0.0, SPARKLINE_WIDTH])
+        values = np.repeat(values, 2)
+    ys = SPARKLINE_HEIGHT * (high - values) / (high - low)
+    line = _svg_path(xs, ys)
+
+    parts = [
+        f'<svg viewBox="0 0 {SPARKLINE_WIDTH} {SPARKLINE_HEIGHT}"'
+        f' preserveAspectRatio="none" class="sparkline" role="img" aria-label="WBGT 予報の推移">'
+    ]
+    for threshold, _, level_color, _ in DANGER_LEVELS_ASC[1:]:
+        if low < threshold < high:
+            y = _svg_number(SPARKLINE_HEIGHT * (high - threshold) / (high - low))
+            parts.append(
+                f'<line x1="0" y1="{y}" x2="{SPARKLINE_WIDTH}" y2="{y}" stroke="{level_color}"'
+                f' stroke-opacity="0.5" stroke-dasharray="4 4" vector-effect="non-scaling-stroke"/>'
+            )
+    parts.append(
+        f'<path d="{line}L{SPARKLINE_WIDTH} {SPARKLINE_HEIGHT}L0 {SPARKLINE_HEIGHT}Z"'
+        f' fill="{color}" fill-opacity="0.13"/>'
+        f'<path d="{line}" fill="none" stroke="{color}" stroke-width="2"'
+        f' stroke-linejoin="round" vector-effect="non-scaling-stroke"/>'
+        "</svg>"
+    )
+    return "".join(parts)
+
+
+# 地点ページ共通のスタイル・スクリプト（内容ハッシュ付きの静的アセットとして出力）
+ASSET_DIR = "assets"
+
+STATION_CSS = """body {
+    font-family: 'Helvetica Neue', Arial, sans-serif;
+    margin: 0;
+    padding: 20px;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    color: #333;
+}
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 20px;
+    padding: 30px;
+    box-shadow: 0 20px 40px rgba(0,0,0,0.1);
+}
+.header {
+    text-align: center;
+    margin-bottom: 30px;
+    padding-bottom: 20px;
+    border-bottom: 3px solid #f0f0f0;
+}
+.title {
+    font-size: 2.5em;
+    font-weight: bold;
+    color: #2c3e50;
+    margin-bottom: 10px;
+}
+.subtitle {
+    font-size: 1.2em;
+    color: #7f8c8d;
+}
+.location-info {
+    background: #e8f4f8;
+    border: 1px solid #3498db;
+    border-radius: 10px;
+    padding: 15px;
+    margin-bottom: 20px;
+    text-align: center;
+}
+.location-name {
+    font-size: 1.3em;
+    font-weight: bold;
+    color: #2980b9;
+}
+.stats-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 20px;
+    margin-bottom: 30px;
+}
+.stat-card {
+    background: linear-gradient(135deg, #f8f9fa, #e9ecef);
+    padding: 25px;
+    border-radius: 15px;
+    text-align: center;
+    border-left: 5px solid #007bff;
+    transition: transform 0.3s ease;
+}
+.stat-card:hover {
+    transform: translateY(-5px);
+}
+.stat-value {
+    font-size: 2.5em;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+.stat-label {
+    font-size: 1.1em;
+    color: #6c757d;
+    text-transform: uppercase;
+    letter-spacing: 1px;
+}
+.danger-card {
+    color: white;
+    padding: 25px;
+    border-radius: 15px;
+    text-align: center;
+    margin-bottom: 30px;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+}
+.danger-level {
+    font-size: 2em;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+.danger-message {
+    font-size: 1.2em;
+    opacity: 0.9;
+}
+.chart-container {
+    position: relative;
+    margin-bottom: 30px;
+    background: #f8f9fa;
+    border-radius: 15px;
+    padding: 20px;
+}
+.chart-container svg {
+    display: block;
+    width: 100%;
+    height: auto;
+}
+.update-info {
+    text-align: center;
+    color: #6c757d;
+    font-size: 0.9em;
+    margin-top: 20px;
+    padding-top: 20px;
+    border-top: 1px solid #dee2e6;
+}
+.legend {
+    display: flex;
+    justify-content: center;
+    gap: 20px;
+    margin-top: 20px;
+    flex-wrap: wrap;
+}
+.legend-item {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+}
+.legend-color {
+    width: 20px;
+    height: 4px;
+    border-radius: 2px;
+}
+.auto-update-status {
+    background: #e8f5e8;
+    border: 1px solid #4caf50;
+    border-radius: 10px;
+    padding: 15px;
+    margin-bottom: 20px;
+    text-align: center;
+}
+.auto-update-status .status-icon {
+    color: #4caf50;
+    font-size: 1.2em;
+    margin-right: 8px;
+}
+.navigation {
+    background: #f8f9fa;
+    border: 1px solid #ddd;
+    border-radius: 10px;
+    padding: 15px;
+    margin-bottom: 20px;
+    text-align: center;
+}
+.nav-button {
+    display: inline-block;
+    padding: 10px 20px;
+    margin: 0 10px;
+    background: #007bff;
+    color: white;
+    text-decoration: none;
+    border-radius: 5px;
+    transition: background 0.3s ease;
+}
+.nav-button:hover {
+    background: #0056b3;
+}
+.nav-select {
+    padding: 9px 12px;
+    margin: 0 10px;
+    border: 1px solid #007bff;
+    border-radius: 5px;
+    font-size: 1em;
+    background: white;
+}
+.nav-select[hidden] {
+    display: none;
+}
+@media (max-width: 768px) {
+    .container {
+        margin: 10px;
+        padding: 20px;
+    }
+    .title {
+        font-size: 2em;
+    }
+    .stats-grid {
+        grid-template-columns: 1fr;
+    }
+    .nav-button,
+    .nav-select {
+        display: block;
+        width: 100%;
+        box-sizing: border-box;
+        margin: 5px 0;
+    }
+}
+"""
+
+STATION_JS = """// ページロード時に最新の更新時刻を表示
+document.addEventListener('DOMContentLoaded', function() {
+    console.log(document.title + ' loaded');
+    // 生成時刻は build_info.json から取得（JST 表記をそのまま表示）
+    fetch('__BUILD_INFO_FILE__').then(r => r.json()).then(info => {
+        const t = info.generated_at;
+        document.getElementById('generated-at').textContent =
+            t.slice(0, 4) + '年' + t.slice(5, 7) + '月' + t.slice(8, 10) + '日 ' + t.slice(11, 19);
+    }).catch(() => {});
+    // 観測地点切替は全ページ共通の地点一覧から地方ごとの選択肢を作る（ページには地点一覧を埋め込まない）
+    const nav = document.getElementById('station-nav');
+    fetch('__INDEX_BUNDLE_FILE__').then(r => r.json()).then(index => {
+        index.regions.forEach(region => {
+            const group = document.createElement('optgroup');
+            group.label = region.name;
+            region.stations.forEach(station => {
+                const current = station.key === nav.dataset.current;
+                group.appendChild(new Option(station.name, station.url, current, current));
+            });
+            nav.appendChild(group);
+        });
+        nav.addEventListener('change', () => { location.href = nav.value; });
+        nav.hidden = false;
+    }).catch(() => {});
+});
+"""
+STATION_JS = STATION_JS.replace("__BUILD_INFO_FILE__", BUILD_INFO_FILE).replace(
+    "__INDEX_BUNDLE_FILE__", INDEX_BUNDLE_FILE
+)
+
+_STATIC_ASSETS = None
+_STATIC_ASSETS_LOCK = threading.Lock()
+
+
+def publish_asset(name, ext, content):
+    """内容ハッシュ付きのファイル名でアセットを書き出し、参照パスを返す"""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+    filename = f"{name}.{digest}.{ext}"
+    path = f"{ASSET_DIR}/{filename}"
+
+    if not output_exists(path):
+        write_output(path, content.encode("utf-8"))
+
+    # 同名アセットの古い版を削除（事前圧縮した .gz / .br を含む）
+    for old in list_output_dir(ASSET_DIR):
+        source = compressed_source(old)
+        if (
+            source != filename
+            and source.startswith(f"{name}.")
+            and source.endswith(f".{ext}")
+        ):
+            remove_output(f"{ASSET_DIR}/{old}")
+
+    return path
+
+
+def get_static_assets():
+    """共通アセットを（実行ごとに一度だけ）出力し、参照パスを返す"""
+    global _STATIC_ASSETS
+    with _STATIC_ASSETS_LOCK:
+        if _STATIC_ASSETS is None:
+            _STATIC_ASSETS = {
+                "css": publish_asset("station", "css", STATION_CSS),
+                "js": publish_asset("station", "js", STATION_JS),
+            }
+        return _STATIC_ASSETS
+
+
+# 地点ページの HTML テンプレート（{名前} の位置に値を差し込む。compile_template で事前に分割して使う）
+STATION_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>WBGT 予報ダッシュボード - {station_name}</title>
+    <link rel="stylesheet" href="{css}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="title">WBGT予報ダッシュボード</div>
+            <div class="subtitle">観測地点: {station_id}</div>
+        </div>
+        
+        <div class="navigation">
+            <a href="index.html#region-{region}" class="nav-button">地点一覧</a>
+            <select id="station-nav" class="nav-select" data-current="{station_key}" aria-label="観測地点切替" hidden></select>
+        </div>
+
+        <div class="location-info">
+            <div class="location-name">{station_name}</div>
+            <div>観測地点コード: {station_id}</div>
+        </div>
+        
+        <div class="auto-update-status">
+            <span class="status-icon">🔄</span>
+            <strong>自動更新中:</strong> JST 9:00-21:59 の間、新しい予報の発表に合わせてデータを更新しています
+        </div>
+        
+        <div class="danger-card" style="background: {danger_color};">
+            <div class="danger-level">{danger_level}</div>
+            <div class="danger-message">{danger_message}</div>
+        </div>
+        
+        <div class="stats-grid">
+            <div class="stat-card">
+                <div class="stat-value" style="color: {danger_color};">{current_wbgt}°C</div>
+                <div class="stat-label">現在の WBGT</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value" style="color: #dc3545;">{max_wbgt}°C</div>
+                <div class="stat-label">予報最高値</div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-value" style="color: #28a745;">{min_wbgt}°C</div>
+                <div class="stat-label">予報最低値</div>
+            </div>
+        </div>
+        
+        <div class="chart-container">
+            {chart_svg}
+        </div>
+        
+        <div class="legend">
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: #28A745;"></div>
+                <span>ほぼ安全 (21未満)</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: #0066CC;"></div>
+                <span>注意 (21〜25未満)</span>
             </div>
             <div class="legend-item">
                 <div class="legend-color" style="background-color: #FF6600;"></div>
@@ -447,550 +1504,2174 @@ def generate_html(wbgt_data, station_name, station_key):
         </div>
         
         <div class="update-info">
-            <p>データ更新: {wbgt_data['update_time']}</p>
-            <p>最終生成: {datetime.fromisoformat(wbgt_data['last_updated']).strftime('%Y年%m月%d日 %H:%M:%S')}</p>
-            <p>※ JST 9:00-21:00 の間、2時間毎に自動更新されます</p>
+            <p>データ更新: {update_time}</p>
+            <p>最終生成: <span id="generated-at">-</span></p>
+            <p>※ JST 9:00-21:59 の間、15 分毎に新しい予報を確認して自動更新されます</p>
             <p>※環境省「熱中症予防情報サイト」（https://www.wbgt.env.go.jp/）の WBGT データを加工して作成</p>
         </div>
     </div>
 
-    <script>
-        const data = {chart_data};
-        
-        const ctx = document.getElementById('wbgtChart').getContext('2d');
-        const chart = new Chart(ctx, {{
-            type: 'line',
-            data: {{
-                labels: data.map(d => {{
-                    // 直接 JST 時刻として扱う（タイムゾーン変換なし）
-                    return d.month + '/' + d.day + ' ' + 
-                           d.hour.toString().padStart(2, '0') + ':' + 
-                           d.minute.toString().padStart(2, '0');
-                }}),
-                datasets: [{{
-                    label: 'WBGT予報値',
-                    data: data.map(d => d.wbgt),
-                    borderColor: '#2196F3',
-                    backgroundColor: 'transparent',
-                    borderWidth: 3,
-                    pointBackgroundColor: '#2196F3',
-                    pointBorderColor: '#fff',
-                    pointBorderWidth: 2,
-                    pointRadius: 5,
-                    tension: 0.3
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {{
-                    x: {{
-                        title: {{
-                            display: true,
-                            text: '時刻 (JST)'
-                        }}
-                    }},
-                    y: {{
-                        beginAtZero: false,
-                        min: Math.min(...data.map(d => d.wbgt)) - 2,
-                        max: Math.max(...data.map(d => d.wbgt)) + 2,
-                        title: {{
-                            display: true,
-                            text: 'WBGT (°C)'
-                        }},
-                        ticks: {{
-                            callback: function(value) {{
-                                return value + '°C';
-                            }}
-                        }}
-                    }}
-                }},
-                plugins: {{
-                    legend: {{
-                        display: false
-                    }},
-                    tooltip: {{
-                        callbacks: {{
-                            title: function(context) {{
-                                const dataPoint = data[context[0].dataIndex];
-                                return dataPoint.year + '年' + 
-                                       dataPoint.month + '月' + 
-                                       dataPoint.day + '日 ' + 
-                                       dataPoint.hour.toString().padStart(2, '0') + ':' + 
-                                       dataPoint.minute.toString().padStart(2, '0') + ' (JST)';
-                            }},
-                            label: function(context) {{
-                                return 'WBGT: ' + context.parsed.y.toFixed(1) + '°C';
-                            }}
-                        }}
-                    }}
-                }},
-                annotation: {{
-                    annotations: {{
-                        line1: {{
-                            type: 'line',
-                            yMin: 25,
-                            yMax: 25,
-                            borderColor: '#FF6600',
-                            borderWidth: 2,
-                            borderDash: [5, 5],
-                            label: {{
-                                content: '警戒レベル',
-                                enabled: true,
-                                position: 'end'
-                            }}
-                        }},
-                        line2: {{
-                            type: 'line',
-                            yMin: 28,
-                            yMax: 28,
-                            borderColor: '#FF0000',
-                            borderWidth: 2,
-                            borderDash: [5, 5],
-                            label: {{
-                                content: '厳重警戒レベル',
-                                enabled: true,
-                                position: 'end'
-                            }}
-                        }},
-                        line3: {{
-                            type: 'line',
-                            yMin: 31,
-                            yMax: 31,
-                            borderColor: '#800080',
-                            borderWidth: 2,
-                            borderDash: [5, 5],
-                            label: {{
-                                content: '運動中止レベル',
-                                enabled: true,
-                                position: 'end'
-                            }}
-                        }}
-                    }}
-                }}
-            }}
-        }});
-        
-        // ページロード時に最新の更新時刻を表示
-        document.addEventListener('DOMContentLoaded', function() {{
-            console.log('{station_name} WBGT Dashboard loaded');
-            console.log('Data points:', data.length);
-            console.log('Last update:', '{wbgt_data['last_updated']}');
-        }});
-    </script>
+    <script src="{js}"></script>
 </body>
 </html>"""
 
-    return html_content
 
+def compile_template(template, **constants):
+    """テンプレートを静的な部分と差し込み位置に分割する
+
+    constants で渡した値（実行中は変わらないアセットのパスなど）はこの時点で埋め込み、
+    静的な部分とまとめておく。戻り値は「静的文字列, 差し込み名, 静的文字列, ...」のタプル
+    """
+    parts = []
+    literal = []
+    for text, field, _, _ in string.Formatter().parse(template):
+        literal.append(text)
+        if field is None:
+            continue
+        if field in constants:
+            literal.append(str(constants[field]))
+        else:
+            parts.extend(["".join(literal), field])
+            literal = []
+    parts.append("".join(literal))
+    return tuple(parts)
+
+
+def render_template(compiled, values):
+    """compile_template で分割したテンプレートに値を差し込む"""
+    parts = list(compiled)
+    parts[1::2] = [values[name] for name in compiled[1::2]]
+    return "".join(parts)
+
+
+_STATION_TEMPLATES = {}
+
+
+def get_station_template(assets):
+    """アセットのパスを埋め込んだ地点ページのテンプレート（プロセスごとに一度だけ分割）"""
+    key = (assets["css"], assets["js"])
+    if key not in _STATION_TEMPLATES:
+        _STATION_TEMPLATES[key] = compile_template(
+            STATION_PAGE_TEMPLATE, css=assets["css"], js=assets["js"]
+        )
+    return _STATION_TEMPLATES[key]
+
+
+def generate_html(wbgt_data, station_name, station_key, stats=None, assets=None):
+    """HTMLダッシュボードを生成（stats は get_station_stats の結果）
+
+    assets は共通の CSS / JS の参照パス。省略時は get_static_assets() で出力したものを使う
+    """
+    if not wbgt_data:
+        print(f"  ❌ {station_name}: データなしのためHTML生成をスキップ")
+        return None
+
+    # 現在の値と統計情報・危険レベル
+    if stats is None:
+        stats = get_station_stats(
+            compute_analytics({station_key: wbgt_data}), station_key
+        )
+
+    # グラフは生成時に SVG として埋め込む（共通の CSS / JS は静的アセットとして参照）
+    return render_template(
+        get_station_template(assets or get_static_assets()),
+        {
+            "station_name": station_name,
+            "station_id": wbgt_data.station_id,
+            "station_key": station_key,
+            "region": STATIONS[station_key]["region"],
+            "danger_color": stats["color"],
+            "danger_level": stats["level"],
+            "danger_message": stats["message"],
+            "current_wbgt": f"{stats['current']:.1f}",
+            "max_wbgt": f"{stats['max']:.1f}",
+            "min_wbgt": f"{stats['min']:.1f}",
+            "chart_svg": render_chart_svg(wbgt_data),
+            "update_time": wbgt_data.update_time,
+        },
+    )
+
+
+def _render_page(job):
+    """地点ページ 1 件分の生成（プロセスプールでも実行する）。(station_key, UTF-8 の HTML, 処理時間) を返す
+
+    処理時間はワーカーで計測して返し、呼び出し側で地点ごとの "render" として記録する
+    """
+    station_key, station_name, wbgt_data, stats, assets = job
+    started = time.perf_counter()
+    html_content = generate_html(wbgt_data, station_name, station_key, stats, assets)
+    page = html_content.encode("utf-8") if html_content else None
+    return station_key, page, time.perf_counter() - started
+
+
+def render_pages(jobs, processes=None):
+    """地点ページの HTML をまとめて生成し、{station_key: UTF-8 の HTML} を返す
+
+    jobs は (station_key, 地点名, 予報, 統計量, アセットのパス) のリスト。
+    RENDER_PROCESS_MIN_PAGES 件以上ある場合は、プロセスプールにチャンク単位で割り振って並列に生成する
+    （文字列の組み立ては GIL のためスレッドでは並列化できない）。
+    各ページの生成時間はどちらの場合も地点ごとの "render" として記録し、プロセスプール全体の
+    経過時間は "render_pool" として別に記録する
+    """
+    processes = processes or RENDER_PROCESSES
+    results = None
+    if processes > 1 and len(jobs) >= RENDER_PROCESS_MIN_PAGES:
+        chunksize = max(1, -(-len(jobs) // (processes * 4)))
+        print(f"⚙️ HTML 並列生成: {len(jobs)} ページ / {processes} プロセス")
+        try:
+            with METRICS.stage("render_pool"):
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    results = list(executor.map(_render_page, jobs, chunksize=chunksize))
+        except (OSError, BrokenProcessPool) as e:
+            print(f"  ⚠️ プロセスプールを使えないため逐次生成します: {e}")
+
+    if results is None:
+        results = [_render_page(job) for job in jobs]
+
+    pages = {}
+    for station_key, page, seconds in results:
+        METRICS.record("render", seconds, station_key)
+        pages[station_key] = page
+    return pages
+
+
+def get_jst_now():
+    """現在時刻を JST の ISO 形式文字列で返す"""
+    return datetime.now(JST).isoformat()
+
+
+def _file_sha256(path):
+    """ファイル内容の SHA-256"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# 生成コード（テンプレート）・地点レジストリが変わった場合は全地点を再生成する
+_GENERATOR_HASH = _file_sha256(__file__)
+_REGISTRY_HASH = hashlib.sha256(
+    json.dumps(STATIONS, ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()
+
+
+def compute_fingerprint(station_key, wbgt_data):
+    """予報内容（地点・更新時刻・データ点）と生成条件のフィンガープリント"""
+    payload = json.dumps(
+        {
+            "generator": _GENERATOR_HASH,
+            "json_format": JSON_FORMAT,
+            "stations": _REGISTRY_HASH,
+            "station_key": station_key,
+            "station_id": wbgt_data.station_id,
+            "update_time": wbgt_data.update_time,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    # データ点は配列のバイト列をそのままハッシュする
+    digest.update(wbgt_data.times.tobytes())
+    digest.update(wbgt_data.values.tobytes())
+    return digest.hexdigest()
+
+
+def load_build_manifest(path=BUILD_MANIFEST_FILE):
+    """前回ビルドのフィンガープリント（station_key -> hash）を読み込む"""
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("stations", {})
+    except Exception as e:
+        print(f"  ⚠️ ビルドマニフェスト読み込みエラー（全地点を再生成）: {e}")
+        return {}
+
+
+def save_build_manifest(build_manifest, path=BUILD_MANIFEST_FILE):
+    """今回ビルドのフィンガープリントを保存（内容が同じなら書き込まない）"""
+    content = json.dumps(
+        {"stations": build_manifest}, ensure_ascii=False, indent=2, sort_keys=True
+    )
+    write_if_changed(path, content)
+
+
+def write_if_changed(path, content):
+    """内容が変わった場合のみファイルへ書き込み、書き込んだかどうかを返す
+
+    常駐モードでは前回までに反映した内容をメモリ上に保持し（_PUBLISHED_CONTENT）、ファイルを読まずに比較する
+    """
+    data = content.encode("utf-8")
+    current = published_content(path)
+    remember_content(path, data)
+    if current is not None and current == data:
+        return False
+
+    write_text(path, content)
+    return True
+
+
+def _fsync_file(f):
+    """書き込んだ内容をディスクへ確実に反映"""
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _fsync_directory(directory):
+    """ディレクトリのエントリ（rename の結果）をディスクへ反映（対応しない環境では何もしない）"""
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_file(path, data):
+    """一時ファイルに書き込んでから置き換える（公開中のファイルが書きかけの状態にならない）"""
+    tmp_path = f"{path}.{threading.get_ident()}{STAGING_SUFFIX}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        _fsync_file(f)
+    os.replace(tmp_path, path)
+
+
+def _same_file_content(path_a, path_b, chunk_size=CSV_CHUNK_SIZE):
+    """2 つのファイルの内容が同じか（少しずつ読み比べる。どちらかがなければ False）"""
+    if not (os.path.exists(path_a) and os.path.exists(path_b)):
+        return False
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, "rb") as a, open(path_b, "rb") as b:
+        while True:
+            chunk = a.read(chunk_size)
+            if chunk != b.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+class OutputWriter:
+    """ビルド 1 回分の出力をまとめて反映する書き込み器
+
+    write() した内容は同じディレクトリの一時ファイルへスレッドプールで並列に書き込み（fsync まで）、
+    commit() で全ファイルを rename して一括で反映する。反映前に置き換え一覧をジャーナルへ記録するため、
+    反映中に中断しても次回の開始時に反映を完了できる。abort() / 中断時は一時ファイルを破棄し、
+    公開中のファイルは前回のビルドのまま残る
+    """
+
+    def __init__(self, max_workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or OUTPUT_WORKERS)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.staged = {}  # path -> (一時ファイル, 内容, Future)
+        self.removals = set()
+        self.contents = {}  # path -> write_if_changed で書き込んだ内容（常駐モードで反映後に保持する）
+
+    def _tmp_path(self, path):
+        """path と同じディレクトリの一時ファイル名（呼び出し側でロックを取得しておく）"""
+        self._sequence += 1
+        directory, name = os.path.split(path)
+        return os.path.join(
+            directory, f".{name}.{os.getpid()}-{self._sequence}{STAGING_SUFFIX}"
+        )
+
+    def _replace_staged(self, path, staged):
+        """path の反映予定の内容を差し替え、以前の一時ファイルを破棄"""
+        with self._lock:
+            previous = self.staged.get(path)
+            self.staged[path] = staged
+            self.removals.discard(path)
+        if previous:
+            previous[2].result()
+            os.remove(previous[0])
+
+    def write(self, path, data, station_key=None):
+        """path の新しい内容を一時ファイルへ書き込む（反映は commit 時）"""
+        with self._lock:
+            tmp_path = self._tmp_path(path)
+        future = self.executor.submit(self._stage, tmp_path, data, station_key)
+        self._replace_staged(path, (tmp_path, data, future))
+
+    @contextlib.contextmanager
+    def open(self, path):
+        """path の新しい内容を一時ファイルへ逐次書き込むためのファイルを返す（反映は commit 時）
+
+        内容をメモリに保持しないため、大きなファイルを少しずつ書き出す用途に使う。
+        書き終えた内容が公開中のファイルと同じ場合は反映しない。戻り値の辞書の "changed" に結果を入れる
+        """
+        with self._lock:
+            tmp_path = self._tmp_path(path)
+        os.makedirs(os.path.dirname(tmp_path) or ".", exist_ok=True)
+        result = {"changed": True}
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f, result
+                _fsync_file(f)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            staged = path in self.staged
+        if not staged and _same_file_content(tmp_path, path):
+            os.remove(tmp_path)
+            result["changed"] = False
+            return
+        done = Future()
+        done.set_result(None)
+        self._replace_staged(path, (tmp_path, None, done))
+
+    @staticmethod
+    def _stage(tmp_path, data, station_key=None):
+        # 書き込み時間はスレッドプール上の実際の書き込み（fsync まで）を計測する
+        with METRICS.stage("write", station_key):
+            os.makedirs(os.path.dirname(tmp_path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                _fsync_file(f)
+
+    def read(self, path):
+        """このビルドで書き込んだ内容（未反映）。書き込んでいなければ None"""
+        with self._lock:
+            staged = self.staged.get(path)
+        if not staged:
+            return None
+        if staged[1] is None:  # open() で逐次書き込んだ内容は一時ファイルから読む
+            with open(staged[0], "rb") as f:
+                return f.read()
+        return staged[1]
+
+    def remember(self, path, data):
+        """write_if_changed で書き込んだ内容を、反映時に常駐モードの保持内容へ加える"""
+        with self._lock:
+            self.contents[path] = data
+
+    def written(self, path):
+        """このビルドで path を書き込んだか"""
+        with self._lock:
+            return path in self.staged
+
+    def exists(self, path):
+        """このビルドの反映後に path が存在するか"""
+        with self._lock:
+            if path in self.staged:
+                return True
+            if path in self.removals:
+                return False
+        return os.path.exists(path)
+
+    def listdir(self, directory):
+        """このビルドの反映後のディレクトリ内のファイル名"""
+        names = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+        with self._lock:
+            for path in self.staged:
+                if os.path.dirname(path) == directory:
+                    names.add(os.path.basename(path))
+            names -= {
+                os.path.basename(path)
+                for path in self.removals
+                if os.path.dirname(path) == directory
+            }
+        return sorted(name for name in names if not name.endswith(STAGING_SUFFIX))
+
+    def remove(self, path):
+        """path を commit 時に削除する"""
+        with self._lock:
+            self.removals.add(path)
+
+    def commit(self):
+        """全ての一時ファイルの書き込み完了を待ち、ジャーナルを記録してから一括で反映"""
+        try:
+            for _, _, future in self.staged.values():
+                future.result()
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self.executor.shutdown()
+
+        journal = {
+            "replace": sorted(
+                ([tmp_path, path] for path, (tmp_path, _, _) in self.staged.items()),
+                key=lambda item: _publish_order(item[1]),
+            ),
+            "remove": sorted(self.removals),
+        }
+        with METRICS.stage("commit"):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            replace_file(OUTPUT_JOURNAL_FILE, json.dumps(journal).encode("utf-8"))
+            apply_output_journal(journal)
+            os.remove(OUTPUT_JOURNAL_FILE)
+
+        if _PUBLISHED_CONTENT is not None:
+            for path in self.removals:
+                _PUBLISHED_CONTENT.pop(path, None)
+            _PUBLISHED_CONTENT.update(self.contents)
+
+        count = len(self.staged)
+        self.staged = {}
+        self.removals = set()
+        self.contents = {}
+        return count
+
+    def abort(self):
+        """未反映の一時ファイルを破棄"""
+        self.executor.shutdown(wait=True)
+        for tmp_path, _, _ in self.staged.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.staged = {}
+        self.removals = set()
+        self.contents = {}
+
+
+def _publish_order(path):
+    """置き換えの順序（参照される側を先に反映する）
+
+    反映は 1 ファイルずつの rename のため、反映中の閲覧者は新旧のファイルが混在した状態を見うる。
+    アセット・分割データ（サブディレクトリ）→ 直下の JSON → 地点ページ → index.html の順に置き換え、
+    新しいページが未反映のファイルを参照することはないようにする（古いファイルの削除は最後）
+    """
+    if os.path.dirname(path):
+        rank = 0
+    elif ".html" not in path:
+        rank = 1
+    elif not path.startswith("index.html"):
+        rank = 2
+    else:
+        rank = 3
+    return rank, path
+
+
+def apply_output_journal(journal):
+    """ジャーナルの置き換え・削除を反映（途中まで反映済みでも再実行できる）"""
+    directories = set()
+    for tmp_path, path in journal["replace"]:
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+        directories.add(os.path.dirname(path))
+    for path in journal["remove"]:
+        if os.path.exists(path):
+            os.remove(path)
+        directories.add(os.path.dirname(path))
+    for directory in directories:
+        _fsync_directory(directory)
+
+
+def recover_output():
+    """前回のビルドが反映中に中断していれば反映を完了し、残った一時ファイルを削除"""
+    if os.path.exists(OUTPUT_JOURNAL_FILE):
+        print("  ♻️ 前回のビルドの反映を完了します")
+        with open(OUTPUT_JOURNAL_FILE, "r", encoding="utf-8") as f:
+            apply_output_journal(json.load(f))
+        os.remove(OUTPUT_JOURNAL_FILE)
+
+    for directory in (".", ASSET_DIR, INDEX_SHARD_DIR, DELTA_DIR, CACHE_DIR):
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(STAGING_SUFFIX):
+                    os.remove(os.path.join(directory, name))
+
+
+_OUTPUT_WRITER = None
+# 常駐モードで保持する、write_if_changed で反映した内容（path -> バイト列）。None なら保持しない
+_PUBLISHED_CONTENT = None
+
+
+def reset_build_caches():
+    """ビルドの出力に依存するキャッシュを破棄（破棄されたビルドで出力したアセットを参照しないように）"""
+    global _STATIC_ASSETS
+    with _STATIC_ASSETS_LOCK:
+        _STATIC_ASSETS = None
+
+
+def begin_output():
+    """ビルドの出力をまとめて反映するための書き込み器を開始"""
+    global _OUTPUT_WRITER
+    recover_output()
+    reset_build_caches()
+    _OUTPUT_WRITER = OutputWriter()
+    return _OUTPUT_WRITER
+
+
+def commit_output():
+    """開始中のビルドの出力を一括で反映"""
+    global _OUTPUT_WRITER
+    writer, _OUTPUT_WRITER = _OUTPUT_WRITER, None
+    if writer:
+        count = writer.commit()
+        print(f"📤 出力を反映しました: {count} ファイル")
+
+
+def abort_output():
+    """開始中のビルドの出力を破棄（公開中のファイルは変更しない）"""
+    global _OUTPUT_WRITER
+    writer, _OUTPUT_WRITER = _OUTPUT_WRITER, None
+    if writer:
+        writer.abort()
+        print("🗑️ 未反映の出力を破棄しました")
+    reset_build_caches()
+
+
+def write_output(path, data, station_key=None):
+    """公開ファイルを書き込む（ビルド中は一括反映の対象、それ以外は即時に置き換え）"""
+    if _OUTPUT_WRITER:
+        _OUTPUT_WRITER.write(path, data, station_key)
+    else:
+        with METRICS.stage("write", station_key):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            replace_file(path, data)
+
+
+@contextlib.contextmanager
+def open_output(path):
+    """公開ファイルを逐次書き込むためのファイルと結果の辞書（"changed"）を返す
+
+    ビルド中は一括反映の対象（内容が同じなら反映しない）、それ以外は書き終えてから置き換える
+    """
+    if _OUTPUT_WRITER:
+        with _OUTPUT_WRITER.open(path) as opened:
+            yield opened
+        return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}{STAGING_SUFFIX}"
+    result = {"changed": True}
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f, result
+            _fsync_file(f)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if _same_file_content(tmp_path, path):
+        os.remove(tmp_path)
+        result["changed"] = False
+    else:
+        os.replace(tmp_path, path)
+
+
+def read_output(path):
+    """公開ファイルの内容（ビルド中に書き込んだ未反映の内容を優先）。存在しなければ None"""
+    if _OUTPUT_WRITER:
+        data = _OUTPUT_WRITER.read(path)
+        if data is not None:
+            return data
+        if not _OUTPUT_WRITER.exists(path):
+            return None
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def output_written(path):
+    """ビルド中に path を書き込んだか（ビルド中でなければ False）"""
+    return bool(_OUTPUT_WRITER) and _OUTPUT_WRITER.written(path)
+
+
+def published_content(path):
+    """公開ファイルの内容（read_output と同じ）。常駐モードで保持していればファイルを読まない"""
+    if (
+        _PUBLISHED_CONTENT is not None
+        and path in _PUBLISHED_CONTENT
+        and not output_written(path)
+        and output_exists(path)
+    ):
+        return _PUBLISHED_CONTENT[path]
+    return read_output(path)
+
+
+def remember_content(path, data):
+    """write_if_changed で書き込んだ（変更がなかった）内容を常駐モードで保持（ビルド中は反映時に保持）"""
+    if _PUBLISHED_CONTENT is None:
+        return
+    if _OUTPUT_WRITER:
+        _OUTPUT_WRITER.remember(path, data)
+    else:
+        _PUBLISHED_CONTENT[path] = data
+
+
+def output_exists(path):
+    """公開ファイルが（ビルド反映後に）存在するか"""
+    return _OUTPUT_WRITER.exists(path) if _OUTPUT_WRITER else os.path.exists(path)
+
+
+def list_output_dir(directory):
+    """公開ディレクトリのファイル名一覧（ビルド反映後の状態）"""
+    if _OUTPUT_WRITER:
+        return _OUTPUT_WRITER.listdir(directory)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(n for n in os.listdir(directory) if not n.endswith(STAGING_SUFFIX))
+
+
+def compressed_source(name):
+    """事前圧縮ファイル（.gz / .br）なら元のファイル名、それ以外はそのままの名前"""
+    base, ext = os.path.splitext(name)
+    return base if ext in (".gz", ".br") else name
+
+
+def remove_output(path):
+    """公開ファイルを削除（ビルド中は反映時に削除）"""
+    if _OUTPUT_WRITER:
+        _OUTPUT_WRITER.remove(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def write_bytes(path, data, station_key=None):
+    """ファイルを置き換えで書き込み、書き込み時間とバイト数を計測"""
+    write_output(path, data, station_key)
+    METRICS.count("bytes_written", len(data))
+
+
+def write_text(path, content, station_key=None):
+    """テキストファイルを UTF-8 で置き換え書き込み"""
+    write_bytes(path, content.encode("utf-8"), station_key)
+
+
+def create_build_info(rendered_stations):
+    """実行ごとに変わる生成時刻を小さな別ファイルに出力"""
+    build_info = {
+        "generated_at": get_jst_now(),
+        "rendered_stations": rendered_stations,
+    }
+    write_text(BUILD_INFO_FILE, json.dumps(build_info, ensure_ascii=False, indent=2))
+    return build_info
+
+
+def fetch_station(
+    station_key, station_config, session=None, http_cache=None, bulk_forecasts=None
+):
+    """地点の予報データを取得（失敗時は None）
+
+    一括取得済みの予報（bulk_forecasts）に地点が含まれていれば、それを使う
+    """
+    station_name = station_config["name"]
+    print(f"🏢 {station_name} ({station_config['station_id']}) の処理を開始")
+
+    if bulk_forecasts and station_config["station_id"] in bulk_forecasts:
+        print("  📦 一括取得データを使用")
+        return bulk_forecasts[station_config["station_id"]]
+
+    wbgt_data = download_wbgt_data(station_config["station_id"], session, http_cache)
+    if not wbgt_data:
+        print(f"  ❌ {station_name}: データ取得に失敗")
+    return wbgt_data
+
+
+def load_station_forecast(station_config):
+    """前回出力した地点別 JSON を読み込む（取得に失敗した地点の概要表示用）"""
+    json_filename = station_config["json_filename"]
+    if not os.path.exists(json_filename):
+        return None, "Data file not found"
+
+    try:
+        with open(json_filename, "r", encoding="utf-8") as f:
+            station_data = decode_forecast(json.load(f))
+    except Exception as e:
+        print(f"    ⚠️ {json_filename} データ読み込みエラー: {e}")
+        return None, str(e)
+
+    if not station_data.values.size:
+        return None, "No data available"
+    return station_data, None
+
+
+def station_is_current(station_key, station_config, fingerprint, build_manifest):
+    """差分ビルドで地点の HTML / JSON を再生成せずに済むか（前回と同じ予報内容で出力済み）"""
+    return (
+        INCREMENTAL_BUILD
+        and build_manifest is not None
+        and build_manifest.get(station_key) == fingerprint
+        and output_exists(station_config["filename"])
+        and output_exists(station_config["json_filename"])
+    )
+
+
+def render_station(
+    station_key, station_config, wbgt_data, analytics, build_manifest=None, page=None
+):
+    """取得済みの予報から地点の HTML / JSON を出力し、(成否, 通知メッセージ, 予報データ) を返す
+
+    build_manifest を渡すと差分ビルドを行い、前回と同じ予報内容なら HTML / JSON を再生成しない。
+    page に render_pages で生成済みの HTML（バイト列）を渡した場合はそれを書き込む
+    """
+    station_name = station_config["name"]
+    filename = station_config["filename"]
+    json_filename = station_config["json_filename"]
+    stats = get_station_stats(analytics, station_key)
+
+    if stats is None:
+        print(f"  ❌ {station_name}: データ点がないため HTML 生成をスキップ")
+        return False, "", None
+
+    fingerprint = compute_fingerprint(station_key, wbgt_data)
+    if station_is_current(station_key, station_config, fingerprint, build_manifest):
+        print(f"  ⏭️ {station_name}: 予報内容に変更なし（HTML / JSON の再生成をスキップ）")
+    else:
+        print(f"  📊 HTML ファイル生成中: {filename}")
+        if page is None:
+            with METRICS.stage("render", station_key):
+                html_content = generate_html(wbgt_data, station_name, station_key, stats)
+            page = html_content.encode("utf-8") if html_content else None
+
+        if not page:
+            print(f"  ❌ {station_name}: HTML生成に失敗")
+            return False, "", None
+
+        # HTMLファイルを保存
+        write_bytes(filename, page, station_key)
+
+        # JSONデータも保存（デバッグ用）
+        with METRICS.stage("serialize", station_key):
+            json_content = dump_forecast_json(wbgt_data)
+        write_text(json_filename, json_content, station_key)
+
+        if build_manifest is not None:
+            build_manifest[station_key] = fingerprint
+        print(f"  ✅ {station_name}: ファイル生成完了")
+
+    print(f"    - 現在WBGT: {stats['current']:.1f}°C")
+    print(f"    - データ更新: {wbgt_data.update_time}")
+    print(f"    - データ件数: {stats['data_points']} 件")
+
+    alert_message = generate_alert_message(
+        station_name, analytics.get("alerts", {}).get(station_key)
+    )
+
+    return True, alert_message, wbgt_data
+
+
+def process_station(
+    station_key, station_config, session=None, http_cache=None, build_manifest=None
+):
+    """個別の観測地点を処理（取得・統計計算・出力）"""
+    wbgt_data = fetch_station(station_key, station_config, session, http_cache)
+    if wbgt_data is None or not wbgt_data.values.size:
+        return False, "", None
+
+    analytics = compute_analytics({station_key: wbgt_data})
+    analytics["alerts"] = detect_alert_events(analytics)
+    return render_station(
+        station_key, station_config, wbgt_data, analytics, build_manifest
+    )
+
+
+def collect_forecasts(
+    session, http_cache=None, max_workers=MAX_WORKERS, previous_forecasts=None
+):
+    """全地点の予報を取得して一括で統計計算し、(STATIONS 順の取得結果, 統計量) を返す
+
+    取得結果は失敗した地点が None。統計量には取得に失敗した地点の前回データも含める。
+    previous_forecasts（station_key -> 前回の予報）にある地点は、前回データを JSON から読み込まない
+    """
+    items = list(STATIONS.items())
+
+    def run(func, iterable):
+        if max_workers <= 1:
+            return [func(item) for item in iterable]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, iterable))
+
+    # 一括取得モードでは全地点・都道府県別の CSV をまとめて取得し、各地点に振り分ける
+    bulk_forecasts = {}
+    if FETCH_MODE != "station":
+        sources = list(bulk_sources().items())
+        print(f"📦 一括取得モード ({FETCH_MODE}): {len(sources)} ファイル")
+        for forecasts in run(
+            lambda source: download_bulk_forecasts(*source, session, http_cache),
+            sources,
+        ):
+            bulk_forecasts.update(forecasts)
+
+    # 共有セッションの接続プールを使って並列に取得（一括取得に含まれない地点のみ通信する）
+    if max_workers > 1:
+        print(f"⚡ 並列処理: {min(max_workers, len(items))} ワーカー")
+    fetched = run(
+        lambda item: fetch_station(*item, session, http_cache, bulk_forecasts),
+        items,
+    )
+
+    forecasts = {}
+    load_errors = {}
+    for (station_key, station_config), wbgt_data in zip(items, fetched):
+        if wbgt_data is None:
+            if previous_forecasts and station_key in previous_forecasts:
+                wbgt_data = previous_forecasts[station_key]
+            else:
+                wbgt_data, load_errors[station_key] = load_station_forecast(station_config)
+        forecasts[station_key] = wbgt_data
+
+    with METRICS.stage("analytics"):
+        analytics = compute_analytics(forecasts)
+        analytics["errors"] = load_errors
+        analytics["alerts"] = detect_alert_events(analytics)
+
+    return fetched, analytics
+
+
+def process_all_stations(
+    session,
+    http_cache=None,
+    build_manifest=None,
+    max_workers=MAX_WORKERS,
+    previous_forecasts=None,
+):
+    """全地点を取得 → 一括で統計計算 → 出力 の順に処理する
+
+    STATIONS の順の (成否, 通知メッセージ, 予報データ) のリストと、統計量を返す。
+    統計量には取得に失敗した地点の前回データも含める（概要・インデックス表示用）。
+    previous_forecasts は常駐モードで保持している前回出力した予報（station_key -> 予報）で、
+    含まれる地点は前回の JSON を読み込まずに差分フィードの比較・取得失敗時の表示に使う
+    """
+    items = list(STATIONS.items())
+    # 差分ビルドで全地点をスキップした場合も共通アセットは必ず出力しておく
+    assets = get_static_assets()
+
+    fetched, analytics = collect_forecasts(
+        session, http_cache, max_workers, previous_forecasts
+    )
+
+    # 再生成が必要な地点の HTML を先にまとめて生成（地点数が多い場合はプロセスプールで並列に）。
+    # 再生成する地点は、出力前に前回のビルドの JSON と比較して差分フィード用の変更を求めておく
+    jobs = []
+    changes = {}
+    for (station_key, station_config), wbgt_data in zip(items, fetched):
+        stats = get_station_stats(analytics, station_key)
+        if wbgt_data is None or stats is None:
+            continue
+        fingerprint = compute_fingerprint(station_key, wbgt_data)
+        if station_is_current(station_key, station_config, fingerprint, build_manifest):
+            continue
+        jobs.append((station_key, station_config["name"], wbgt_data, stats, assets))
+        if DELTA_FEED_ENABLED:
+            if previous_forecasts and station_key in previous_forecasts:
+                previous = previous_forecasts[station_key]
+            else:
+                previous, _ = load_station_forecast(station_config)
+            change = diff_forecast(previous, wbgt_data)
+            if change:
+                changes[station_key] = change
+    analytics["changes"] = changes
+    pages = render_pages(jobs)
+
+    # 書き込み（JSON の生成を含む）はスレッドで並列に行う
+    def render(index):
+        station_key, station_config = items[index]
+        if fetched[index] is None:
+            return False, "", None
+        return render_station(
+            station_key,
+            station_config,
+            fetched[index],
+            analytics,
+            build_manifest,
+            pages.get(station_key),
+        )
+
+    print(f"\n{'='*30}")
+    if max_workers <= 1:
+        results = [render(index) for index in range(len(items))]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(render, range(len(items))))
+    return results, analytics
+
+
+def create_index_html():
+    """インデックス HTML ファイルを生成"""
+    print("📄 インデックスページを生成中...")
+
+    index_html = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>WBGT 予報ダッシュボード</title>
+    <style>
+        body {
+            font-family: 'Helvetica Neue', Arial, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            color: #333;
+        }
+        .container { max-width: 1400px; margin: 0 auto; }
+        .header { text-align: center; color: white; margin-bottom: 20px; }
+        .header h1 { font-size: 2em; margin-bottom: 8px; }
+        .header p { font-size: 1em; opacity: 0.85; margin: 0; }
+        .legend {
+            display: flex; flex-wrap: wrap; gap: 10px;
+            justify-content: center; margin-bottom: 20px;
+        }
+        .legend-item {
+            display: flex; align-items: center; gap: 6px;
+            background: rgba(255,255,255,0.15); padding: 4px 10px;
+            border-radius: 12px; color: white; font-size: 0.8em;
+        }
+        .legend-dot { width: 10px; height: 10px; border-radius: 50%; }
+        .region-nav {
+            display: flex; flex-wrap: wrap; gap: 8px;
+            justify-content: center; margin-bottom: 24px;
+        }
+        .region-nav a {
+            background: white; color: #5a4fcf; text-decoration: none;
+            padding: 6px 14px; border-radius: 16px; font-size: 0.9em;
+        }
+        .region { margin-bottom: 32px; scroll-margin-top: 20px; }
+        .region-title { color: white; font-size: 1.4em; margin: 0 0 12px; }
+        .region-count { font-size: 0.7em; font-weight: normal; opacity: 0.85; margin-left: 10px; }
+        .grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(380px, 1fr));
+            gap: 20px;
+        }
+        .grid + .grid { margin-top: 20px; }
+        .card {
+            background: white; border-radius: 16px; padding: 20px;
+            box-shadow: 0 8px 24px rgba(0,0,0,0.12);
+            text-decoration: none; color: inherit; display: block;
+            transition: transform 0.2s ease, box-shadow 0.2s ease;
+        }
+        .card:hover { transform: translateY(-4px); box-shadow: 0 12px 32px rgba(0,0,0,0.18); }
+        .card-header { display: flex; align-items: center; justify-content: space-between; margin-bottom: 12px; }
+        .station-name { font-size: 1.4em; font-weight: bold; color: #2c3e50; }
+        .danger-badge {
+            font-size: 0.8em; font-weight: bold; color: white;
+            padding: 5px 12px; border-radius: 20px; white-space: nowrap;
+        }
+        .wbgt-row { display: flex; gap: 16px; margin-bottom: 14px; }
+        .wbgt-item { text-align: center; flex: 1; }
+        .wbgt-value { font-size: 1.6em; font-weight: bold; }
+        .wbgt-label { font-size: 0.75em; color: #888; text-transform: uppercase; }
+        .chart-wrap { height: 120px; position: relative; }
+        .chart-wrap svg { display: block; width: 100%; height: 100%; }
+        .update-time { font-size: 0.75em; color: #aaa; margin-top: 8px; text-align: right; }
+        .loading { text-align: center; color: white; padding: 40px; font-size: 1.1em; }
+        .error-card { background: #fff3f3; border: 1px solid #ffcdd2; }
+        .placeholder { min-height: 280px; box-sizing: border-box; }
+        .placeholder-text { color: #aaa; margin-top: 12px; }
+        @media (max-width: 768px) {
+            .grid { grid-template-columns: 1fr; }
+            .header h1 { font-size: 1.5em; }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>WBGT 予報ダッシュボード</h1>
+            <p id="generated-at">読み込み中...</p>
+        </div>
+        <div class="legend">
+            <div class="legend-item"><div class="legend-dot" style="background:#28A745"></div>ほぼ安全 (21未満)</div>
+            <div class="legend-item"><div class="legend-dot" style="background:#0066CC"></div>注意 (21〜25未満)</div>
+            <div class="legend-item"><div class="legend-dot" style="background:#FF6600"></div>警戒 (25〜28未満)</div>
+            <div class="legend-item"><div class="legend-dot" style="background:#FF0000"></div>厳重警戒 (28〜31未満)</div>
+            <div class="legend-item"><div class="legend-dot" style="background:#800080"></div>運動は原則中止 (31以上)</div>
+        </div>
+        <nav class="region-nav" id="region-nav"></nav>
+        <div id="regions">
+            <div class="loading">データを読み込んでいます...</div>
+        </div>
+    </div>
+    <script>
+        function buildCard(station) {
+            // 現在値・最高・最低・危険レベルと推移グラフ（SVG）は集約データ生成時に作成済み
+            const card = document.createElement('a');
+            card.href = station.url;
+            card.className = 'card';
+            card.innerHTML = `
+                <div class="card-header">
+                    <div class="station-name">${station.name}</div>
+                    <div class="danger-badge" style="background:${station.color}">${station.level}</div>
+                </div>
+                <div class="wbgt-row">
+                    <div class="wbgt-item">
+                        <div class="wbgt-value" style="color:${station.color}">${station.current.toFixed(1)}°C</div>
+                        <div class="wbgt-label">現在</div>
+                    </div>
+                    <div class="wbgt-item">
+                        <div class="wbgt-value" style="color:#dc3545">${station.max.toFixed(1)}°C</div>
+                        <div class="wbgt-label">最高</div>
+                    </div>
+                    <div class="wbgt-item">
+                        <div class="wbgt-value" style="color:#28a745">${station.min.toFixed(1)}°C</div>
+                        <div class="wbgt-label">最低</div>
+                    </div>
+                </div>
+                <div class="chart-wrap">${station.sparkline}</div>
+                <div class="update-time">更新: ${station.update_time}</div>
+            `;
+            return card;
+        }
+        function buildPlaceholder(station) {
+            // カードのデータを読み込むまでは地点名とリンクだけを表示
+            const card = document.createElement('a');
+            card.href = station.url;
+            card.className = 'card placeholder';
+            card.innerHTML = `<div class="station-name">${station.name}</div><div class="placeholder-text">読み込み中...</div>`;
+            return card;
+        }
+        function buildErrorCard(station) {
+            const card = document.createElement('div');
+            card.className = 'card error-card';
+            card.innerHTML = `<div class="station-name">${station.name}</div><p style="color:#e53935">データ取得失敗</p>`;
+            return card;
+        }
+        async function loadPage(grid) {
+            // 1 ページ分（地方内の INDEX_PAGE_SIZE 地点）のカードのデータを取得して差し替える
+            const placeholders = Array.from(grid.children);
+            let page;
+            try {
+                page = await fetch(grid.dataset.file).then(r => r.json());
+            } catch (e) {
+                placeholders.forEach(card => card.replaceWith(buildErrorCard({ name: card.firstChild.textContent })));
+                return;
+            }
+            page.stations.forEach((station, i) => {
+                placeholders[i].replaceWith(station.error ? buildErrorCard(station) : buildCard(station));
+            });
+        }
+        async function loadAll() {
+            const container = document.getElementById('regions');
+            let index;
+            try {
+                index = await fetch('__INDEX_BUNDLE_FILE__').then(r => r.json());
+            } catch (e) {
+                container.innerHTML = '<div class="loading">データ取得失敗</div>';
+                return;
+            }
+            container.innerHTML = '';
+            // 画面に近づいたページだけを読み込む（IntersectionObserver がなければ全ページを読み込む）
+            const observer = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (!entry.isIntersecting) return;
+                    observer.unobserve(entry.target);
+                    loadPage(entry.target);
+                });
+            }, { rootMargin: '400px 0px' }) : null;
+            const nav = document.getElementById('region-nav');
+            index.regions.forEach(region => {
+                const link = document.createElement('a');
+                link.href = '#region-' + region.region;
+                link.textContent = `${region.name} (${region.stations.length})`;
+                nav.appendChild(link);
+
+                const section = document.createElement('section');
+                section.id = 'region-' + region.region;
+                section.className = 'region';
+                section.innerHTML = `<h2 class="region-title">${region.name}<span class="region-count">${region.stations.length} 地点</span></h2>`;
+                region.pages.forEach((file, page) => {
+                    const grid = document.createElement('div');
+                    grid.className = 'grid';
+                    grid.dataset.file = file;
+                    region.stations
+                        .slice(page * index.page_size, (page + 1) * index.page_size)
+                        .forEach(station => grid.appendChild(buildPlaceholder(station)));
+                    section.appendChild(grid);
+                    if (observer) observer.observe(grid); else loadPage(grid);
+                });
+                container.appendChild(section);
+            });
+            // 地点ページの「地点一覧」から地方を指定して開いた場合は、その地方まで移動
+            const target = location.hash && document.getElementById(location.hash.slice(1));
+            if (target) target.scrollIntoView();
+            try {
+                const info = await fetch('__BUILD_INFO_FILE__').then(r => r.json());
+                const d = new Date(info.generated_at);
+                document.getElementById('generated-at').textContent =
+                    '最終更新: ' + d.getFullYear() + '年' + (d.getMonth()+1) + '月' + d.getDate() + '日 ' +
+                    String(d.getHours()).padStart(2,'0') + ':' + String(d.getMinutes()).padStart(2,'0');
+            } catch (e) {
+                document.getElementById('generated-at').textContent = '';
+            }
+        }
+        loadAll();
+    </script>
+</body>
+</html>"""
+
+    index_html = index_html.replace("__INDEX_BUNDLE_FILE__", INDEX_BUNDLE_FILE).replace(
+        "__BUILD_INFO_FILE__", BUILD_INFO_FILE
+    )
+
+    if write_if_changed("index.html", minify_content("index.html", index_html)):
+        print("  ✅ インデックスページ生成完了: index.html")
+    else:
+        print("  ⏭️ インデックスページに変更なし: index.html")
+
+
+def build_index_entry(station_key, station_config, station_data, stats):
+    """インデックスのカード 1 枚分（現在値・最高・最低・危険レベル・推移グラフ）のデータ"""
+    return {
+        "key": station_key,
+        "name": station_config["name"],
+        "url": station_config["filename"],
+        "update_time": station_data.update_time,
+        "current": stats["current"],
+        "max": stats["max"],
+        "min": stats["min"],
+        "level": stats["level"],
+        "color": stats["color"],
+        "sparkline": render_sparkline_svg(station_data, stats["color"]),
+    }
+
+
+def create_index_bundle(analytics, entry_cache=None):
+    """インデックス・観測地点切替が共有する地点一覧と、カードのデータ（地方別・ページ単位）を生成
+
+    地点一覧（INDEX_BUNDLE_FILE）は地方ごとの地点名とリンク、カードのデータのファイル名だけを持ち、
+    地点数が増えても各地点ページに一覧を埋め込まずに済むようにする。
+    カードのデータ（推移グラフの SVG を含む）は地方ごとに INDEX_PAGE_SIZE 地点ずつのファイルに分け、
+    インデックスはスクロールで表示されたページの分だけを読み込む。
+    entry_cache（station_key -> (フィンガープリント, カード)）を渡すと、予報が前回と同じ地点の
+    カード（推移グラフ）を作り直さずに使い回す（常駐モード）
+    """
+    print("📦 インデックス用集約データを生成中...")
+
+    entries_by_region = {}
+    for station_key, station_config in STATIONS.items():
+        stats = get_station_stats(analytics, station_key)
+        if stats is None:
+            entry = {"key": station_key, "name": station_config["name"], "error": True}
+        else:
+            station_data = analytics["forecasts"][station_key]
+            fingerprint = compute_fingerprint(station_key, station_data)
+            cached = entry_cache.get(station_key) if entry_cache is not None else None
+            if cached and cached[0] == fingerprint:
+                entry = cached[1]
+            else:
+                entry = build_index_entry(station_key, station_config, station_data, stats)
+                if entry_cache is not None:
+                    entry_cache[station_key] = (fingerprint, entry)
+        entries_by_region.setdefault(station_config["region"], []).append(
+            (station_key, station_config, entry)
+        )
+
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    region_order = [slug for slug, _, _ in REGIONS] + ["other"]
+    page_size = max(1, INDEX_PAGE_SIZE)
+
+    os.makedirs(INDEX_SHARD_DIR, exist_ok=True)
+    regions = []
+    page_files = set()
+    for slug in region_order:
+        region_entries = entries_by_region.get(slug)
+        if not region_entries:
+            continue
+        pages = []
+        for start in range(0, len(region_entries), page_size):
+            page_file = f"{INDEX_SHARD_DIR}/{slug}-{len(pages) + 1}.json"
+            page_entries = region_entries[start : start + page_size]
+            write_if_changed(
+                page_file,
+                dumps({"region": slug, "stations": [entry for _, _, entry in page_entries]}),
+            )
+            pages.append(page_file)
+            page_files.add(os.path.basename(page_file))
+        regions.append(
+            {
+                "region": slug,
+                "name": REGION_NAMES.get(slug, "その他"),
+                "pages": pages,
+                "stations": [
+                    {
+                        "key": station_key,
+                        "name": station_config["name"],
+                        "url": station_config["filename"],
+                    }
+                    for station_key, station_config, _ in region_entries
+                ],
+            }
+        )
+
+    # 地点の増減でなくなったページの古いファイル（事前圧縮した .gz / .br を含む）を削除
+    for name in list_output_dir(INDEX_SHARD_DIR):
+        source = compressed_source(name)
+        if source.endswith(".json") and source not in page_files:
+            remove_output(f"{INDEX_SHARD_DIR}/{name}")
+
+    write_if_changed(INDEX_BUNDLE_FILE, dumps({"page_size": page_size, "regions": regions}))
+    print(
+        f"  ✅ 集約データ生成完了: {INDEX_BUNDLE_FILE} + {len(page_files)} ページ"
+        f" ({len(regions)} 地方)"
+    )
+
+
+def summary_header():
+    """概要データの地点以外の項目"""
+    # 生成時刻は build_info.json に出力（内容が同じなら差分が出ないように）
+    return {
+        "total_stations": len(STATIONS),
+        "update_schedule": describe_poll_schedule(),
+    }
+
+
+# 常駐モードで実行中か・取得間隔の上限（--daemon N の指定時、適応ポーリング無効時は更新間隔）。
+# いずれも run_daemon が設定する
+_DAEMON_RUNNING = False
+_DAEMON_MAX_INTERVAL = None
+
+
+def describe_poll_schedule():
+    """概要データに載せる更新スケジュールの説明（plan_poll・run_daemon と同じ設定値から作る）
+
+    定期実行では起動間隔（POLL_CHECK_INTERVAL）より短い間隔では取得できないため、
+    発表予定直後の取得間隔は常駐モード以外では起動間隔を下限とする
+    """
+    def span(interval):
+        seconds = int(interval.total_seconds())
+        return f"{seconds // 60} minutes" if seconds % 60 == 0 else f"{seconds} seconds"
+
+    if _DAEMON_RUNNING:
+        if not ADAPTIVE_POLLING:
+            return f"continuously, every {span(_DAEMON_MAX_INTERVAL)}"
+        window = "continuously"
+    else:
+        if not ADAPTIVE_POLLING:
+            return f"{POLL_CHECK_WINDOW}, every {span(POLL_CHECK_INTERVAL)}"
+        window = f"{POLL_CHECK_WINDOW}, checked every {span(POLL_CHECK_INTERVAL)}"
+
+    dense, longest = poll_intervals()
+    if not _DAEMON_RUNNING:
+        dense = max(dense, POLL_CHECK_INTERVAL)
+    return (
+        f"{window}; fetched every {span(dense)} for"
+        f" {span(POLL_DENSE_WINDOW)} after each expected release,"
+        f" otherwise at most every {span(longest)}"
+    )
+
+
+def iter_summary_entries(analytics):
+    """概要データの地点ごとの項目を (station_key, 項目) として STATIONS の順に 1 件ずつ返す"""
+    for station_key, station_config in STATIONS.items():
+        stats = get_station_stats(analytics, station_key)
+        if stats is None:
+            yield station_key, {
+                "name": station_config["name"],
+                "station_id": station_config["station_id"],
+                "error": analytics.get("errors", {}).get(
+                    station_key, "No data available"
+                ),
+            }
+            continue
+
+        station_data = analytics["forecasts"][station_key]
+        yield station_key, {
+            "name": station_config["name"],
+            "station_id": station_data.station_id,
+            "prefecture": station_config["prefecture"],
+            "current_wbgt": stats["current"],
+            "max_wbgt": stats["max"],
+            "min_wbgt": stats["min"],
+            "danger_level": stats["level"],
+            "update_time": station_data.update_time,
+            "data_points": stats["data_points"],
+            "hours_at_or_above": stats["hours_at_or_above"],
+            "first_crossing": stats["first_crossing"],
+            "html_file": station_config["filename"],
+        }
+
+
+def build_summary(analytics):
+    """全地点の概要データ（wbgt_summary.json の内容）を辞書として作成（API サーバー用）"""
+    return dict(stations=dict(iter_summary_entries(analytics)), **summary_header())
+
+
+class SummaryWriter:
+    """概要データを地点 1 件ずつファイルへ書き出す（メモリに持つのは書き出し中の 1 地点分のみ）
+
+    json: wbgt_summary.json と同じ構造（{"stations": {...}, "total_stations": ..., ...}）。
+          indent を指定すると json.dumps(..., indent=indent) と同じ整形で出力する
+    ndjson: 1 行目に全体の情報（"type": "summary"）、以降 1 行に 1 地点（"type": "station"）
+    """
+
+    def __init__(self, f, fmt="json", indent=None):
+        self.f = f
+        self.fmt = fmt
+        self.indent = indent
+        self.count = 0
+        self.header = summary_header()
+        self.separator = ":" if indent is None else ": "
+        if fmt == "ndjson":
+            self._write_line(dict(type="summary", **self.header))
+        else:
+            self._write("{" + self._newline(1) + '"stations"' + self.separator + "{")
+
+    def _dumps(self, obj, level=0):
+        if self.indent is None:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+        text = json.dumps(obj, ensure_ascii=False, indent=self.indent)
+        return text.replace("\n", self._newline(level))
+
+    def _newline(self, level):
+        return "" if self.indent is None else "\n" + " " * (self.indent * level)
+
+    def _write(self, text):
+        self.f.write(text.encode("utf-8"))
+
+    def _write_line(self, obj):
+        self._write(self._dumps(obj) + "\n")
+
+    def add(self, station_key, entry):
+        """地点 1 件分を書き出す"""
+        if self.fmt == "ndjson":
+            self._write_line(dict(type="station", key=station_key, **entry))
+        else:
+            self._write(
+                ("," if self.count else "")
+                + self._newline(2)
+                + self._dumps(station_key)
+                + self.separator
+                + self._dumps(entry, 2)
+            )
+        self.count += 1
+
+    def close(self):
+        """末尾（地点以外の項目）を書き出す"""
+        if self.fmt == "ndjson":
+            return
+        tail = [self._newline(1) + "}" if self.count else "}"]
+        for key, value in self.header.items():
+            tail.append(
+                "," + self._newline(1) + self._dumps(key) + self.separator + self._dumps(value, 1)
+            )
+        self._write("".join(tail) + self._newline(0) + "}")
+
+
+def create_summary_json(analytics):
+    """全地点の概要データを含む JSON ファイル（と NDJSON 版）を生成し、出力した地点数を返す
+
+    地点ごとの項目は 1 件ずつ作成してそのまま書き出す（全地点分をメモリ上に組み立てない）
+    """
+    print("📊 概要データファイルを生成中...")
+
+    # 最適化が有効な場合は minify 済みと同じ形式で直接書き出す
+    indent = None if OPTIMIZE_OUTPUT else 2
+    with contextlib.ExitStack() as stack:
+        f, result = stack.enter_context(open_output(SUMMARY_FILE))
+        writers = [SummaryWriter(f, "json", indent)]
+        if SUMMARY_NDJSON:
+            ndjson_f, _ = stack.enter_context(open_output(SUMMARY_NDJSON_FILE))
+            writers.append(SummaryWriter(ndjson_f, "ndjson"))
+
+        for station_key, entry in iter_summary_entries(analytics):
+            for writer in writers:
+                writer.add(station_key, entry)
+        for writer in writers:
+            writer.close()
+
+    if result["changed"]:
+        print(f"  ✅ 概要データファイル生成完了: {SUMMARY_FILE} ({writers[0].count} 地点)")
+    else:
+        print(f"  ⏭️ 概要データに変更なし: {SUMMARY_FILE}")
+    return writers[0].count
+
+
+def _level_names(wbgt):
+    """WBGT の配列に対応する危険レベル名のリスト（NaN は None）"""
+    levels = np.searchsorted(DANGER_THRESHOLDS, np.nan_to_num(wbgt), side="right")
+    return [
+        None if np.isnan(value) else DANGER_LEVELS_ASC[level][1]
+        for value, level in zip(wbgt.tolist(), levels.tolist())
+    ]
+
+
+def _optional_value(value):
+    """NaN を None（JSON の null）にする"""
+    return None if np.isnan(value) else value
+
+
+def diff_forecast(previous, current):
+    """前回と今回の予報を予報時刻ごとに比較し、差分フィードの地点 1 件分を返す（変更なしは None）
+
+    previous が None（前回の出力がない地点）の場合は全ての時刻を追加として扱う。
+    一方にしかない時刻は、ない側の値を None とする。危険レベルが変わった時刻には levels
+    （前回, 今回）を付け、現在の危険レベルが変わった場合は level に前後のレベル名を入れる
+    """
+    if previous is None:
+        previous = Forecast(current.station_id, None, [], [])
+
+    times = np.union1d(previous.times, current.times)
+    old = np.full(len(times), np.nan)
+    new = np.full(len(times), np.nan)
+    old[np.searchsorted(times, previous.times)] = previous.wbgt
+    new[np.searchsorted(times, current.times)] = current.wbgt
+
+    changed = np.flatnonzero(~((old == new) | (np.isnan(old) & np.isnan(new))))
+    if not changed.size:
+        return None
+
+    old_levels = _level_names(old[changed])
+    new_levels = _level_names(new[changed])
+    slots = []
+    for t, old_value, new_value, old_level, new_level in zip(
+        np.datetime_as_string(times[changed], unit="s").tolist(),
+        old[changed].tolist(),
+        new[changed].tolist(),
+        old_levels,
+        new_levels,
+    ):
+        slot = {"time": t, "old": _optional_value(old_value), "new": _optional_value(new_value)}
+        if old_level != new_level:
+            slot["levels"] = [old_level, new_level]
+        slots.append(slot)
+
+    change = {
+        "station_id": current.station_id,
+        "update_time": current.update_time,
+        "previous_update_time": previous.update_time,
+        "slots": slots,
+    }
+    current_levels = [
+        _level_names(forecast.wbgt[:1])[0] if forecast.values.size else None
+        for forecast in (previous, current)
+    ]
+    if current_levels[0] != current_levels[1]:
+        change["level"] = current_levels
+    return change
+
+
+def create_delta_feed(changes):
+    """地点ごとの変更（diff_forecast の結果）を通番付きの差分ファイルに出力し、最新の通番を返す
+
+    変更がなければ何も出力しない。一覧（wbgt_deltas.json）には直近 DELTA_HISTORY 件を載せ、
+    クライアントは手元の通番より新しい差分だけを取得して適用する。通番は公開中の一覧から引き継ぐ
+    """
+    print("🔁 差分フィードを生成中...")
+    data = published_content(DELTA_INDEX_FILE)
+    feed = json.loads(data) if data else {"latest_sequence": 0, "deltas": []}
+    if not changes:
+        print("  ⏭️ 前回のビルドから予報値の変更なし")
+        return feed["latest_sequence"]
+
+    sequence = feed["latest_sequence"] + 1
+    generated_at = get_jst_now()
+    delta_file = f"{DELTA_DIR}/{sequence:08d}.json"
+    delta = {
+        "sequence": sequence,
+        "previous_sequence": feed["latest_sequence"],
+        "generated_at": generated_at,
+        "stations": changes,
+    }
+    write_text(delta_file, json.dumps(delta, ensure_ascii=False, separators=(",", ":")))
+
+    deltas = feed["deltas"] + [
+        {
+            "sequence": sequence,
+            "generated_at": generated_at,
+            "file": delta_file,
+            "stations": len(changes),
+            "slots": sum(len(change["slots"]) for change in changes.values()),
+        }
+    ]
+    deltas = deltas[-DELTA_HISTORY:]
+
+    # 一覧から外れた古い差分ファイル（圧縮ファイルを含む）を削除
+    kept = {os.path.basename(entry["file"]) for entry in deltas}
+    for name in list_output_dir(DELTA_DIR):
+        if name.split(".json")[0] + ".json" not in kept:
+            remove_output(f"{DELTA_DIR}/{name}")
+
+    write_if_changed(
+        DELTA_INDEX_FILE,
+        json.dumps(
+            {
+                "latest_sequence": sequence,
+                "oldest_sequence": deltas[0]["sequence"],
+                "deltas": deltas,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ),
+    )
+    print(
+        f"  ✅ 差分フィード生成完了: 通番 {sequence}"
+        f"（{len(changes)} 地点・{deltas[-1]['slots']} 時刻）"
+    )
+    return sequence
+
+
+def _archive_key(value):
+    """日時を YYYYMMDDHHMM 形式の整数キーに変換（"2026/08/22 21:25"・ISO 文字列・datetime に対応）"""
+    if isinstance(value, datetime):
+        return int(value.strftime("%Y%m%d%H%M"))
+    digits = re.sub(r"\D", "", str(value))
+    return int((digits + "0000")[:12])
+
+
+def _archive_time(key):
+    """YYYYMMDDHHMM 形式の整数キーを ISO 形式の文字列に戻す"""
+    text = f"{key:012d}"
+    return f"{text[:4]}-{text[4:6]}-{text[6:8]}T{text[8:10]}:{text[10:12]}:00"
+
+
+def open_archive(path=None):
+    """予報履歴アーカイブを開く（なければスキーマを作成）
+
+    issues:    発表ごとに 1 行（地点, 発表時刻）。取り込み済み判定に使う
+    forecasts: 予報値（地点, 発表時刻, 対象時刻, 0.1℃単位の値）
+    時刻は YYYYMMDDHHMM 形式の整数で保持する
+    """
+    path = path or ARCHIVE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS issues (
+            station_id INTEGER NOT NULL,
+            issued_at INTEGER NOT NULL,
+            ingested_at TEXT NOT NULL,
+            PRIMARY KEY (station_id, issued_at)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS forecasts (
+            station_id INTEGER NOT NULL,
+            issued_at INTEGER NOT NULL,
+            target_time INTEGER NOT NULL,
+            wbgt INTEGER NOT NULL,
+            PRIMARY KEY (station_id, issued_at, target_time)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_forecasts_target
+            ON forecasts (station_id, target_time);
+        """
+    )
+    return conn
+
+
+def archive_forecasts(forecasts, path=None):
+    """予報データをアーカイブに追記し、新たに追加した発表数を返す（取り込み済みの発表は無視）"""
+    print("🗄️ 予報履歴をアーカイブに追記中...")
+    ingested_at = get_jst_now()
+    added = 0
+
+    conn = open_archive(path)
+    try:
+        with conn:
+            for wbgt_data in forecasts:
+                station_id = int(wbgt_data.station_id)
+                issued_at = _archive_key(wbgt_data.update_time)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO issues VALUES (?, ?, ?)",
+                    (station_id, issued_at, ingested_at),
+                )
+                if cursor.rowcount == 0:
+                    continue
+
+                conn.executemany(
+                    "INSERT OR IGNORE INTO forecasts VALUES (?, ?, ?, ?)",
+                    [
+                        (station_id, issued_at, _archive_key(t), value)
+                        for t, value in zip(
+                            wbgt_data.iso_times(), wbgt_data.values.tolist()
+                        )
+                    ],
+                )
+                added += 1
+    finally:
+        conn.close()
+
+    print(
+        f"  ✅ アーカイブ追記完了: 新しい発表 {added} 件"
+        f"（取り込み済み {len(forecasts) - added} 件）"
+    )
+    return added
+
+
+def _query_archive(sql, params, path=None):
+    """アーカイブを検索し、予報値の辞書のリストを返す"""
+    conn = open_archive(path)
+    try:
+        return [
+            {
+                "station_id": str(station_id),
+                "issued_at": _archive_time(issued_at),
+                "target_time": _archive_time(target_time),
+                "wbgt": wbgt / 10.0,
+            }
+            for station_id, issued_at, target_time, wbgt in conn.execute(sql, params)
+        ]
+    finally:
+        conn.close()
+
+
+def query_archive_by_issue(station_id, issued_from, issued_to, path=None):
+    """発表時刻の範囲（両端含む）で地点の予報履歴を取得"""
+    return _query_archive(
+        "SELECT station_id, issued_at, target_time, wbgt FROM forecasts"
+        " WHERE station_id = ? AND issued_at BETWEEN ? AND ?"
+        " ORDER BY issued_at, target_time",
+        (int(station_id), _archive_key(issued_from), _archive_key(issued_to)),
+        path,
+    )
+
+
+def query_archive_by_target(station_id, target_from, target_to, path=None):
+    """対象時刻の範囲（両端含む）で地点の予報履歴を取得（発表ごとの予報の変化を追える）"""
+    return _query_archive(
+        "SELECT station_id, issued_at, target_time, wbgt FROM forecasts"
+        " WHERE station_id = ? AND target_time BETWEEN ? AND ?"
+        " ORDER BY target_time, issued_at",
+        (int(station_id), _archive_key(target_from), _archive_key(target_to)),
+        path,
+    )
+
+
+def minify_html(content):
+    """HTML の行頭・行末の空白と空行を除去（改行は残してインライン JS を壊さない）"""
+    return "\n".join(line.strip() for line in content.splitlines() if line.strip())
+
+
+def minify_js(content):
+    """JS の行頭・行末の空白、空行、行全体のコメントを除去"""
+    lines = (line.strip() for line in content.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+def minify_css(content):
+    """CSS のコメントと余分な空白を除去"""
+    content = re.sub(r"/\*.*?\*/", "", content, flags=re.S)
+    content = re.sub(r"\s+", " ", content)
+    content = re.sub(r"\s*([{};:,>])\s*", r"\1", content)
+    return content.replace(";}", "}").strip()
+
+
+def minify_json(content):
+    """JSON を区切り文字の空白なしで再出力"""
+    return json.dumps(json.loads(content), ensure_ascii=False, separators=(",", ":"))
+
+
+def minify_ndjson(content):
+    """NDJSON の各行を区切り文字の空白なしで再出力"""
+    return "".join(minify_json(line) + "\n" for line in content.splitlines() if line.strip())
+
+
+MINIFIERS = {
+    ".html": minify_html,
+    ".js": minify_js,
+    ".css": minify_css,
+    ".json": minify_json,
+    ".ndjson": minify_ndjson,
+}
+
+
+def minify_content(path, content):
+    """出力最適化が有効な場合は書き込み前に minify（前回の最適化結果との差分判定用）"""
+    minifier = MINIFIERS.get(os.path.splitext(path)[1])
+    if OPTIMIZE_OUTPUT and minifier:
+        return minifier(content)
+    return content
+
+
+def collect_output_files():
+    """最適化対象の公開ファイル一覧"""
+    paths = ["index.html", SUMMARY_FILE, SUMMARY_NDJSON_FILE, INDEX_BUNDLE_FILE, DELTA_INDEX_FILE]
+    for station_config in STATIONS.values():
+        paths += [station_config["filename"], station_config["json_filename"]]
+    for directory in (ASSET_DIR, INDEX_SHARD_DIR, DELTA_DIR):
+        paths += [
+            f"{directory}/{name}"
+            for name in list_output_dir(directory)
+            if os.path.splitext(name)[1] in MINIFIERS
+        ]
+    return [path for path in paths if output_exists(path)]
+
+
+def optimize_file(path, previous_hash=None, unchanged=False):
+    """1 ファイルを minify し、.gz / .br を出力して (path, ハッシュ, サイズ情報) を返す
+
+    ファイル内容が前回の最適化結果と同じで圧縮ファイルも揃っている場合は何もしない。
+    unchanged（前回の最適化から書き込んでいないことが分かっている）なら内容を読まずに判定する。
+    事前圧縮が無効（PRECOMPRESS_OUTPUT）なら minify のみ行い、残っている .gz / .br は削除する
+    """
+    if PRECOMPRESS_OUTPUT:
+        siblings = [f"{path}.gz"] + ([f"{path}.br"] if brotli else [])
+    else:
+        siblings = []
+        for stale in (f"{path}.gz", f"{path}.br"):
+            if output_exists(stale):
+                remove_output(stale)
+    complete = all(output_exists(p) for p in siblings)
+    if unchanged and previous_hash and complete:
+        return path, previous_hash, None
+
+    original = read_output(path)
+    digest = hashlib.sha256(original).hexdigest()
+    if digest == previous_hash and complete:
+        return path, digest, None
+
+    minifier = MINIFIERS[os.path.splitext(path)[1]]
+    minified = minifier(original.decode("utf-8")).encode("utf-8")
+    if minified != original:
+        write_output(path, minified)
+
+    gz_data = b""
+    if PRECOMPRESS_OUTPUT:
+        # mtime を固定して、内容が同じなら圧縮結果も同じになるようにする
+        gz_data = gzip.compress(minified, compresslevel=9, mtime=0)
+        write_output(f"{path}.gz", gz_data)
+
+    br_size = None
+    if brotli and PRECOMPRESS_OUTPUT:
+        quality = 11 if path.startswith(f"{ASSET_DIR}/") else BROTLI_QUALITY
+        br_data = brotli.compress(minified, quality=quality)
+        write_output(f"{path}.br", br_data)
+        br_size = len(br_data)
+
+    METRICS.count(
+        "bytes_written",
+        (len(minified) if minified != original else 0) + len(gz_data) + (br_size or 0),
+    )
+    sizes = {
+        "original": len(original),
+        "minified": len(minified),
+        "gzip": len(gz_data) or None,
+        "brotli": br_size,
+    }
+    return path, hashlib.sha256(minified).hexdigest(), sizes
+
+
+def optimize_outputs(max_workers=None, previous_manifest=None):
+    """生成物を並列に minify・事前圧縮し、ファイルごとの削減量を表示して最適化マニフェストを返す
+
+    previous_manifest は常駐モードで保持している前回反映したビルドのマニフェスト。渡した場合は
+    マニフェストをファイルから読まず、このビルドで書き込んでいないファイルは内容を読まずにスキップする
+    """
+    if PRECOMPRESS_OUTPUT:
+        print("🗜️ 出力ファイルを最適化中（minify + 事前圧縮）...")
+        if brotli is None:
+            print("  ℹ️ brotli が未導入のため .br は出力しません")
+    else:
+        print("🗜️ 出力ファイルを最適化中（minify のみ）...")
+
+    manifest = dict(previous_manifest or {})
+    if previous_manifest is None and os.path.exists(OPTIMIZE_MANIFEST_FILE):
+        try:
+            with open(OPTIMIZE_MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"  ⚠️ 最適化マニフェスト読み込みエラー（全ファイルを処理）: {e}")
+
+    paths = collect_output_files()
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = list(
+            executor.map(
+                lambda path: optimize_file(
+                    path,
+                    manifest.get(path),
+                    previous_manifest is not None and not output_written(path),
+                ),
+                paths,
+            )
+        )
+
+    skipped = 0
+    total_original = total_best = 0
+    for path, digest, sizes in results:
+        manifest[path] = digest
+        if sizes is None:
+            skipped += 1
+            continue
+
+        best = min(
+            size for size in (sizes["minified"], sizes["gzip"], sizes["brotli"]) if size
+        )
+        total_original += sizes["original"]
+        total_best += best
+        gz_text = f" / gz {sizes['gzip']:,}" if sizes["gzip"] else ""
+        br_text = f" / br {sizes['brotli']:,}" if sizes["brotli"] else ""
+        print(
+            f"  📉 {path}: {sizes['original']:,} → min {sizes['minified']:,}"
+            f"{gz_text}{br_text} B"
+            f"（{sizes['original'] - best:,} B 削減）"
+        )
+
+    # 最適化結果と同時に反映されるよう、マニフェストもビルドの出力として書き込む
+    write_if_changed(
+        OPTIMIZE_MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2)
+    )
+
+    print(
+        f"  ✅ 最適化完了: {len(results) - skipped} ファイル処理 / {skipped} ファイル変更なし"
+        f"（合計 {total_original - total_best:,} B 削減）"
+    )
+    return manifest
+
+
+def jst_now():
+    """現在の JST 時刻（予報データと同じくタイムゾーンなしで扱う）"""
+    return datetime.now(JST).replace(tzinfo=None)
+
+
+def _parse_update_time(update_time):
+    """予報の発表時刻（例: 2026/08/22 21:25）を datetime に変換（解析できなければ None）"""
+    try:
+        return datetime.strptime(update_time, "%Y/%m/%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+def load_poll_schedule(path=None):
+    """観測した発表時刻と前回取得時刻（ポーリング状態）を読み込む"""
+    path = path or POLL_SCHEDULE_FILE
+    if not os.path.exists(path):
+        return {"update_times": [], "last_poll": None}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"  ⚠️ ポーリング状態の読み込みエラー（無視して続行）: {e}")
+        return {"update_times": [], "last_poll": None}
+
+
+def save_poll_schedule(schedule, path=None):
+    """ポーリング状態を保存"""
+    path = path or POLL_SCHEDULE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    replace_file(path, json.dumps(schedule, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+def record_poll(update_times, now=None, path=None):
+    """反映に成功した取得の時刻と観測した発表時刻を記録（最新の発表から POLL_LEARN_DAYS 日分を保持）"""
+    path = path or POLL_SCHEDULE_FILE
+    now = now or jst_now()
+    schedule = load_poll_schedule(path)
+
+    observed = {
+        parsed
+        for parsed in map(_parse_update_time, schedule["update_times"] + list(update_times))
+        if parsed
+    }
+    cutoff = max(observed, default=now) - timedelta(days=POLL_LEARN_DAYS)
+    schedule = {
+        "update_times": [
+            t.strftime("%Y/%m/%d %H:%M") for t in sorted(observed) if t >= cutoff
+        ],
+        "last_poll": now.isoformat(timespec="seconds"),
+        "last_attempt": now.isoformat(timespec="seconds"),
+        "failures": 0,
+    }
+    save_poll_schedule(schedule, path)
+    return schedule
+
+
+def record_poll_failure(now=None, path=None):
+    """失敗した取得・ビルドの時刻と連続失敗回数を記録（last_poll・発表時刻は変えない）"""
+    path = path or POLL_SCHEDULE_FILE
+    now = now or jst_now()
+    schedule = load_poll_schedule(path)
+    schedule["last_attempt"] = now.isoformat(timespec="seconds")
+    schedule["failures"] = schedule.get("failures", 0) + 1
+    save_poll_schedule(schedule, path)
+    return schedule
+
+
+def poll_intervals():
+    """(発表予定直後の取得間隔, 最大の取得間隔)。常駐モードで上限が指定されていればそれ以下にする"""
+    if _DAEMON_MAX_INTERVAL is None:
+        return POLL_DENSE_INTERVAL, POLL_MAX_INTERVAL
+    return (
+        min(POLL_DENSE_INTERVAL, _DAEMON_MAX_INTERVAL),
+        min(POLL_MAX_INTERVAL, _DAEMON_MAX_INTERVAL),
+    )
+
+
+def poll_retry_time(schedule):
+    """連続して失敗している場合の次回の再試行時刻（失敗していなければ None）
+
+    発表予定直後の取得間隔から失敗ごとに倍にし、最大の取得間隔を上限とする（poll_intervals）
+    """
+    failures = schedule.get("failures", 0)
+    if not failures or not schedule.get("last_attempt"):
+        return None
+    dense, longest = poll_intervals()
+    backoff = min(dense * 2 ** min(failures - 1, 16), longest)
+    return datetime.fromisoformat(schedule["last_attempt"]) + backoff
+
+
+def plan_poll(schedule, now=None):
+    """発表時刻の学習結果から (今回取得するか, 次回の取得時刻, 理由) を返す
+
+    観測した発表時刻の「時:分」を 1 日の発表スケジュールとして学習し、
+    - 直近の発表予定以降の予報を取得済みなら、次の発表予定まで取得しない（POLL_MAX_INTERVAL 毎の確認のみ）
+    - 発表予定から POLL_DENSE_WINDOW 以内でまだ新しい予報が出ていなければ POLL_DENSE_INTERVAL 毎に取得
+    - それを過ぎても出ていなければ POLL_MAX_INTERVAL 毎に取得
+    直前の取得・ビルドが失敗していれば、poll_retry_time の時刻まではいずれの場合も取得しない。
+    常駐モードで取得間隔の上限が指定されていれば、各間隔をそれ以下にする（poll_intervals）
+    """
+    now = now or jst_now()
+    due, next_poll, reason = _plan_poll_schedule(schedule, now)
+
+    retry_at = poll_retry_time(schedule)
+    if retry_at and now < retry_at:
+        reason = f"前回の処理に失敗（{schedule['failures']} 回連続）・{retry_at:%H:%M} に再試行"
+        return False, retry_at, reason
+    return due, next_poll, reason
 
-def process_station(station_key, station_config):
-    """個別の観測地点を処理"""
-    station_id = station_config["station_id"]
-    station_name = station_config["name"]
-    filename = station_config["filename"]
-    json_filename = station_config["json_filename"]
 
-    print(f"🏢 {station_name} ({station_id}) の処理を開始")
+def _plan_poll_schedule(schedule, now):
+    """発表時刻の学習結果だけから見た (今回取得するか, 次回の取得時刻, 理由)"""
+    dense, longest = poll_intervals()
+    observed = [t for t in map(_parse_update_time, schedule["update_times"]) if t]
+    last_poll = schedule.get("last_poll")
+    if not observed or not last_poll:
+        return True, now + longest, "発表時刻を学習中"
 
-    # データを取得
-    wbgt_data = download_wbgt_data(station_id)
+    last_poll = datetime.fromisoformat(last_poll)
+    latest = max(observed)
+    slots = sorted({(t.hour, t.minute) for t in observed})
+    candidates = sorted(
+        datetime.combine(now.date() + timedelta(days=offset), datetime.min.time())
+        .replace(hour=hour, minute=minute)
+        for offset in (-1, 0, 1)
+        for hour, minute in slots
+    )
+    previous_publish = max((t for t in candidates if t <= now), default=None)
+    next_publish = min((t for t in candidates if t > now), default=now + longest)
 
-    if wbgt_data:
-        print(f"  📊 HTML ファイル生成中: {filename}")
-        html_content = generate_html(wbgt_data, station_name, station_key)
+    if previous_publish is None or latest >= previous_publish:
+        # 直近の発表分は取得済み：次の発表予定までは新しい予報は出ない
+        interval = longest
+        next_poll = min(next_publish, last_poll + interval)
+        reason = f"最新の発表（{latest:%m/%d %H:%M}）を取得済み・次回発表予定 {next_publish:%H:%M}"
+    elif now - previous_publish <= POLL_DENSE_WINDOW:
+        interval = dense
+        next_poll = last_poll + interval
+        reason = f"発表予定 {previous_publish:%H:%M} 直後のため高頻度で取得"
+    else:
+        interval = longest
+        next_poll = min(next_publish, last_poll + interval)
+        reason = f"発表予定 {previous_publish:%H:%M} の予報が未確認（間隔を空けて取得）"
 
-        if html_content:
-            # HTMLファイルを保存
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(html_content)
+    return now >= last_poll + interval, max(next_poll, now), reason
 
-            # JSONデータも保存（デバッグ用）
-            with open(json_filename, "w", encoding="utf-8") as f:
-                json.dump(wbgt_data, f, ensure_ascii=False, indent=2)
 
-            print(f"  ✅ {station_name}: ファイル生成完了")
-            print(f"    - 現在WBGT: {wbgt_data['data'][0]['wbgt']:.1f}°C")
-            print(f"    - データ更新: {wbgt_data['update_time']}")
-            print(f"    - データ件数: {len(wbgt_data['data'])} 件")
+def check_update_time(now=None):
+    """新しい予報が出ている可能性があるかを発表スケジュールから判定（なければ処理を省略）"""
+    if not ADAPTIVE_POLLING or POLL_FORCE:
+        return True
 
-            alert_message = generate_alert_message(wbgt_data["data"], station_name)
+    due, next_poll, reason = plan_poll(load_poll_schedule(), now)
+    print(f"⏰ ポーリング判定: {reason}")
+    if not due:
+        print(f"  ⏭️ 新しい予報はまだありません（次回取得予定 {next_poll:%m/%d %H:%M}）")
+    return due
 
-            return True, alert_message
-            # return True
-        else:
-            print(f"  ❌ {station_name}: HTML生成に失敗")
-            return False
-    else:
-        print(f"  ❌ {station_name}: データ取得に失敗")
-        return False
 
+def _slot_time(times, column):
+    """時刻軸の列を ISO 形式の文字列に変換"""
+    return str(times[column].astype("datetime64[s]"))
 
-def create_index_html():
-    """インデックス HTML ファイルを生成"""
-    print("📄 インデックスページを生成中...")
 
-    index_html = """<!DOCTYPE html>
-<html lang="ja">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>WBGT 予報ダッシュボード</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
-    <style>
-        body {
-            font-family: 'Helvetica Neue', Arial, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: #333;
-        }
-        .container { max-width: 1400px; margin: 0 auto; }
-        .header { text-align: center; color: white; margin-bottom: 20px; }
-        .header h1 { font-size: 2em; margin-bottom: 8px; }
-        .header p { font-size: 1em; opacity: 0.85; margin: 0; }
-        .legend {
-            display: flex; flex-wrap: wrap; gap: 10px;
-            justify-content: center; margin-bottom: 20px;
-        }
-        .legend-item {
-            display: flex; align-items: center; gap: 6px;
-            background: rgba(255,255,255,0.15); padding: 4px 10px;
-            border-radius: 12px; color: white; font-size: 0.8em;
-        }
-        .legend-dot { width: 10px; height: 10px; border-radius: 50%; }
-        .grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(380px, 1fr));
-            gap: 20px;
-        }
-        .card {
-            background: white; border-radius: 16px; padding: 20px;
-            box-shadow: 0 8px 24px rgba(0,0,0,0.12);
-            text-decoration: none; color: inherit; display: block;
-            transition: transform 0.2s ease, box-shadow 0.2s ease;
-        }
-        .card:hover { transform: translateY(-4px); box-shadow: 0 12px 32px rgba(0,0,0,0.18); }
-        .card-header { display: flex; align-items: center; justify-content: space-between; margin-bottom: 12px; }
-        .station-name { font-size: 1.4em; font-weight: bold; color: #2c3e50; }
-        .danger-badge {
-            font-size: 0.8em; font-weight: bold; color: white;
-            padding: 5px 12px; border-radius: 20px; white-space: nowrap;
-        }
-        .wbgt-row { display: flex; gap: 16px; margin-bottom: 14px; }
-        .wbgt-item { text-align: center; flex: 1; }
-        .wbgt-value { font-size: 1.6em; font-weight: bold; }
-        .wbgt-label { font-size: 0.75em; color: #888; text-transform: uppercase; }
-        .chart-wrap { height: 120px; position: relative; }
-        .update-time { font-size: 0.75em; color: #aaa; margin-top: 8px; text-align: right; }
-        .loading { text-align: center; color: white; padding: 40px; font-size: 1.1em; }
-        .error-card { background: #fff3f3; border: 1px solid #ffcdd2; }
-        @media (max-width: 768px) {
-            .grid { grid-template-columns: 1fr; }
-            .header h1 { font-size: 1.5em; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>WBGT 予報ダッシュボード</h1>
-            <p id="generated-at">読み込み中...</p>
-        </div>
-        <div class="legend">
-            <div class="legend-item"><div class="legend-dot" style="background:#28A745"></div>ほぼ安全 (21未満)</div>
-            <div class="legend-item"><div class="legend-dot" style="background:#0066CC"></div>注意 (21〜25未満)</div>
-            <div class="legend-item"><div class="legend-dot" style="background:#FF6600"></div>警戒 (25〜28未満)</div>
-            <div class="legend-item"><div class="legend-dot" style="background:#FF0000"></div>厳重警戒 (28〜31未満)</div>
-            <div class="legend-item"><div class="legend-dot" style="background:#800080"></div>運動は原則中止 (31以上)</div>
-        </div>
-        <div class="grid" id="grid">
-            <div class="loading">データを読み込んでいます...</div>
-        </div>
-    </div>
-    <script>
-        const STATIONS = [
-            { key: 'abashiri',     name: '網走',  file: 'wbgt_data_abashiri.json',     url: 'abashiri.html' },
-            { key: 'kushiro',      name: '釧路',  file: 'wbgt_data_kushiro.json',      url: 'kushiro.html' },
-            { key: 'hachinohe',    name: '八戸',  file: 'wbgt_data_hachinohe.json',    url: 'hachinohe.html' },
-            { key: 'ishinomaki',   name: '石巻',  file: 'wbgt_data_ishinomaki.json',   url: 'ishinomaki.html' },
-            { key: 'tokyo',        name: '東京',  file: 'wbgt_data_tokyo.json',        url: 'tokyo.html' },
-            { key: 'tateyama',     name: '館山',  file: 'wbgt_data_tateyama.json',     url: 'tateyama.html' },
-            { key: 'shionomisaki', name: '潮岬',  file: 'wbgt_data_shionomisaki.json', url: 'shionomisaki.html' },
-        ];
-        function getDangerInfo(wbgt) {
-            if (wbgt >= 31) return { level: '運動は原則中止', color: '#800080' };
-            if (wbgt >= 28) return { level: '厳重警戒',       color: '#FF0000' };
-            if (wbgt >= 25) return { level: '警戒',           color: '#FF6600' };
-            if (wbgt >= 21) return { level: '注意',           color: '#0066CC' };
-            return              { level: 'ほぼ安全',          color: '#28A745' };
-        }
-        function buildCard(station, data) {
-            const points  = data.data;
-            const current = points[0].wbgt;
-            const max     = Math.max(...points.map(d => d.wbgt));
-            const min     = Math.min(...points.map(d => d.wbgt));
-            const danger  = getDangerInfo(current);
-            const labels  = points.map(d =>
-                d.month + '/' + d.day + ' ' +
-                String(d.hour).padStart(2, '0') + ':' +
-                String(d.minute).padStart(2, '0')
-            );
-            const card = document.createElement('a');
-            card.href = station.url;
-            card.className = 'card';
-            card.innerHTML = `
-                <div class="card-header">
-                    <div class="station-name">${station.name}</div>
-                    <div class="danger-badge" style="background:${danger.color}">${danger.level}</div>
-                </div>
-                <div class="wbgt-row">
-                    <div class="wbgt-item">
-                        <div class="wbgt-value" style="color:${danger.color}">${current.toFixed(1)}°C</div>
-                        <div class="wbgt-label">現在</div>
-                    </div>
-                    <div class="wbgt-item">
-                        <div class="wbgt-value" style="color:#dc3545">${max.toFixed(1)}°C</div>
-                        <div class="wbgt-label">最高</div>
-                    </div>
-                    <div class="wbgt-item">
-                        <div class="wbgt-value" style="color:#28a745">${min.toFixed(1)}°C</div>
-                        <div class="wbgt-label">最低</div>
-                    </div>
-                </div>
-                <div class="chart-wrap"><canvas id="chart-${station.key}"></canvas></div>
-                <div class="update-time">更新: ${data.update_time}</div>
-            `;
-            return { card, labels, values: points.map(d => d.wbgt), color: danger.color, key: station.key };
-        }
-        function drawChart(key, labels, values, color) {
-            const ctx = document.getElementById('chart-' + key).getContext('2d');
-            new Chart(ctx, {
-                type: 'line',
-                data: {
-                    labels,
-                    datasets: [{
-                        data: values, borderColor: color,
-                        backgroundColor: color + '22', borderWidth: 2,
-                        pointRadius: 0, fill: true, tension: 0.3,
-                    }]
-                },
-                options: {
-                    responsive: true, maintainAspectRatio: false,
-                    plugins: { legend: { display: false }, tooltip: { enabled: true } },
-                    scales: {
-                        x: { display: false },
-                        y: {
-                            display: true,
-                            ticks: { font: { size: 10 }, callback: v => v + '°' },
-                            grid: { color: '#f0f0f0' },
-                        }
-                    }
-                }
-            });
-        }
-        async function loadAll() {
-            const grid = document.getElementById('grid');
-            grid.innerHTML = '';
-            const results = await Promise.allSettled(
-                STATIONS.map(s => fetch(s.file).then(r => r.json()))
-            );
-            let latestTime = '';
-            const charts = [];
-            results.forEach((result, i) => {
-                const station = STATIONS[i];
-                if (result.status === 'fulfilled') {
-                    const { card, labels, values, color, key } = buildCard(station, result.value);
-                    grid.appendChild(card);
-                    charts.push({ key, labels, values, color });
-                    if (!latestTime) latestTime = result.value.last_updated;
-                } else {
-                    const card = document.createElement('div');
-                    card.className = 'card error-card';
-                    card.innerHTML = `<div class="station-name">${station.name}</div><p style="color:#e53935">データ取得失敗</p>`;
-                    grid.appendChild(card);
-                }
-            });
-            if (latestTime) {
-                const d = new Date(latestTime);
-                document.getElementById('generated-at').textContent =
-                    '最終更新: ' + d.getFullYear() + '年' + (d.getMonth()+1) + '月' + d.getDate() + '日 ' +
-                    String(d.getHours()).padStart(2,'0') + ':' + String(d.getMinutes()).padStart(2,'0');
-            }
-            charts.forEach(({ key, labels, values, color }) => drawChart(key, labels, values, color));
-        }
-        loadAll();
-    </script>
-</body>
-</html>"""
+def _level_name(wbgt):
+    """WBGT 値の危険レベル名"""
+    return DANGER_LEVELS_ASC[np.searchsorted(DANGER_THRESHOLDS, wbgt, side="right")][1]
 
-    with open("index.html", "w", encoding="utf-8") as f:
-        f.write(index_html)
 
-    print("  ✅ インデックスページ生成完了: index.html")
+def detect_alert_events(analytics, now=None, thresholds=None, horizons=None):
+    """全地点の閾値到達イベントを一括で検出し、station_key -> イベントのリストを返す
 
+    先読み時間ごとに「現在 + 先読み時間」に最も近い予報時刻（前後半コマ以内）を探し、
+    その時刻に閾値以上となる地点・閾値について、連続区間の開始（onset）・ピーク・継続時間・
+    閾値を下回る時刻（recovery）を返す。地点ごとに時刻軸が異なってもよいよう、各地点の行を
+    予報のある時刻だけに詰めてから判定し、連続区間の始端・終端は前後に 1 回ずつ走査して
+    全地点・全閾値分をまとめて求める
+    """
+    thresholds = np.array(sorted(thresholds or ALERT_THRESHOLDS), dtype=float)
+    horizons = sorted(horizons or ALERT_HORIZONS_HOURS)
+    times = analytics["times"]
+    values = analytics["values"]
+    station_count, slot_count = values.shape
+    events = {}
+    if station_count == 0 or slot_count == 0:
+        return events
 
-def create_summary_json():
-    """全地点の概要データを含む JSON ファイルを生成"""
-    print("📊 概要データファイルを生成中...")
+    # 予報データの時刻は JST（タイムゾーンなし）として扱う
+    now = now or jst_now()
 
-    summary_data = {
-        # "generated_at": datetime.now().isoformat(),
-        "generated_at": datetime.now(timezone.utc)
-        .astimezone(timezone(timedelta(hours=9)))
-        .isoformat(),
-        "stations": {},
-        "total_stations": len(STATIONS),
-        "update_schedule": "JST 9:00-21:00, every 2 hours",
-    }
+    # 各行を予報のある列だけに左詰めする（columns は詰めた位置 -> 和集合の列、counts 以降は詰め物）
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=1)
+    width = int(counts.max())
+    columns = np.argsort(~valid, axis=1, kind="stable")[:, :width]
+    padded = np.arange(width)[None, :] >= counts[:, None]
+    compact = np.where(padded, -np.inf, np.take_along_axis(values, columns, axis=1))
+    hours = np.where(
+        padded, 0.0, np.take_along_axis(analytics["slot_hours"], columns, axis=1)
+    )
+    slot_minutes = times.astype("int64")[columns]
 
-    for station_key, station_config in STATIONS.items():
-        json_filename = station_config["json_filename"]
+    above = compact[:, :, None] >= thresholds[None, None, :]
+    positions = np.arange(width)[None, :, None]
+    # 各時刻を含む連続区間の終端（次に閾値を下回る位置）と始端
+    run_end = np.minimum.accumulate(
+        np.where(above, width, positions)[:, ::-1], axis=1
+    )[:, ::-1]
+    run_start = np.maximum.accumulate(np.where(above, -1, positions), axis=1) + 1
+    elapsed_hours = np.concatenate(
+        [np.zeros((station_count, 1)), np.cumsum(hours, axis=1)], axis=1
+    )
 
-        if os.path.exists(json_filename):
-            try:
-                with open(json_filename, "r", encoding="utf-8") as f:
-                    station_data = json.load(f)
-
-                if station_data and "data" in station_data and station_data["data"]:
-                    current_wbgt = station_data["data"][0]["wbgt"]
-                    max_wbgt = max([d["wbgt"] for d in station_data["data"]])
-                    min_wbgt = min([d["wbgt"] for d in station_data["data"]])
-
-                    # 危険レベルの判定
-                    if current_wbgt >= 31:
-                        danger_level = "運動は原則中止"
-                    elif current_wbgt >= 28:
-                        danger_level = "厳重警戒"
-                    elif current_wbgt >= 25:
-                        danger_level = "警戒"
-                    elif current_wbgt >= 21:
-                        danger_level = "注意"
-                    else:
-                        danger_level = "ほぼ安全"
-
-                    summary_data["stations"][station_key] = {
-                        "name": station_config["name"],
-                        "station_id": station_data["station_id"],
-                        "current_wbgt": current_wbgt,
-                        "max_wbgt": max_wbgt,
-                        "min_wbgt": min_wbgt,
-                        "danger_level": danger_level,
-                        "update_time": station_data["update_time"],
-                        "data_points": len(station_data["data"]),
-                        "html_file": station_config["filename"],
-                    }
-                else:
-                    summary_data["stations"][station_key] = {
-                        "name": station_config["name"],
-                        "station_id": station_config["station_id"],
-                        "error": "No data available",
-                    }
-            except Exception as e:
-                print(f"    ⚠️ {station_key} データ読み込みエラー: {e}")
-                summary_data["stations"][station_key] = {
-                    "name": station_config["name"],
-                    "station_id": station_config["station_id"],
-                    "error": str(e),
+    rows = np.arange(station_count)
+    seen = set()
+    for horizon in horizons:
+        target = np.datetime64(now + timedelta(hours=horizon), "m").astype("int64")
+        # 地点ごとに自身の予報時刻から最も近いもの（同じ距離なら早い方）を選ぶ
+        distance = np.where(padded, np.inf, np.abs(slot_minutes - target))
+        nearest = distance.argmin(axis=1)
+        in_range = distance[rows, nearest] <= hours[rows, nearest] * 30
+
+        for row, k in zip(*np.nonzero(in_range[:, None] & above[rows, nearest, :])):
+            position = nearest[row]
+            start = run_start[row, position, k]
+            end = run_end[row, position, k]
+            if (row, k, start) in seen:
+                continue
+            seen.add((row, k, start))
+
+            peak = start + int(np.argmax(compact[row, start:end]))
+            recovered = end < counts[row]
+            station_key = analytics["keys"][row]
+            events.setdefault(station_key, []).append(
+                {
+                    "station_key": station_key,
+                    "threshold": float(thresholds[k]),
+                    "horizon_hours": horizon,
+                    "target_time": _slot_time(times, columns[row, position]),
+                    "target_value": float(compact[row, position]),
+                    "onset": _slot_time(times, columns[row, start]),
+                    "peak_time": _slot_time(times, columns[row, peak]),
+                    "peak_value": float(compact[row, peak]),
+                    "duration_hours": float(
+                        elapsed_hours[row, end] - elapsed_hours[row, start]
+                    ),
+                    "recovery_time": (
+                        _slot_time(times, columns[row, end]) if recovered else None
+                    ),
+                    "recovery_value": float(compact[row, end]) if recovered else None,
                 }
-        else:
-            summary_data["stations"][station_key] = {
-                "name": station_config["name"],
-                "station_id": station_config["station_id"],
-                "error": "Data file not found",
-            }
+            )
 
-    with open("wbgt_summary.json", "w", encoding="utf-8") as f:
-        json.dump(summary_data, f, ensure_ascii=False, indent=2)
-
-    print("  ✅ 概要データファイル生成完了: wbgt_summary.json")
-    return summary_data
-
-
-# def check_update_time():
-#    """更新時刻をチェック（JST 9:00-21:00 の間のみ実行）"""
-#    now = datetime.now()
-#    hour = now.hour
-#
-#    print(f"⏰ 現在時刻: {now.strftime('%Y年%m月%d日 %H:%M:%S')} JST")
-#
-#    if 9 <= hour <= 21:
-#        print("  ✅ 更新時間内です（JST 9:00-21:00）")
-#        return True
-#    else:
-#        print("  ⏸️ 更新時間外です（JST 9:00-21:00 以外）")
-#        print("  ℹ️ 夜間の更新はスキップされます")
-#        return False
-def check_update_time():
-    return True  # ← テスト用に常にTrueを返す
-
-
-def generate_alert_message(wbgt_data, station_name):
-    from datetime import datetime, timedelta
-
-    now = datetime.now()
-    target_time = (now + timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
-    threshold = 20.0
-
-    # 2時間後のインデックスを探す
-    start_index = next(
-        (
-            i
-            for i, d in enumerate(wbgt_data)
-            if datetime.fromisoformat(d["time"]) == target_time
-        ),
-        None,
-    )
-    if start_index is None or wbgt_data[start_index]["wbgt"] < threshold:
-        return ""
+    return events
 
-    # 警戒レベル継続時間を調べる
-    duration = 0
-    recovery_time = None
-    for i in range(start_index, len(wbgt_data)):
-        if wbgt_data[i]["wbgt"] >= threshold:
-            duration += 1
-        else:
-            recovery_time = wbgt_data[i]["time"]
-            recovery_value = wbgt_data[i]["wbgt"]
-            break
 
-    start_time = wbgt_data[start_index]["time"][-8:-3]
-    end_time = recovery_time[-8:-3] if recovery_time else "未定"
-    hours = duration * 3
+def _alert_time(iso_time, reference):
+    """通知用の時刻表記（基準時刻と日付が異なる場合は日付も付ける）"""
+    if iso_time[:10] == reference[:10]:
+        return iso_time[11:16]
+    return f"{int(iso_time[5:7])}/{int(iso_time[8:10])} {iso_time[11:16]}"
+
+
+def generate_alert_message(station_name, events):
+    """地点のイベントから通知メッセージを作成（先読み時間ごとに最も高い閾値のイベントを通知）"""
+    if not events:
+        return ""
 
     msg = f"📍 {station_name}\n"
-    msg += f"🔺 2時間後（{start_time}）にWBGTが{wbgt_data[start_index]['wbgt']:.1f}℃に達する見込みです。\n"
-    msg += f"🕒 警戒レベルは約{hours}時間（{start_time}〜{end_time}）続く見込みです。\n"
-    if recovery_time:
-        msg += f"🔻 {end_time}にはWBGTが{recovery_value:.1f}℃に下がり、通常レベルに戻る見込みです。\n"
+    for horizon in sorted({event["horizon_hours"] for event in events}):
+        event = max(
+            (e for e in events if e["horizon_hours"] == horizon),
+            key=lambda e: e["threshold"],
+        )
+        reference = event["target_time"]
+        target_time = reference[11:16]
+        onset = _alert_time(event["onset"], reference)
+        peak_time = _alert_time(event["peak_time"], reference)
+        end_time = (
+            _alert_time(event["recovery_time"], reference)
+            if event["recovery_time"]
+            else "未定"
+        )
+        level = _level_name(event["target_value"])
+
+        msg += (
+            f"🔺 {horizon:g}時間後（{target_time}）にWBGTが{event['target_value']:.1f}℃"
+            f"（{level}）に達する見込みです。\n"
+        )
+        msg += (
+            f"🕒 {event['threshold']:g}℃以上の状態は約{event['duration_hours']:g}時間"
+            f"（{onset}〜{end_time}）続き、{peak_time}に"
+            f"{event['peak_value']:.1f}℃のピークとなる見込みです。\n"
+        )
+        if event["recovery_value"] is not None:
+            msg += (
+                f"🔻 {end_time}にはWBGTが{event['recovery_value']:.1f}℃に下がり、"
+                f"{event['threshold']:g}℃を下回る見込みです。\n"
+            )
     return msg
 
 
-def main():
-    """メイン処理"""
+def main(session=None, http_cache=None, build_manifest=None, daemon_state=None):
+    """メイン処理
+
+    常駐モードでは HTTP セッション・検証子キャッシュ・ビルドマニフェストを呼び出し側で保持し、
+    実行をまたいで使い回す（省略時はファイルから読み込み、セッションを新たに作る）。
+    daemon_state（new_daemon_state）には前回反映した予報・インデックスのカード・最適化マニフェストを
+    保持し、前回の出力をファイルから読み直さずに済ませる（出力の反映に成功した場合のみ更新する）
+    """
     print("🚀 WBGT データ処理スクリプト開始")
     print("=" * 50)
 
     try:
         # 更新時刻チェック
         if not check_update_time():
-            print("⏹️ 更新時間外のため処理を終了します")
+            print("⏹️ 新しい予報がないため処理を終了します")
             return
 
         print(f"📍 処理対象地点: {len(STATIONS)} 地点")
+        polled_at = jst_now()
+        METRICS.reset()
+        # 以降の出力は一時ファイルに書き込み、最後にまとめて反映する
+        begin_output()
 
         # 各地点の処理
         alert_messages = []
         success_count = 0
-        # for station_key, station_config in STATIONS.items():
-        #    print(f"\n{'='*30}")
-        #    if process_station(station_key, station_config):
-        #        success_count += 1
-        for station_key, station_config in STATIONS.items():
-            print(f"\n{'='*30}")
-            success, alert_message = process_station(station_key, station_config)
+        if http_cache is None:
+            http_cache = load_http_cache()
+        if build_manifest is None:
+            build_manifest = load_build_manifest()
+        # 地点のフィンガープリントは写しに記録し、出力の反映に成功してから呼び出し側の辞書へ反映する
+        # （途中で失敗したビルドの地点を、常駐モードの次回以降に「再生成済み」と誤判定しないため）
+        previous_manifest = build_manifest
+        build_manifest = dict(previous_manifest)
+        session_context = (
+            contextlib.nullcontext(session) if session else create_http_session()
+        )
+        with METRICS.stage("process"), session_context as session:
+            results, analytics = process_all_stations(
+                session,
+                http_cache,
+                build_manifest,
+                previous_forecasts=daemon_state and daemon_state["forecasts"],
+            )
+        save_http_cache(http_cache)
+        save_build_manifest(build_manifest)
+        rendered_stations = [
+            key for key in STATIONS if build_manifest.get(key) != previous_manifest.get(key)
+        ]
+        print(f"🧩 再生成した地点: {len(rendered_stations)}/{len(STATIONS)} 地点")
+        # 予報履歴をアーカイブに追記
+        if ARCHIVE_ENABLED:
+            with METRICS.stage("archive"):
+                archive_forecasts(
+                    [wbgt_data for _, _, wbgt_data in results if wbgt_data]
+                )
+
+        for success, alert_message, _ in results:
             if success:
                 success_count += 1
                 if alert_message:
@@ -1001,11 +3682,53 @@ def main():
 
         # インデックスページ生成
         print(f"\n{'='*30}")
-        create_index_html()
+        with METRICS.stage("index"):
+            create_index_html()
+            create_index_bundle(
+                analytics, daemon_state and daemon_state["index_entries"]
+            )
 
         # 概要データ生成
         print(f"\n{'='*30}")
-        summary_data = create_summary_json()
+        with METRICS.stage("summary"):
+            create_summary_json(analytics)
+
+        # 差分フィード生成
+        if DELTA_FEED_ENABLED:
+            print(f"\n{'='*30}")
+            with METRICS.stage("delta"):
+                create_delta_feed(analytics.get("changes"))
+
+        # 生成物の最適化
+        optimize_manifest = None
+        if OPTIMIZE_OUTPUT:
+            print(f"\n{'='*30}")
+            with METRICS.stage("optimize"):
+                optimize_manifest = optimize_outputs(
+                    previous_manifest=daemon_state and daemon_state["optimize_manifest"]
+                )
+
+        create_build_info(rendered_stations)
+        commit_output()
+        previous_manifest.update(build_manifest)
+        if daemon_state is not None:
+            daemon_state["forecasts"] = dict(analytics["forecasts"])
+            daemon_state["optimize_manifest"] = optimize_manifest
+        # 取得した発表を記録するのは反映に成功してから（失敗したビルドは次回の取得判定で再試行させる）
+        record_poll(
+            [wbgt_data.update_time for _, _, wbgt_data in results if wbgt_data],
+            now=polled_at,
+        )
+
+        # 実行メトリクス出力
+        metrics = write_run_metrics()
+        if metrics:
+            counters = metrics["counters"]
+            print(
+                f"⏱️ 実行メトリクス: {metrics['duration_ms'] / 1000:.2f} 秒"
+                f" / 取得 {counters.get('bytes_downloaded', 0):,} B"
+                f" / 書き込み {counters.get('bytes_written', 0):,} B → {METRICS_FILE}"
+            )
 
         # 通知メッセージ出力
         if alert_messages:
@@ -1014,7 +3737,7 @@ def main():
 
             with open("alert_message.txt", "w", encoding="utf-8") as f:
                 f.write(
-                    f"🌡️ WBGT予測通知（{datetime.now().strftime('%Y-%m-%d %H:%M')} 時点）\n\n"
+                    f"🌡️ WBGT予測通知（{datetime.now(JST).strftime('%Y-%m-%d %H:%M')} 時点）\n\n"
                 )
                 f.write("\n".join(alert_messages))
                 f.write(
@@ -1022,6 +3745,9 @@ def main():
                 )
 
             print("✅ 通知メッセージを alert_message.txt に出力しました")
+        elif os.path.exists("alert_message.txt"):
+            # 前回実行時の通知が残らないようにする
+            os.remove("alert_message.txt")
 
         # 処理結果の表示
         print(f"\n{'='*50}")
@@ -1029,18 +3755,20 @@ def main():
         print(f"  - 成功地点数: {success_count}/{len(STATIONS)}")
         print(f"  - 生成ファイル:")
         print(f"    • index.html (インデックスページ)")
-        print(f"    • wbgt_summary.json (概要データ)")
+        print(f"    • {SUMMARY_FILE} (概要データ)")
+        if SUMMARY_NDJSON:
+            print(f"    • {SUMMARY_NDJSON_FILE} (概要データ NDJSON 版)")
+        print(f"    • {BUILD_INFO_FILE} (生成時刻)")
+        if METRICS.enabled:
+            print(f"    • {METRICS_FILE} (実行メトリクス)")
 
         for station_key, station_config in STATIONS.items():
-            if (
-                station_key in summary_data["stations"]
-                and "error" not in summary_data["stations"][station_key]
-            ):
-                station_summary = summary_data["stations"][station_key]
+            stats = get_station_stats(analytics, station_key)
+            if stats is not None:
                 print(f"    • {station_config['filename']} ({station_config['name']})")
-                print(f"      - 現在WBGT: {station_summary['current_wbgt']:.1f}°C")
-                print(f"      - 危険レベル: {station_summary['danger_level']}")
-                print(f"      - データ件数: {station_summary['data_points']} 件")
+                print(f"      - 現在WBGT: {stats['current']:.1f}°C")
+                print(f"      - 危険レベル: {stats['level']}")
+                print(f"      - データ件数: {stats['data_points']} 件")
 
         print(f"\n🎉 全ての処理が正常に完了しました！")
 
@@ -1054,16 +3782,18 @@ def main():
 
             # 最新の WBGT 値を環境変数に設定
             for station_key in STATIONS:
-                if (
-                    station_key in summary_data["stations"]
-                    and "current_wbgt" in summary_data["stations"][station_key]
-                ):
-                    wbgt_value = summary_data["stations"][station_key]["current_wbgt"]
-                    danger_level = summary_data["stations"][station_key]["danger_level"]
-                    print(f"WBGT_{station_key.upper()}={wbgt_value:.1f}")
-                    print(f"DANGER_{station_key.upper()}={danger_level}")
+                stats = get_station_stats(analytics, station_key)
+                if stats is not None:
+                    print(f"WBGT_{station_key.upper()}={stats['current']:.1f}")
+                    print(f"DANGER_{station_key.upper()}={stats['level']}")
 
     except Exception as e:
+        abort_output()
+        # 失敗も記録し、次回の取得判定で間隔を空けてから再試行させる
+        try:
+            record_poll_failure()
+        except Exception as record_error:
+            print(f"  ⚠️ ポーリング状態の記録に失敗: {record_error}")
         print(f"\n❌ 処理中にエラーが発生しました:")
         print(f"エラー内容: {str(e)}")
         print(f"スタックトレース:")
@@ -1097,8 +3827,431 @@ def main():
             print(f"  ⚠️ エラーレポート生成も失敗: {report_error}")
 
 
+# API の min_level に指定できる危険レベル名と、その下限の WBGT
+LEVEL_THRESHOLDS = {
+    level: (threshold if threshold is not None else float("-inf"))
+    for threshold, level, _, _ in DANGER_LEVELS
+}
+
+
+class ApiError(Exception):
+    """API リクエストのエラー（HTTP ステータスとメッセージ）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _parse_api_time(value, name):
+    """クエリの日時（ISO 形式）を予報データと同じ形式の文字列に正規化"""
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None).isoformat()
+    except ValueError:
+        raise ApiError(400, f"{name} は ISO 形式の日時で指定してください: {value}")
+
+
+def _parse_min_level(value):
+    """min_level（危険レベル名または WBGT 値）を下限の WBGT に変換"""
+    if value in LEVEL_THRESHOLDS:
+        return LEVEL_THRESHOLDS[value]
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(
+            400, f"min_level はレベル名（{'・'.join(LEVEL_THRESHOLDS)}）か数値で指定してください"
+        )
+
+
+def select_api_stations(params):
+    """クエリの station（キー・観測地点コード）・prefecture に一致する station_key のリスト
+
+    指定がなければ全地点（レジストリ順）。指定した場合は索引から引き、指定した順に返す
+    """
+    selected = None
+    if params.get("station"):
+        wanted = dict.fromkeys(find_station(v.strip()) for v in params["station"].split(","))
+        selected = [key for key in wanted if key is not None]
+    if params.get("prefecture"):
+        prefectures = dict.fromkeys(v.strip() for v in params["prefecture"].split(","))
+        if selected is None:
+            selected = [
+                key
+                for prefecture in prefectures
+                for key in STATIONS_BY_PREFECTURE.get(prefecture, ())
+            ]
+        else:
+            selected = [
+                key for key in selected if STATIONS[key]["prefecture"] in prefectures
+            ]
+    return list(STATIONS) if selected is None else selected
+
+
+def query_api(snapshot, path, params):
+    """API のパスとクエリから応答データを作る
+
+    /api/stations・/api/summary・/api/forecasts・/api/alerts に対応し、
+    station / prefecture / from / to / min_level で絞り込む
+    """
+    analytics = snapshot["analytics"]
+    selected = select_api_stations(params)
+    min_wbgt = _parse_min_level(params["min_level"]) if params.get("min_level") else None
+    time_from = _parse_api_time(params["from"], "from") if params.get("from") else None
+    time_to = _parse_api_time(params["to"], "to") if params.get("to") else None
+
+    if path == "/api/stations":
+        return {
+            "stations": {
+                key: {
+                    name: STATIONS[key][name]
+                    for name in ("station_id", "name", "prefecture", "region", "lat", "lon")
+                }
+                for key in selected
+            }
+        }
+
+    if path == "/api/summary":
+        stations = snapshot["summary"]["stations"]
+        return dict(
+            snapshot["summary"],
+            stations={
+                key: stations[key]
+                for key in selected
+                if min_wbgt is None or stations[key].get("current_wbgt", float("-inf")) >= min_wbgt
+            },
+        )
+
+    if path == "/api/forecasts":
+        result = {}
+        for key in selected:
+            wbgt_data = analytics["forecasts"].get(key)
+            if not wbgt_data:
+                continue
+            wbgt = wbgt_data.wbgt
+            selected_points = np.ones(wbgt.size, dtype=bool)
+            if time_from is not None:
+                selected_points &= wbgt_data.times >= np.datetime64(time_from)
+            if time_to is not None:
+                selected_points &= wbgt_data.times <= np.datetime64(time_to)
+            if min_wbgt is not None:
+                selected_points &= wbgt >= min_wbgt
+            times = np.datetime_as_string(wbgt_data.times[selected_points], unit="s")
+            points = [
+                {"time": t, "wbgt": value}
+                for t, value in zip(times.tolist(), wbgt[selected_points].tolist())
+            ]
+            result[key] = {
+                "station_id": wbgt_data.station_id,
+                "update_time": wbgt_data.update_time,
+                "data": points,
+            }
+        return {"stations": result}
+
+    if path == "/api/alerts":
+        alerts = analytics.get("alerts", {})
+        return {
+            "alerts": {
+                key: [
+                    event
+                    for event in alerts[key]
+                    if (min_wbgt is None or event["threshold"] >= min_wbgt)
+                    and (time_from is None or event["target_time"] >= time_from)
+                    and (time_to is None or event["target_time"] <= time_to)
+                ]
+                for key in selected
+                if alerts.get(key)
+            }
+        }
+
+    raise ApiError(404, f"不明なパスです: {path}")
+
+
+def accepts_gzip(accept_encoding):
+    """Accept-Encoding ヘッダーが gzip を受け付けるか（q=0 は拒否として扱う）
+
+    gzip（x-gzip）が明示されていればその q 値、なければ * の q 値で判定する
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+class ApiServer:
+    """メモリ上の予報・概要・警戒情報を返す asyncio HTTP サーバー
+
+    静的ビルドと同じ取得・解析・統計処理（collect_forecasts / build_summary）で作った
+    スナップショットを保持し、定期的に更新する。応答はスナップショット内に
+    （パス・クエリ・gzip の有無）単位でキャッシュし、ETag による 304 に対応する
+    """
+
+    RESPONSE_CACHE_SIZE = 1024
+
+    def __init__(self, session=None, http_cache=None):
+        self.session = session
+        self.http_cache = http_cache if http_cache is not None else load_http_cache()
+        self.snapshot = None
+
+    def refresh(self):
+        """予報を取得し直してスナップショットを差し替える（別スレッドで実行）"""
+        polled_at = jst_now()
+        # 常駐中に計測値が溜まり続けないよう、main() と同様に更新ごとに計測し直す
+        METRICS.reset()
+        previous = self.snapshot["analytics"]["forecasts"] if self.snapshot else None
+        _, analytics = collect_forecasts(
+            self.session, self.http_cache, previous_forecasts=previous
+        )
+        save_http_cache(self.http_cache)
+        # 参照の差し替えのみで切り替える。応答キャッシュはスナップショットに含め、一緒に差し替える
+        # （更新中の要求が古いスナップショットの応答を新しいキャッシュに入れないように）
+        self.snapshot = {
+            "analytics": analytics,
+            "summary": build_summary(analytics),
+            "generated_at": get_jst_now(),
+            "responses": {},
+        }
+        # 取得した発表はスナップショットを差し替えてから記録（失敗時は次回の取得判定で再試行させる）
+        record_poll(
+            [data.update_time for data in analytics["forecasts"].values() if data],
+            now=polled_at,
+        )
+        print(f"🔄 API データ更新: {len(analytics['keys'])}/{len(STATIONS)} 地点")
+
+    def build_response(self, path, query, gzip_ok):
+        """(ステータス, ETag, 本文, gzip 済みか) を返す（同じ要求はキャッシュから返す）"""
+        snapshot = self.snapshot
+        responses = snapshot["responses"]
+        cache_key = (path, query, gzip_ok)
+        cached = responses.get(cache_key)
+        if cached:
+            return cached
+
+        try:
+            if path == "/healthz":
+                payload = {"status": "ok", "generated_at": snapshot["generated_at"]}
+            else:
+                params = {
+                    name: values[-1]
+                    for name, values in urllib.parse.parse_qs(query).items()
+                }
+                payload = query_api(snapshot, path, params)
+            status = 200
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        compressed = gzip_ok and len(body) > 256
+        if compressed:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            etag = f'{etag[:-1]}-gz"'
+
+        response = (status, etag, body, compressed)
+        if status == 200:
+            if len(responses) >= self.RESPONSE_CACHE_SIZE:
+                responses.clear()
+            responses[cache_key] = response
+        return response
+
+    def respond(self, method, target, headers):
+        """1 リクエスト分の (ステータス, ヘッダー, 本文) を作る"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+
+        path, _, query = target.partition("?")
+        gzip_ok = accepts_gzip(headers.get("accept-encoding", ""))
+        status, etag, body, compressed = self.build_response(path, query, gzip_ok)
+
+        response_headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if compressed:
+            response_headers["Content-Encoding"] = "gzip"
+        if status == 200 and etag in headers.get("if-none-match", ""):
+            return 304, response_headers, b""
+        return status, response_headers, body
+
+    async def handle(self, reader, writer):
+        """1 接続分の処理（HTTP/1.1 keep-alive 対応）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    if len(headers) >= 100:
+                        raise ValueError("ヘッダーが多すぎます")
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                # 本来は ASCII（%エンコード）だが、エンコードされていない UTF-8 も受け付ける
+                method, target, version = request_line.decode("utf-8", "replace").split()
+                status, response_headers, body = self.respond(method, target, headers)
+                keep_alive = (
+                    version == "HTTP/1.1"
+                    and headers.get("connection", "").lower() != "close"
+                )
+
+                lines = [f"HTTP/1.1 {status} {HTTP_STATUS_TEXT.get(status, '')}"]
+                lines += [f"{name}: {value}" for name, value in response_headers.items()]
+                lines.append(f"Content-Length: {len(body)}")
+                lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+                head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+                writer.write(head if method == "HEAD" else head + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def refresh_loop(self, interval):
+        """予報を定期的に取得し直す（適応ポーリング有効時は発表スケジュールに合わせる）"""
+        while True:
+            if ADAPTIVE_POLLING:
+                _, next_poll, _ = plan_poll(load_poll_schedule())
+                wait = max(0.0, (next_poll - jst_now()).total_seconds())
+            else:
+                wait = interval
+            await asyncio.sleep(wait)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"  ⚠️ API データ更新エラー（前回のデータで継続）: {e}")
+                with contextlib.suppress(OSError):
+                    record_poll_failure()
+
+    async def serve(self, host, port, interval=DAEMON_INTERVAL):
+        """初回のデータ取得後に待ち受けを開始"""
+        await asyncio.to_thread(self.refresh)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🌐 API サーバー起動: http://{host}:{port}/api/summary")
+        refresher = asyncio.create_task(self.refresh_loop(interval))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+HTTP_STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+def run_api_server(host=None, port=None):
+    """API サーバーモード（Ctrl+C で停止）"""
+    with create_http_session() as session:
+        server = ApiServer(session)
+        try:
+            asyncio.run(server.serve(host or SERVE_HOST, port or SERVE_PORT))
+        except KeyboardInterrupt:
+            print("\n👋 API サーバーを停止しました")
+
+
+def new_daemon_state():
+    """常駐モードで実行をまたいで保持する状態（main の daemon_state）"""
+    return {
+        "forecasts": {},  # station_key -> 前回反映した予報
+        "index_entries": {},  # station_key -> (フィンガープリント, インデックスのカード)
+        "optimize_manifest": None,  # 前回反映した最適化マニフェスト（None ならファイルから読む）
+    }
+
+
+def run_daemon(interval=None, cycles=None):
+    """常駐モード：main() を繰り返す（適応ポーリングが有効なら発表スケジュールに合わせ、無効なら interval 秒ごと）
+
+    適応ポーリングが有効な場合、interval を指定すると取得間隔の上限にする（省略時は上限なし）。
+    無効な場合の省略時は DAEMON_INTERVAL 秒ごとに更新する
+
+    HTTP セッション（keep-alive 接続）、解析済みの予報を含む検証子キャッシュ、ビルドマニフェスト、
+    前回反映した予報・インデックスのカードとページ・最適化マニフェストをメモリ上に保持するため、
+    2 回目以降は更新のあった地点だけを取得・再生成し、前回の出力をファイルから読み直さない。
+    SIGINT / SIGTERM を受けると実行中の処理を終えてから停止する
+    """
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print(f"\n🛑 停止要求を受信しました（シグナル {signum}）")
+        stop.set()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, request_stop)
+
+    global _DAEMON_RUNNING, _DAEMON_MAX_INTERVAL, _PUBLISHED_CONTENT
+
+    if ADAPTIVE_POLLING:
+        _DAEMON_MAX_INTERVAL = timedelta(seconds=interval) if interval else None
+        dense, longest = poll_intervals()
+        print(
+            "🔁 常駐モード開始: 発表スケジュールに合わせて更新"
+            f"（発表予定直後は {dense.total_seconds():.0f} 秒・"
+            f"それ以外は最大 {longest.total_seconds():.0f} 秒間隔）"
+        )
+    else:
+        interval = interval or DAEMON_INTERVAL
+        _DAEMON_MAX_INTERVAL = timedelta(seconds=interval)
+        print(f"🔁 常駐モード開始: {interval} 秒ごとに更新")
+    http_cache = load_http_cache()
+    build_manifest = load_build_manifest()
+    daemon_state = new_daemon_state()
+    cycle = 0
+    _DAEMON_RUNNING = True
+    _PUBLISHED_CONTENT = {}
+    with create_http_session() as session:
+        while not stop.is_set():
+            cycle += 1
+            started = time.monotonic()
+            print(f"\n🔄 更新サイクル {cycle} ({get_jst_now()})")
+            main(session, http_cache, build_manifest, daemon_state)
+
+            if cycles and cycle >= cycles:
+                break
+            if ADAPTIVE_POLLING:
+                # 学習した発表スケジュールに合わせて次回の取得時刻を決める
+                _, next_poll, _ = plan_poll(load_poll_schedule())
+                wait = (next_poll - jst_now()).total_seconds()
+            else:
+                wait = interval - (time.monotonic() - started)
+            wait = max(0.0, wait)
+            print(f"💤 次回更新まで {wait:.0f} 秒待機")
+            stop.wait(wait)
+
+    _DAEMON_RUNNING = False
+    _DAEMON_MAX_INTERVAL = None
+    _PUBLISHED_CONTENT = None
+    print("👋 常駐モードを終了しました")
+
+
 def test_single_station(station_key):
-    """単一地点のテスト用関数"""
+    """単一地点のテスト用関数（地点キーまたは観測地点コードを指定）"""
+    station_key = find_station(station_key) or station_key
     if station_key not in STATIONS:
         print(f"❌ 無効な地点キー: {station_key}")
         print(f"利用可能な地点: {list(STATIONS.keys())}")
@@ -1107,7 +4260,8 @@ def test_single_station(station_key):
     print(f"🧪 テストモード: {station_key} のみ処理")
     station_config = STATIONS[station_key]
 
-    if process_station(station_key, station_config):
+    success, _, _ = process_station(station_key, station_config)
+    if success:
         print(f"✅ {station_key} のテストが成功しました")
     else:
         print(f"❌ {station_key} のテストが失敗しました")
@@ -1121,9 +4275,14 @@ if __name__ == "__main__":
         if sys.argv[1] == "--test":
             # 全地点のテスト（時間制限なし）
             print("🧪 テストモード: 全地点処理（時間制限なし）")
-            for station_key, station_config in STATIONS.items():
-                print(f"\n{'='*30}")
-                process_station(station_key, station_config)
+            with create_http_session() as session:
+                process_all_stations(session)
+        elif sys.argv[1] == "--daemon":
+            # 常駐モード（--daemon [間隔秒]）
+            run_daemon(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        elif sys.argv[1] == "--serve":
+            # API サーバーモード（--serve [ポート]）
+            run_api_server(port=int(sys.argv[2]) if len(sys.argv) > 2 else None)
         elif sys.argv[1].startswith("--test-"):
             # 特定地点のテスト
             station_key = sys.argv[1][7:]  # "--test-" を除去
@@ -1135,6 +4294,8 @@ if __name__ == "__main__":
             print("  python wbgt_processor.py --test       # 全地点テスト")
             print("  python wbgt_processor.py --test-ishinomaki # 大阪のみテスト")
             print("  python wbgt_processor.py --test-tateyama # 東京のみテスト")
+            print("  python wbgt_processor.py --daemon [秒] # 常駐モード（秒は更新間隔の上限）")
+            print("  python wbgt_processor.py --serve [ポート] # API サーバーモード")
             print("  python wbgt_processor.py --help       # ヘルプ表示")
         else:
             print(f"❌ 無効なオプション: {sys.argv[1]}")